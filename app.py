@@ -12,6 +12,7 @@ import pandas as pd
 
 from models.deal import Deal, DealStage, DealStatus
 from services.deal_storage import get_deal_storage
+from utils.ehs_processor import warm_up_ehs
 
 load_dotenv()
 
@@ -25,6 +26,9 @@ st.set_page_config(
 # Initialize Storage
 storage = get_deal_storage()
 
+# Préparer les guidelines IFC EHS en arrière-plan (pages DD et IC)
+warm_up_ehs()
+
 # Header
 st.title("🌍 ESG & Impact Pre-Investment Analyzer")
 st.markdown("**Version 2.3** — Workflow multi-stage pour IPAE3")
@@ -75,7 +79,7 @@ for col, title, stage, color in stages_config:
         </div>
         """, unsafe_allow_html=True)
         
-        deals = storage.get_by_stage(stage)
+        deals = storage.get_summaries(stage)
         if deals:
             for deal in deals[:3]:
                 st.caption(f"• {deal.company_name}")
@@ -108,7 +112,7 @@ st.markdown("---")
 # Deals récents
 st.header("🕐 Activité récente")
 
-recent_deals = storage.get_recent_deals(limit=5)
+recent_deals = storage.get_recent_summaries(limit=5)
 
 if recent_deals:
     for deal in recent_deals:
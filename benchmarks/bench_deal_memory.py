@@ -0,0 +1,112 @@
+"""
+Benchmark de l'empreinte mémoire des deals en cache sur un portfolio synthétique.
+
+Mesure (tracemalloc) la mémoire des deals complets (Deal.from_dict) et des
+en-têtes (DealSummary) décodés depuis leur JSON, comme au chargement du
+stockage, ainsi que le RSS du processus.
+Pour comparer deux versions du modèle, lancer le benchmark sur chacune.
+
+Usage:
+    python -m benchmarks.bench_deal_memory [nombre_de_deals]
+"""
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from models.deal import Deal, DealStage, DealStatus, DealSummary, ESAPItem, StageData
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:
+    # Windows : RSS non mesuré
+    HAS_RESOURCE = False
+
+COUNTRIES = ["Sénégal", "Côte d'Ivoire", "Mali", "Burkina Faso", "Niger", "Bénin", "Togo", "Guinée"]
+SECTORS = ["Agribusiness", "Santé", "Énergie", "Tech & Digital", "Éducation", "Industrie"]
+STAGES = [DealStage.SCREENING, DealStage.DUE_DILIGENCE, DealStage.INVESTMENT_COMMITTEE, DealStage.MONITORING]
+
+
+def synthetic_deal(i: int, rnd: random.Random) -> Deal:
+    """Deal réaliste : historique de stages, commentaires, ESAP et KPIs en monitoring."""
+    now = datetime(2025, 1, 1) + timedelta(hours=i)
+    deal = Deal(
+        id=f"D{i:06d}",
+        created_at=now,
+        updated_at=now,
+        company_name=f"Entreprise {i}",
+        country=rnd.choice(COUNTRIES),
+        sector=rnd.choice(SECTORS),
+        subsector="Transformation",
+        description=f"Activité de l'entreprise {i} " * 5,
+        employees=rnd.randrange(10, 500),
+        revenue="1-5M EUR",
+        risk_category=rnd.choice(["A", "B+", "B-", "C"]),
+        applicable_standards=["PS1", "PS2"],
+        two_x_data={"women_ownership_pct": rnd.randrange(100), "women_management_pct": rnd.randrange(100)},
+        two_x_eligible=rnd.random() < 0.4,
+        tags=["pipeline"]
+    )
+    last = rnd.randrange(len(STAGES))
+    for position, stage in enumerate(STAGES[:last + 1]):
+        deal.stage_history[stage.value] = StageData(
+            stage=stage,
+            status=DealStatus.APPROVED if position < last else DealStatus.IN_PROGRESS,
+            started_at=now,
+            analyst="Analyste",
+            analysis_result="Analyse détaillée. " * rnd.randrange(20, 200),
+            checklist_status={f"item_{n}": "done" for n in range(8)},
+            comments=[{"text": "RAS", "author": "Analyste", "date": now.isoformat()}]
+        )
+    deal.current_stage = STAGES[last]
+    if deal.current_stage == DealStage.MONITORING:
+        for n in range(6):
+            deal.esap_items.append(ESAPItem(
+                id=f"E{n}", category="HSE", action="Mettre en place un SGES", responsible="DG",
+                deadline=now + timedelta(days=90), status=rnd.choice(["completed", "in_progress"]),
+                priority="high"
+            ))
+        deal.monitoring_kpis = [{"date": now.isoformat(), "data": {"women_employees_pct": 40}}] * 4
+    return deal
+
+
+def measure(label: str, documents, decode) -> float:
+    """Mémoire retenue (octets par deal) par les objets décodés."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    objects = [decode(json.loads(document)) for document in documents]
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_deal = retained / len(objects)
+    print(f"{label:<14} {retained / 2**20:>10.1f} {per_deal:>12.0f} {elapsed:>10.2f}")
+    del objects
+    return per_deal
+
+
+def run(count: int = 5000) -> None:
+    rnd = random.Random(0)
+    documents = [json.dumps(synthetic_deal(i, rnd).to_dict()) for i in range(count)]
+
+    print(f"{count} deals synthétiques")
+    print(f"{'représentation':<14} {'Mo':>10} {'octets/deal':>12} {'secondes':>10}")
+    measure("dict JSON", documents, lambda data: data)
+    measure("Deal", documents, Deal.from_dict)
+    measure("DealSummary", documents, DealSummary.from_deal_dict)
+
+    if not HAS_RESOURCE:
+        return
+    # RSS avec le portfolio complet en mémoire
+    deals = [Deal.from_dict(json.loads(document)) for document in documents]
+    # ru_maxrss : Ko sous Linux
+    print(f"RSS max : {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} Mo ({len(deals)} deals chargés)")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,82 @@
+"""
+Benchmark du coût d'une sauvegarde selon la taille du deal et de la modification.
+
+Sauvegarde (DealStorage.save, écriture synchrone) un deal dont les analyses
+par stage grossissent, sur les deux backends, avec une petite modification
+(commentaire) puis une modification d'une partie volumineuse (analyse).
+Une petite modification doit coûter presque autant sur un gros deal que sur
+un petit : seuls le document principal (sans analyses ni KPIs) et les parties
+modifiées sont sérialisés et écrits, et seuls les champs modifiés sont
+recopiés dans le cache.
+Reste proportionnel à la taille du deal : la comparaison au dernier état
+sauvegardé (Deal.mark_changes), qui détecte les mutations en place non
+signalées ; elle compare les valeurs sans les copier ni les sérialiser.
+
+Usage:
+    python -m benchmarks.bench_deal_save [nombre_de_sauvegardes]
+"""
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_deal_memory import synthetic_deal
+from models.deal import DealStage, get_codec
+from services.deal_archive import DealArchive
+from services.deal_storage import DealStorage, _get_shared_cache
+from services.storage_backends import create_backend
+
+# Répétitions de la phrase d'analyse par stage (~20 octets chacune)
+ANALYSIS_SIZES = [100, 1_000, 10_000]
+
+
+def large_deal(repeat: int):
+    """Deal en monitoring dont chaque analyse fait `repeat` phrases."""
+    rnd = random.Random(0)
+    deal = synthetic_deal(0, rnd)
+    while deal.current_stage != DealStage.MONITORING:
+        deal = synthetic_deal(0, rnd)
+    for stage_data in deal.stage_history.values():
+        stage_data.analysis_result = "Analyse détaillée. " * repeat
+    return deal
+
+
+def time_saves(storage: DealStorage, deal_id: str, change, count: int) -> float:
+    """Durée moyenne (ms) d'une sauvegarde après `change(deal, n)`."""
+    deal = storage.get(deal_id)
+    start = time.perf_counter()
+    for n in range(count):
+        change(deal, n)
+        storage.save(deal)
+    return (time.perf_counter() - start) / count * 1000
+
+
+def add_comment(deal, n: int):
+    deal.add_comment(f"Point de suivi {n}", author="Analyste")
+
+
+def rewrite_analysis(deal, n: int):
+    deal.stage_history[DealStage.MONITORING.value].analysis_result += f" Mise à jour {n}."
+
+
+def run(count: int = 50) -> None:
+    print(f"{'backend':<8} {'analyse (Ko)':>12} {'commentaire (ms)':>17} {'analyse (ms)':>13}")
+    for kind in ("json", "sqlite"):
+        for repeat in ANALYSIS_SIZES:
+            _get_shared_cache.clear()
+            with tempfile.TemporaryDirectory() as tmp:
+                root = Path(tmp)
+                backend = create_backend(kind, root / "deals", root / "deals.db", get_codec("json"))
+                deal = large_deal(repeat)
+                backend.save(deal)
+                storage = DealStorage(backend=backend, archive=DealArchive(root / "archive"))
+                size = len(deal.stage_history[DealStage.MONITORING.value].analysis_result) / 1024
+                comment = time_saves(storage, deal.id, add_comment, count)
+                analysis = time_saves(storage, deal.id, rewrite_analysis, count)
+                print(f"{kind:<8} {size:>12.0f} {comment:>17.2f} {analysis:>13.2f}")
+    _get_shared_cache.clear()
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
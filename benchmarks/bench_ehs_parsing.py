@@ -0,0 +1,93 @@
+"""
+Benchmark de l'extraction des guidelines IFC-EHS selon le backend et le nombre de processus.
+
+Avec --memory : RSS d'un processus servant les index de recherche, chargés
+depuis le JSON (dictionnaires par processus) ou mappés depuis le fichier
+partagé (EHSProcessor(shared=True)). Chaque mesure tourne dans un processus
+neuf ; RssAnon est la mémoire privée du processus, RssFile les pages du
+fichier mappé, partagées par tous les processus.
+
+Résultat relevé (corpus synthétique de 60 PDF × 80 pages, PyPDF2) :
+    index JSON    RssAnon +260 Mo  RssFile  +2 Mo
+    index mappés  RssAnon   +0 Mo  RssFile +14 Mo
+
+Usage:
+    python -m benchmarks.bench_ehs_parsing [ehs_dir]
+    python -m benchmarks.bench_ehs_parsing --memory [ehs_dir]
+"""
+import gc
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict
+
+from utils.ehs_processor import HAS_PYMUPDF, HAS_PYPDF2, EHSProcessor, extract_many
+
+QUERIES = ["wastewater effluent limits", "occupational health noise", "hazardous waste storage", "community health safety"]
+
+
+def run(ehs_dir: str = "ifc-ehs") -> None:
+    paths = sorted(
+        os.path.join(ehs_dir, f) for f in os.listdir(ehs_dir) if f.endswith('.pdf')
+    )
+    backends = [b for b, ok in (("pypdf2", HAS_PYPDF2), ("pymupdf", HAS_PYMUPDF)) if ok]
+
+    cpu = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, 8, cpu} & set(range(1, cpu + 1)))
+
+    print(f"{len(paths)} PDFs, {cpu} cœurs")
+    print(f"{'backend':<10} {'workers':>8} {'secondes':>10} {'speedup':>8}")
+    for backend in backends:
+        baseline = None
+        for workers in worker_counts:
+            start = time.perf_counter()
+            extract_many(paths, backend, max_workers=workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{backend:<10} {workers:>8} {elapsed:>10.2f} {baseline / elapsed:>7.1f}x")
+
+
+def _rss() -> Dict[str, float]:
+    """RssAnon et RssFile du processus courant, en Mo (Linux)."""
+    rss = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("RssAnon", "RssFile"):
+                rss[name] = int(value.split()[0]) / 1024
+    return rss
+
+
+def _serve(ehs_dir: str, cache_dir: str, shared: bool) -> Dict[str, float]:
+    """Charge les index et répond aux requêtes (processus neuf) ; retourne l'écart de RSS."""
+    gc.collect()
+    before = _rss()
+    processor = EHSProcessor(ehs_dir, cache_dir=cache_dir, lazy=True, shared=shared)
+    processor.index
+    for query in QUERIES:
+        processor.search(query, k=6)
+    gc.collect()
+    after = _rss()
+    return {name: after[name] - before[name] for name in after}
+
+
+def memory(ehs_dir: str = "ifc-ehs") -> None:
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # Construire d'abord les deux formats : seules les lectures sont mesurées
+        EHSProcessor(ehs_dir, cache_dir=cache_dir, lazy=True).index
+        EHSProcessor(ehs_dir, cache_dir=cache_dir, shared=True).index
+        print(f"{'index':<14} {'RssAnon Mo':>11} {'RssFile Mo':>11}")
+        for label, shared in (("JSON", False), ("mappés", True)):
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                delta = executor.submit(_serve, ehs_dir, cache_dir, shared).result()
+            print(f"{label:<14} {delta['RssAnon']:>+11.0f} {delta['RssFile']:>+11.0f}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["--memory"]:
+        memory(args[1] if len(args) > 1 else "ifc-ehs")
+    else:
+        run(args[0] if args else "ifc-ehs")
@@ -2,5 +2,6 @@
 UI Components for ESG Analyzer v2.0
 """
 from .two_x_widget import render_2x_challenge_widget, render_2x_summary_badge
+from .save_status import save_deal, render_save_conflict
 
-__all__ = ['render_2x_challenge_widget', 'render_2x_summary_badge']
+__all__ = ['render_2x_challenge_widget', 'render_2x_summary_badge', 'save_deal', 'render_save_conflict']
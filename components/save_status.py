@@ -0,0 +1,48 @@
+"""
+Composant Streamlit de sauvegarde des deals depuis les pages.
+Une sauvegarde refusée (deal modifié entre-temps par une autre session ou
+un autre processus, ou erreur d'écriture) n'est jamais présentée comme réussie :
+la page est relancée avec le deal à jour et un avertissement.
+"""
+
+import streamlit as st
+
+from models.deal import Deal
+from services.deal_storage import DealStorage
+
+# Avertissement à afficher après la relance de la page
+CONFLICT_KEY = "deal_save_conflict"
+
+
+def save_deal(storage: DealStorage, deal: Deal) -> bool:
+    """
+    Sauvegarde un deal.
+
+    En cas d'échec, l'avertissement est gardé en session et la page relancée
+    (le code suivant l'appel ne s'exécute donc qu'après une sauvegarde réussie) :
+    elle relit alors la version à jour du deal (le stockage recharge le deal
+    en conflit), les modifications de l'utilisateur sont à refaire.
+
+    Args:
+        storage: Service de stockage
+        deal: Deal modifié
+
+    Returns:
+        True si le deal a été sauvegardé (sinon la page est relancée)
+    """
+    if storage.save(deal):
+        return True
+    st.session_state[CONFLICT_KEY] = deal.company_name
+    st.rerun()
+    return False
+
+
+def render_save_conflict():
+    """Affiche l'avertissement d'une sauvegarde refusée lors de l'exécution précédente."""
+    company_name = st.session_state.pop(CONFLICT_KEY, None)
+    if company_name is not None:
+        st.warning(
+            f"⚠️ **{company_name}** n'a pas été sauvegardé : le deal a été modifié "
+            "entre-temps (autre session) ou n'a pas pu être écrit. "
+            "La version à jour est affichée, veuillez refaire vos modifications."
+        )
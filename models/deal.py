@@ -3,12 +3,158 @@ Modèle de données pour un deal (opportunité d'investissement).
 Gère la persistence et les transitions entre stages du cycle d'investissement IPAE3.
 """
 
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any
-from datetime import datetime
+from dataclasses import dataclass, field, fields as dataclass_fields
+from typing import Callable, Dict, List, Optional, Any, Set, Tuple
+from datetime import datetime, timedelta
 from enum import Enum
+import copy
 import json
 import hashlib
+import sys
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    HAS_MSGPACK = False
+
+
+# Parties volumineuses d'un deal, persistées séparément du reste du document
+KPI_PART = "monitoring_kpis"
+ANALYSIS_PART = "analysis:"  # suivi du nom du stage
+
+# Dataclasses à slots (Python 3.10+) : pas de __dict__ par instance
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+def _intern(value):
+    """Partage les chaînes répétées d'un deal à l'autre (pays, secteurs, statuts...)."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _intern_list(values: Optional[List]) -> List:
+    return [_intern(value) for value in values or []]
+
+
+# Origine des dates encodées en entiers (codec binaire)
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _parse_datetime(value) -> Optional[datetime]:
+    """Date ISO 8601, ou entier de microsecondes depuis l'epoch (codec msgpack)."""
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return _EPOCH + timedelta(microseconds=value)
+    return datetime.fromisoformat(value)
+
+
+# =============================================================================
+# Version du schéma des documents de deal
+# =============================================================================
+
+# À incrémenter à chaque évolution du modèle, avec la fonction de migration
+# correspondante (@schema_upgrade(ancienne_version))
+SCHEMA_VERSION = 1
+
+_SCHEMA_UPGRADES: Dict[int, Callable[[Dict], None]] = {}
+
+
+def schema_upgrade(from_version: int):
+    """
+    Enregistre la migration (en place) d'un document de `from_version` à
+    `from_version + 1`.
+    """
+    def register(upgrade: Callable[[Dict], None]) -> Callable[[Dict], None]:
+        _SCHEMA_UPGRADES[from_version] = upgrade
+        return upgrade
+    return register
+
+
+def upgrade_document(data: Dict) -> bool:
+    """
+    Met à jour (en place) un document de deal sérialisé au schéma courant.
+    Retourne True si le document a été migré. Un document d'un schéma plus
+    récent (écrit par une version ultérieure de l'application) est laissé tel quel.
+    """
+    version = data.get("schema_version", 0)
+    if version >= SCHEMA_VERSION:
+        return False
+    while version < SCHEMA_VERSION:
+        _SCHEMA_UPGRADES[version](data)
+        version += 1
+    data["schema_version"] = SCHEMA_VERSION
+    return True
+
+
+@schema_upgrade(0)
+def _upgrade_v0(data: Dict) -> None:
+    """Documents antérieurs au versionnage : champs ajoutés depuis, valeurs par défaut."""
+    for key, default in (("geographic_scope", []), ("applicable_standards", []), ("two_x_data", {}),
+                         ("uploaded_documents", []), ("esap_items", []), ("monitoring_kpis", []),
+                         ("tags", [])):
+        if data.get(key) is None:
+            data[key] = default
+    data.setdefault("risk_category", "B-")
+    data.setdefault("two_x_eligible", False)
+    data.setdefault("two_x_criteria_met", 0)
+    data.setdefault("version", 0)
+
+
+class DirtyTracking:
+    """
+    Suivi des champs modifiés depuis le chargement ou la dernière sauvegarde.
+    Les affectations sont détectées automatiquement ; les mutations en place
+    (listes, dictionnaires) sont signalées par mark_dirty(), ou détectées à la
+    sauvegarde par comparaison au dernier état sauvegardé (Deal.mark_changes).
+    Les opérations métier effectuées sont aussi notées (record_op) pour le
+    journal des mutations.
+    """
+    __slots__ = ("_dirty", "_ops")
+    
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        if not name.startswith("_"):
+            self.mark_dirty(name)
+    
+    def mark_dirty(self, *names: str):
+        """Marque des champs comme modifiés."""
+        try:
+            dirty = self._dirty
+        except AttributeError:
+            dirty = set()
+            object.__setattr__(self, "_dirty", dirty)
+        dirty.update(names)
+    
+    @property
+    def dirty_fields(self) -> Set[str]:
+        """Champs modifiés depuis le dernier clear_dirty()."""
+        return set(getattr(self, "_dirty", ()))
+    
+    def clear_dirty(self):
+        """Marque l'objet comme identique à sa version persistée."""
+        object.__setattr__(self, "_dirty", set())
+    
+    def record_op(self, name: str, **details):
+        """Note une opération métier (advance_stage, reject, checklist...)."""
+        try:
+            ops = self._ops
+        except AttributeError:
+            ops = []
+            object.__setattr__(self, "_ops", ops)
+        ops.append({"op": name, **details})
+    
+    def pop_ops(self) -> List[Dict]:
+        """Retourne et oublie les opérations notées."""
+        ops = getattr(self, "_ops", None) or []
+        object.__setattr__(self, "_ops", [])
+        return ops
 
 
 class DealStage(Enum):
@@ -31,8 +177,8 @@ class DealStatus(Enum):
     ON_HOLD = "on_hold"
 
 
-@dataclass
-class StageData:
+@dataclass(**_SLOTS)
+class StageData(DirtyTracking):
     """Données spécifiques à une étape du cycle."""
     stage: DealStage
     status: DealStatus
@@ -53,6 +199,14 @@ class StageData:
     decision_rationale: Optional[str] = None
     conditions: List[str] = field(default_factory=list)
     
+    def set_checklist_status(self, item_id: str, status: str):
+        """Met à jour le statut d'un point de la checklist."""
+        if self.checklist_status is None:
+            self.checklist_status = {}
+        self.checklist_status[item_id] = status
+        self.mark_dirty("checklist_status")
+        self.record_op("checklist", item_id=item_id, status=status)
+    
     def to_dict(self) -> Dict:
         return {
             "stage": self.stage.value,
@@ -71,24 +225,29 @@ class StageData:
     
     @classmethod
     def from_dict(cls, data: Dict) -> 'StageData':
-        return cls(
+        checklist_status = data.get("checklist_status")
+        if checklist_status is not None:
+            checklist_status = {_intern(key): _intern(value) for key, value in checklist_status.items()}
+        stage_data = cls(
             stage=DealStage(data["stage"]),
             status=DealStatus(data["status"]),
-            started_at=datetime.fromisoformat(data["started_at"]),
-            completed_at=datetime.fromisoformat(data["completed_at"]) if data.get("completed_at") else None,
-            analyst=data.get("analyst"),
+            started_at=_parse_datetime(data["started_at"]),
+            completed_at=_parse_datetime(data.get("completed_at")),
+            analyst=_intern(data.get("analyst")),
             analysis_result=data.get("analysis_result"),
-            checklist_status=data.get("checklist_status"),
+            checklist_status=checklist_status,
             documents=data.get("documents", []),
             comments=data.get("comments", []),
             decision=data.get("decision"),
             decision_rationale=data.get("decision_rationale"),
             conditions=data.get("conditions", [])
         )
+        stage_data.clear_dirty()
+        return stage_data
 
 
-@dataclass
-class ESAPItem:
+@dataclass(**_SLOTS)
+class ESAPItem(DirtyTracking):
     """Environmental and Social Action Plan item."""
     id: str
     category: str  # E&S, Gouvernance, Genre/2X, HSE, Climat
@@ -115,17 +274,19 @@ class ESAPItem:
     
     @classmethod
     def from_dict(cls, data: Dict) -> 'ESAPItem':
-        return cls(
+        item = cls(
             id=data["id"],
-            category=data["category"],
+            category=_intern(data["category"]),
             action=data["action"],
-            responsible=data["responsible"],
-            deadline=datetime.fromisoformat(data["deadline"]) if data.get("deadline") else None,
-            status=data["status"],
-            priority=data["priority"],
+            responsible=_intern(data["responsible"]),
+            deadline=_parse_datetime(data.get("deadline")),
+            status=_intern(data["status"]),
+            priority=_intern(data["priority"]),
             kpi=data.get("kpi"),
             progress_notes=data.get("progress_notes", [])
         )
+        item.clear_dirty()
+        return item
     
     def is_overdue(self) -> bool:
         """Vérifie si l'action est en retard."""
@@ -134,8 +295,8 @@ class ESAPItem:
         return False
 
 
-@dataclass
-class Deal:
+@dataclass(**_SLOTS)
+class Deal(DirtyTracking):
     """
     Modèle principal d'un deal/opportunité d'investissement.
     Contient toutes les données à travers les stages du cycle.
@@ -184,6 +345,13 @@ class Deal:
     # Métadonnées
     tags: List[str] = field(default_factory=list)
     
+    # Version de stockage de la dernière écriture (contrôle de concurrence)
+    version: int = 0
+    
+    # updated_at de l'état chargé par la session (contrôle des conflits entre
+    # sessions) ; jamais sérialisé, insensible aux méthodes métier qui datent le deal
+    _loaded_at: Optional[datetime] = field(default=None, init=False, repr=False, compare=False)
+    
     @staticmethod
     def generate_id(company_name: str) -> str:
         """Génère un ID unique basé sur le nom et timestamp."""
@@ -191,6 +359,130 @@ class Deal:
         hash_input = f"{company_name}_{timestamp}"
         return hashlib.md5(hash_input.encode()).hexdigest()[:12].upper()
     
+    def clear_dirty(self):
+        """Marque le deal, ses stages et ses actions ESAP comme persistés."""
+        DirtyTracking.clear_dirty(self)
+        for stage_data in self.stage_history.values():
+            stage_data.clear_dirty()
+        for item in self.esap_items:
+            item.clear_dirty()
+    
+    def dirty_parts(self) -> Set[str]:
+        """Parties volumineuses (KPIs, analyses par stage) modifiées depuis le chargement."""
+        parts = set()
+        if KPI_PART in self.dirty_fields:
+            parts.add(KPI_PART)
+        for stage_name, stage_data in self.stage_history.items():
+            if "analysis_result" in stage_data.dirty_fields:
+                parts.add(ANALYSIS_PART + stage_name)
+        return parts
+    
+    def mark_parts_dirty(self, parts: Optional[Set[str]] = None):
+        """Marque des parties volumineuses comme modifiées (toutes si parts est None)."""
+        if parts is None or KPI_PART in parts:
+            self.mark_dirty(KPI_PART)
+        for stage_name, stage_data in self.stage_history.items():
+            if parts is None or ANALYSIS_PART + stage_name in parts:
+                stage_data.mark_dirty("analysis_result")
+    
+    def mark_changes(self, base: 'Deal'):
+        """
+        Marque comme modifiés les champs qui diffèrent de `base` (dernier état
+        sauvegardé) : les mutations en place non signalées par mark_dirty()
+        (deal.tags.append...) sont ainsi écrites et journalisées.
+        Les champs sont comparés directement, sans sérialiser les deux deals.
+        """
+        for name in _DEAL_FIELDS:
+            if getattr(self, name) != getattr(base, name):
+                self.mark_dirty(name)
+        if self.stage_history.keys() != base.stage_history.keys():
+            self.mark_dirty("stage_history")
+        for stage_name, stage_data in self.stage_history.items():
+            base_stage = base.stage_history.get(stage_name)
+            if base_stage is None:
+                stage_data.mark_dirty(*_STAGE_FIELDS)
+            else:
+                stage_data.mark_dirty(
+                    *(name for name in _STAGE_FIELDS if getattr(stage_data, name) != getattr(base_stage, name))
+                )
+    
+    def changed_fields(self) -> Tuple[Set[str], Dict[str, Set[str]]]:
+        """
+        Champs modifiés du deal et de chacun de ses stages, à relever avant
+        l'écriture (qui les oublie) pour copy_changes().
+        """
+        return self.dirty_fields, {
+            stage_name: stage_data.dirty_fields for stage_name, stage_data in self.stage_history.items()
+        }
+    
+    def copy_changes(self, source: 'Deal', changes: Tuple[Set[str], Dict[str, Set[str]]]):
+        """
+        Recopie dans ce deal les champs de `source` relevés par changed_fields() :
+        la copie du cache est mise à jour sans recopier le deal entier.
+        Les valeurs sont copiées en profondeur (aucun objet partagé avec source).
+        """
+        deal_fields, stage_fields = changes
+        for name in _DEAL_FIELDS:
+            if name in deal_fields:
+                setattr(self, name, copy.deepcopy(getattr(source, name)))
+        
+        stages = {}
+        for stage_name, stage_data in source.stage_history.items():
+            target = self.stage_history.get(stage_name)
+            if target is None:
+                target = copy.deepcopy(stage_data)
+                target.mark_dirty(*_STAGE_FIELDS)
+            else:
+                for name in _STAGE_FIELDS:
+                    if name in stage_fields.get(stage_name, ()):
+                        setattr(target, name, copy.deepcopy(getattr(stage_data, name)))
+            stages[stage_name] = target
+        if "stage_history" in deal_fields:
+            self.stage_history = stages
+    
+    def pop_ops(self) -> List[Dict]:
+        """Retourne et oublie les opérations notées sur le deal et ses stages."""
+        ops = DirtyTracking.pop_ops(self)
+        for stage_data in self.stage_history.values():
+            ops.extend(stage_data.pop_ops())
+        return ops
+    
+    def dirty_patch(self) -> Dict:
+        """
+        Champs modifiés depuis le chargement, sous forme sérialisée.
+        Les stages modifiés ne portent que leurs champs modifiés (clé "stages").
+        La version de stockage n'en fait jamais partie.
+        """
+        data = self.to_dict()
+        fields = self.dirty_fields - {"version"}
+        patch = {key: value for key, value in data.items() if key in fields and key != "stage_history"}
+        
+        if "stage_history" in fields:
+            patch["stage_history"] = data["stage_history"]
+        else:
+            stages = {}
+            for stage_name, stage_data in self.stage_history.items():
+                if stage_data.dirty_fields:
+                    stage_dict = data["stage_history"][stage_name]
+                    stages[stage_name] = {key: stage_dict[key] for key in stage_data.dirty_fields if key in stage_dict}
+            if stages:
+                patch["stages"] = stages
+        
+        if "esap_items" not in patch and any(item.dirty_fields for item in self.esap_items):
+            patch["esap_items"] = data["esap_items"]
+        return patch
+    
+    @staticmethod
+    def apply_patch(data: Dict, patch: Dict) -> Dict:
+        """Applique un patch (dirty_patch) au dictionnaire d'un deal."""
+        for key, value in patch.items():
+            if key == "stages":
+                for stage_name, stage_fields in value.items():
+                    data.setdefault("stage_history", {}).setdefault(stage_name, {}).update(stage_fields)
+            else:
+                data[key] = value
+        return data
+    
     def get_current_stage_data(self) -> Optional[StageData]:
         """Retourne les données du stage actuel."""
         return self.stage_history.get(self.current_stage.value)
@@ -266,6 +558,8 @@ class Deal:
         )
         
         self.stage_history[target_stage.value] = new_stage_data
+        self.mark_dirty("stage_history")
+        self.record_op("advance_stage", stage=target_stage.value)
         self.current_stage = target_stage
         self.updated_at = datetime.now()
         
@@ -281,6 +575,7 @@ class Deal:
             current_data.completed_at = datetime.now()
         
         self.current_stage = DealStage.REJECTED
+        self.record_op("reject")
         self.updated_at = datetime.now()
     
     def add_comment(self, text: str, author: str = "Analyste"):
@@ -292,11 +587,15 @@ class Deal:
                 "author": author,
                 "timestamp": datetime.now().isoformat()
             })
+            current_data.mark_dirty("comments")
+            self.record_op("add_comment")
             self.updated_at = datetime.now()
     
     def add_esap_item(self, item: ESAPItem):
         """Ajoute une action ESAP."""
         self.esap_items.append(item)
+        self.mark_dirty("esap_items")
+        self.record_op("add_esap_item", item_id=item.id)
         self.updated_at = datetime.now()
     
     def update_esap_status(self, item_id: str, new_status: str, note: str = None):
@@ -310,6 +609,8 @@ class Deal:
                         "note": note,
                         "status": new_status
                     })
+                    item.mark_dirty("progress_notes")
+                self.record_op("update_esap_status", item_id=item_id, status=new_status)
                 self.updated_at = datetime.now()
                 return True
         return False
@@ -321,6 +622,15 @@ class Deal:
             "data": kpi_data
         }
         self.monitoring_kpis.append(snapshot)
+        self.mark_dirty(KPI_PART)
+        self.record_op("add_kpi_snapshot")
+        self.updated_at = datetime.now()
+    
+    def update_two_x_data(self, **values):
+        """Met à jour les indicateurs 2X Challenge."""
+        self.two_x_data.update(values)
+        self.mark_dirty("two_x_data")
+        self.record_op("update_two_x_data")
         self.updated_at = datetime.now()
     
     def get_esap_summary(self) -> Dict:
@@ -368,12 +678,19 @@ class Deal:
             "uploaded_documents": self.uploaded_documents,
             "esap_items": [item.to_dict() for item in self.esap_items],
             "monitoring_kpis": self.monitoring_kpis,
-            "tags": self.tags
+            "tags": self.tags,
+            "version": self.version,
+            "schema_version": SCHEMA_VERSION
         }
     
     @classmethod
     def from_dict(cls, data: Dict) -> 'Deal':
-        """Désérialise un deal depuis un dictionnaire."""
+        """
+        Désérialise un deal depuis un dictionnaire, migré au schéma courant si
+        besoin (le document est alors réécrit en entier à la prochaine sauvegarde).
+        """
+        upgraded = upgrade_document(data)
+        
         # Reconstruire stage_history
         stage_history = {}
         for stage_name, stage_data in data.get("stage_history", {}).items():
@@ -382,22 +699,22 @@ class Deal:
         # Reconstruire ESAP items
         esap_items = [ESAPItem.from_dict(item) for item in data.get("esap_items", [])]
         
-        return cls(
+        deal = cls(
             id=data["id"],
-            created_at=datetime.fromisoformat(data["created_at"]),
-            updated_at=datetime.fromisoformat(data["updated_at"]),
+            created_at=_parse_datetime(data["created_at"]),
+            updated_at=_parse_datetime(data["updated_at"]),
             company_name=data["company_name"],
-            country=data["country"],
-            sector=data["sector"],
-            subsector=data["subsector"],
+            country=_intern(data["country"]),
+            sector=_intern(data["sector"]),
+            subsector=_intern(data["subsector"]),
             description=data["description"],
             employees=data.get("employees"),
             revenue=data.get("revenue"),
             year_founded=data.get("year_founded"),
             target_market=data.get("target_market"),
-            geographic_scope=data.get("geographic_scope", []),
-            risk_category=data.get("risk_category", "B-"),
-            applicable_standards=data.get("applicable_standards", []),
+            geographic_scope=_intern_list(data.get("geographic_scope")),
+            risk_category=_intern(data.get("risk_category", "B-")),
+            applicable_standards=_intern_list(data.get("applicable_standards")),
             two_x_data=data.get("two_x_data", {}),
             two_x_eligible=data.get("two_x_eligible", False),
             two_x_criteria_met=data.get("two_x_criteria_met", 0),
@@ -406,8 +723,28 @@ class Deal:
             uploaded_documents=data.get("uploaded_documents", []),
             esap_items=esap_items,
             monitoring_kpis=data.get("monitoring_kpis", []),
-            tags=data.get("tags", [])
+            tags=_intern_list(data.get("tags")),
+            version=data.get("version", 0)
         )
+        deal.clear_dirty()
+        if upgraded:
+            deal.mark_dirty("schema_version")
+            deal.mark_parts_dirty()
+        return deal
+    
+    @property
+    def needs_schema_upgrade(self) -> bool:
+        """True si le deal a été lu dans un schéma antérieur et pas encore réécrit."""
+        return "schema_version" in self.dirty_fields
+    
+    def encode(self, codec: str = "json") -> bytes:
+        """Sérialise avec un codec ("json" ou "msgpack")."""
+        return get_codec(codec).encode(self.to_dict())
+    
+    @classmethod
+    def decode(cls, raw: bytes) -> 'Deal':
+        """Désérialise un document encodé (format reconnu automatiquement)."""
+        return cls.from_dict(decode_document(raw))
     
     def to_json(self) -> str:
         """Sérialise en JSON."""
@@ -417,3 +754,245 @@ class Deal:
     def from_json(cls, json_str: str) -> 'Deal':
         """Désérialise depuis JSON."""
         return cls.from_dict(json.loads(json_str))
+
+
+# Champs comparés et recopiés un à un (mark_changes, copy_changes) ; l'historique
+# des stages est traité stage par stage, la version de stockage jamais
+_DEAL_FIELDS = tuple(
+    f.name for f in dataclass_fields(Deal) if f.name not in ("stage_history", "version") and not f.name.startswith("_")
+)
+_STAGE_FIELDS = tuple(f.name for f in dataclass_fields(StageData) if not f.name.startswith("_"))
+
+
+@dataclass(**_SLOTS)
+class DealSummary:
+    """
+    En-tête léger d'un deal pour les listes et tableaux de bord.
+    Construit sans désérialiser les stages, actions ESAP, KPIs et analyses ;
+    le deal complet n'est chargé qu'à son ouverture.
+    """
+    id: str
+    company_name: str
+    country: str
+    sector: str
+    subsector: str
+    current_stage: DealStage
+    status: Optional[DealStatus]  # statut du stage actuel
+    risk_category: str
+    two_x_eligible: bool
+    created_at: datetime
+    updated_at: datetime
+    version: int = 0
+    analyst: Optional[str] = None  # analyste du stage actuel
+    tags: List[str] = field(default_factory=list)
+    
+    # Avancement ESAP (deals en monitoring), pour les statistiques du portfolio
+    esap_total: int = 0
+    esap_completed: int = 0
+    
+    @classmethod
+    def from_deal(cls, deal: Deal) -> 'DealSummary':
+        """En-tête d'un deal chargé."""
+        stage_data = deal.get_current_stage_data()
+        esap_total = esap_completed = 0
+        if deal.current_stage == DealStage.MONITORING:
+            esap_total = len(deal.esap_items)
+            esap_completed = sum(1 for item in deal.esap_items if item.status == "completed")
+        return cls(
+            id=deal.id,
+            company_name=deal.company_name,
+            country=deal.country,
+            sector=deal.sector,
+            subsector=deal.subsector,
+            current_stage=deal.current_stage,
+            status=stage_data.status if stage_data else None,
+            risk_category=deal.risk_category,
+            two_x_eligible=deal.two_x_eligible,
+            created_at=deal.created_at,
+            updated_at=deal.updated_at,
+            version=deal.version,
+            analyst=stage_data.analyst if stage_data else None,
+            tags=list(deal.tags),
+            esap_total=esap_total,
+            esap_completed=esap_completed
+        )
+    
+    @classmethod
+    def from_deal_dict(cls, data: Dict) -> 'DealSummary':
+        """En-tête lu directement dans le dictionnaire sérialisé d'un deal (Deal.to_dict)."""
+        upgrade_document(data)
+        stage = DealStage(data["current_stage"])
+        stage_data = data.get("stage_history", {}).get(stage.value)
+        esap_total = esap_completed = 0
+        if stage == DealStage.MONITORING:
+            esap_items = data.get("esap_items", [])
+            esap_total = len(esap_items)
+            esap_completed = sum(1 for item in esap_items if item.get("status") == "completed")
+        return cls(
+            id=data["id"],
+            company_name=data["company_name"],
+            country=_intern(data["country"]),
+            sector=_intern(data["sector"]),
+            subsector=_intern(data["subsector"]),
+            current_stage=stage,
+            status=DealStatus(stage_data["status"]) if stage_data else None,
+            risk_category=_intern(data.get("risk_category", "B-")),
+            two_x_eligible=data.get("two_x_eligible", False),
+            created_at=_parse_datetime(data["created_at"]),
+            updated_at=_parse_datetime(data["updated_at"]),
+            version=data.get("version", 0),
+            analyst=_intern(stage_data.get("analyst")) if stage_data else None,
+            tags=_intern_list(data.get("tags")),
+            esap_total=esap_total,
+            esap_completed=esap_completed
+        )
+    
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "company_name": self.company_name,
+            "country": self.country,
+            "sector": self.sector,
+            "subsector": self.subsector,
+            "current_stage": self.current_stage.value,
+            "status": self.status.value if self.status else None,
+            "risk_category": self.risk_category,
+            "two_x_eligible": self.two_x_eligible,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+            "version": self.version,
+            "analyst": self.analyst,
+            "tags": self.tags,
+            "esap_total": self.esap_total,
+            "esap_completed": self.esap_completed
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'DealSummary':
+        return cls(
+            id=data["id"],
+            company_name=data["company_name"],
+            country=_intern(data["country"]),
+            sector=_intern(data["sector"]),
+            subsector=_intern(data["subsector"]),
+            current_stage=DealStage(data["current_stage"]),
+            status=DealStatus(data["status"]) if data.get("status") else None,
+            risk_category=_intern(data["risk_category"]),
+            two_x_eligible=data["two_x_eligible"],
+            created_at=_parse_datetime(data["created_at"]),
+            updated_at=_parse_datetime(data["updated_at"]),
+            version=data.get("version", 0),
+            analyst=_intern(data.get("analyst")),
+            tags=_intern_list(data.get("tags")),
+            esap_total=data.get("esap_total", 0),
+            esap_completed=data.get("esap_completed", 0)
+        )
+
+
+# =============================================================================
+# Codecs de sérialisation des documents de deal
+# =============================================================================
+
+class DealCodec:
+    """
+    Format d'encodage des documents de deal (Deal.to_dict) et de leurs
+    parties volumineuses. Le format d'un document est reconnu à la lecture.
+    """
+    name = ""
+    extension = ""
+    
+    def encode(self, data: Any) -> bytes:
+        raise NotImplementedError
+    
+    def decode(self, raw: bytes) -> Any:
+        raise NotImplementedError
+    
+    def detect(self, raw: bytes) -> bool:
+        """True si `raw` est dans ce format."""
+        raise NotImplementedError
+
+
+class JsonCodec(DealCodec):
+    """JSON compact UTF-8 (orjson si disponible)."""
+    name = "json"
+    extension = ".json"
+    
+    def encode(self, data: Any) -> bytes:
+        if HAS_ORJSON:
+            return orjson.dumps(data)
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+    
+    def decode(self, raw: bytes) -> Any:
+        return orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
+    
+    def detect(self, raw: bytes) -> bool:
+        # Documents : objet, tableau (KPIs) ou chaîne (analyse)
+        return raw.lstrip()[:1] in (b"{", b"[", b'"')
+
+
+def _to_epoch(value):
+    """Date ISO sans fuseau -> microsecondes depuis l'epoch (inchangée sinon)."""
+    if not isinstance(value, str):
+        return value
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        return value
+    delta = parsed - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _dates_to_epoch(data: Dict, keys: tuple) -> Dict:
+    """Copie de `data` avec les dates des clés données en entiers."""
+    return {key: _to_epoch(value) if key in keys else value for key, value in data.items()}
+
+
+class MsgpackCodec(DealCodec):
+    """
+    MessagePack binaire. Les dates du deal, de ses stages et de ses actions
+    ESAP sont stockées en entiers (microsecondes depuis l'epoch) : ni
+    formatage ni parsing ISO.
+    """
+    name = "msgpack"
+    extension = ".msgpack"
+    
+    def encode(self, data: Any) -> bytes:
+        if isinstance(data, dict) and "stage_history" in data:
+            data = _dates_to_epoch(data, ("created_at", "updated_at"))
+            data["stage_history"] = {
+                name: _dates_to_epoch(stage, ("started_at", "completed_at"))
+                for name, stage in data["stage_history"].items()
+            }
+            data["esap_items"] = [_dates_to_epoch(item, ("deadline",)) for item in data.get("esap_items", [])]
+        return msgpack.packb(data, use_bin_type=True)
+    
+    def decode(self, raw: bytes) -> Any:
+        return msgpack.unpackb(raw, raw=False)
+    
+    def detect(self, raw: bytes) -> bool:
+        # Tout document qui n'est pas du JSON (premier octet non ASCII)
+        return bool(raw) and raw[0] >= 0x80
+
+
+# Extensions de fichier de tous les codecs, même indisponibles (lecture des dossiers)
+DOCUMENT_EXTENSIONS = (JsonCodec.extension, MsgpackCodec.extension)
+
+CODECS: Dict[str, DealCodec] = {"json": JsonCodec()}
+if HAS_MSGPACK:
+    CODECS["msgpack"] = MsgpackCodec()
+
+
+def get_codec(name: str) -> DealCodec:
+    """Codec par son nom ("json" ou "msgpack" si installé)."""
+    if name not in CODECS:
+        raise ValueError(f"Codec de deal inconnu ou non installé : {name}")
+    return CODECS[name]
+
+
+def decode_document(raw: bytes) -> Any:
+    """Décode un document dans le format reconnu (JSON ou msgpack)."""
+    for codec in CODECS.values():
+        if codec.detect(raw):
+            return codec.decode(raw)
+    if raw and raw[0] >= 0x80 and not HAS_MSGPACK:
+        raise ValueError("Document msgpack : installer msgpack pour le lire")
+    raise ValueError("Format de document de deal inconnu")
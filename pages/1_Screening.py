@@ -7,6 +7,8 @@ from datetime import datetime
 
 from models.deal import Deal, DealStage, DealStatus, StageData
 from services.deal_storage import get_deal_storage
+from components.save_status import save_deal, render_save_conflict
+from services.deal_query import DealQuery
 from config.risk_classification import get_sectors, get_subsectors, get_risk_category, get_risk_display
 from config.countries import IPAE3_COUNTRIES, get_country_for_prompt
 from config.two_x_challenge import calculate_2x_eligibility, get_threshold
@@ -20,6 +22,7 @@ st.set_page_config(
 )
 
 storage = get_deal_storage()
+render_save_conflict()
 
 st.title("🔍 Screening")
 st.markdown("Évaluation rapide des nouvelles opportunités d'investissement")
@@ -124,7 +127,7 @@ with tab1:
                 status=DealStatus.IN_PROGRESS,
                 started_at=datetime.now()
             )
-            if storage.save(deal):
+            if save_deal(storage, deal):
                 st.success(f"✅ Deal créé ! ID: **{deal.id}**")
                 st.session_state['last_created_deal_id'] = deal.id
                 st.rerun()
@@ -135,14 +138,14 @@ with tab1:
 with tab2:
     st.header("Deals en screening")
     
-    screening_deals = storage.get_by_stage(DealStage.SCREENING)
-    
-    if not screening_deals:
+    if not storage.count(DealStage.SCREENING):
         st.info("📭 Aucun deal en screening.")
     else:
         col1, col2, col3 = st.columns([1, 2, 1])
         with col1:
             status_filter = st.selectbox("Filtrer", ["Tous", "En cours", "En attente", "Approuvés"])
+        with col2:
+            page_size = st.selectbox("Deals par page", [10, 20, 50], index=1)
         with col3:
             llm_provider = st.selectbox(
                 "Fournisseur IA",
@@ -150,16 +153,26 @@ with tab2:
                 format_func=lambda x: {"anthropic": "Claude", "openai": "GPT-4", "deepseek": "DeepSeek"}[x]
             )
         
-        if status_filter == "En cours":
-            screening_deals = [d for d in screening_deals if d.get_current_stage_data() and d.get_current_stage_data().status == DealStatus.IN_PROGRESS]
-        elif status_filter == "En attente":
-            screening_deals = [d for d in screening_deals if d.get_current_stage_data() and d.get_current_stage_data().status == DealStatus.ON_HOLD]
-        elif status_filter == "Approuvés":
-            screening_deals = [d for d in screening_deals if d.get_current_stage_data() and d.get_current_stage_data().status == DealStatus.APPROVED]
+        status = {
+            "En cours": DealStatus.IN_PROGRESS,
+            "En attente": DealStatus.ON_HOLD,
+            "Approuvés": DealStatus.APPROVED
+        }.get(status_filter)
+        
+        # Curseurs des pages visitées (revenir à la première page si le filtre change)
+        if st.session_state.get('screening_filter') != (status_filter, page_size):
+            st.session_state['screening_filter'] = (status_filter, page_size)
+            st.session_state['screening_cursors'] = [None]
+        cursors = st.session_state['screening_cursors']
         
-        st.markdown(f"**{len(screening_deals)} deal(s)**")
+        page = storage.query_page(DealQuery(stage=DealStage.SCREENING, status=status), cursor=cursors[-1], limit=page_size)
         
-        for deal in screening_deals:
+        st.markdown(f"**{page.total} deal(s)** — page {len(cursors)}")
+        
+        for summary in page.items:
+            deal = storage.get(summary.id)
+            if deal is None:
+                continue
             stage_data = deal.get_current_stage_data()
             status_icon = {DealStatus.IN_PROGRESS: "🔄", DealStatus.ON_HOLD: "⏸️", DealStatus.APPROVED: "✅"}.get(stage_data.status if stage_data else None, "❓")
             
@@ -217,7 +230,7 @@ with tab2:
                                 )
                                 
                                 stage_data.analysis_result = response
-                                storage.save(deal)
+                                save_deal(storage, deal)
                                 st.success("✅ Analyse générée !")
                                 st.rerun()
                                 
@@ -243,22 +256,23 @@ with tab2:
                         if st.button("✅ GO", key=f"go_{deal.id}", type="primary"):
                             stage_data.decision = "GO"
                             stage_data.status = DealStatus.APPROVED
-                            storage.save(deal)
+                            save_deal(storage, deal)
                             st.rerun()
                     with col2:
                         if st.button("❌ NO-GO", key=f"nogo_{deal.id}"):
                             deal.reject("Rejeté")
-                            storage.save(deal)
+                            save_deal(storage, deal)
                             st.rerun()
                     with col3:
                         if st.button("⏸️ Attente", key=f"hold_{deal.id}"):
                             stage_data.status = DealStatus.ON_HOLD
-                            storage.save(deal)
+                            save_deal(storage, deal)
                             st.rerun()
                     with col4:
                         if st.button("🗑️ Supprimer", key=f"del_{deal.id}"):
-                            storage.delete(deal.id)
-                            st.rerun()
+                            if storage.delete(deal.id):
+                                st.rerun()
+                            st.error("❌ Suppression impossible")
                 
                 elif stage_data and stage_data.status == DealStatus.APPROVED:
                     st.success("✅ Approuvé - Prêt pour DD")
@@ -268,7 +282,7 @@ with tab2:
                     if st.button(f"🚀 Passer en DD", key=f"dd_{deal.id}", type="primary"):
                         try:
                             deal.advance_stage(DealStage.DUE_DILIGENCE)
-                            storage.save(deal)
+                            save_deal(storage, deal)
                             st.rerun()
                         except ValueError as e:
                             st.error(str(e))
@@ -279,13 +293,24 @@ with tab2:
                     with col1:
                         if st.button("🔄 Reprendre", key=f"resume_{deal.id}"):
                             stage_data.status = DealStatus.IN_PROGRESS
-                            storage.save(deal)
+                            save_deal(storage, deal)
                             st.rerun()
                     with col2:
                         if st.button("❌ Rejeter", key=f"rej_{deal.id}"):
                             deal.reject("Rejeté")
-                            storage.save(deal)
+                            save_deal(storage, deal)
                             st.rerun()
+        
+        # Navigation entre les pages
+        col1, col2 = st.columns(2)
+        with col1:
+            if len(cursors) > 1 and st.button("⬅️ Page précédente"):
+                cursors.pop()
+                st.rerun()
+        with col2:
+            if page.next_cursor and st.button("Page suivante ➡️"):
+                cursors.append(page.next_cursor)
+                st.rerun()
 
 st.markdown("---")
 st.caption("ESG Analyzer v2.3 | Screening")
@@ -5,39 +5,47 @@ import streamlit as st
 from datetime import datetime
 
 from models.deal import Deal, DealStage, DealStatus
+from services.deal_query import DealQuery
 from services.deal_storage import get_deal_storage
+from components.save_status import save_deal, render_save_conflict
 from config.dd_checklists import generate_dd_checklist, get_checklist_summary
 from config.countries import IPAE3_COUNTRIES, get_country_for_prompt
 from formatters.checklist_formatter import export_checklist_to_excel
 from engine.llm_service import get_llm_manager, ProviderType
 from prompts.dd_prompts import DD_SYSTEM_PROMPT, format_dd_analysis_prompt, format_dd_synthesis_prompt
+from utils.ehs_processor import get_ehs_references, warm_up_ehs
 
 st.set_page_config(page_title="Due Diligence - ESG Analyzer", page_icon="📋", layout="wide")
 
 storage = get_deal_storage()
+render_save_conflict()
+# Page ouverte directement : préparer les guidelines EHS pendant la saisie
+warm_up_ehs()
 
 st.title("📋 Due Diligence")
 st.markdown("Analyse terrain et vérification des points de contrôle ESG")
 st.markdown("---")
 
-# Deals prêts pour DD
-screening_approved = storage.get_by_status(DealStage.SCREENING, DealStatus.APPROVED)
+# Deals prêts pour DD (en-têtes ; deal complet chargé au démarrage)
+screening_approved = storage.query(DealQuery(stage=DealStage.SCREENING, status=DealStatus.APPROVED))
 if screening_approved:
     st.info(f"📥 **{len(screening_approved)} deal(s)** prêts pour DD")
     with st.expander("Démarrer la DD"):
-        for deal in screening_approved:
+        for summary in screening_approved:
             col1, col2 = st.columns([3, 1])
             with col1:
-                st.markdown(f"**{deal.company_name}** — {deal.country}")
+                st.markdown(f"**{summary.company_name}** — {summary.country}")
             with col2:
-                if st.button(f"▶️ Démarrer", key=f"start_{deal.id}"):
-                    deal.advance_stage(DealStage.DUE_DILIGENCE)
-                    storage.save(deal)
+                if st.button(f"▶️ Démarrer", key=f"start_{summary.id}"):
+                    deal = storage.get(summary.id)
+                    if deal:
+                        deal.advance_stage(DealStage.DUE_DILIGENCE)
+                        save_deal(storage, deal)
                     st.rerun()
     st.markdown("---")
 
 # Deals en DD
-dd_deals = storage.get_by_stage(DealStage.DUE_DILIGENCE)
+dd_deals = storage.get_summaries(DealStage.DUE_DILIGENCE)
 
 if not dd_deals:
     st.warning("📭 Aucun deal en Due Diligence.")
@@ -46,7 +54,8 @@ if not dd_deals:
 # Sélection
 col1, col2 = st.columns([3, 1])
 with col1:
-    selected_id = st.selectbox("Sélectionner un deal", options=[d.id for d in dd_deals], format_func=lambda x: f"{storage.get(x).company_name} ({x})")
+    names = {d.id: d.company_name for d in dd_deals}
+    selected_id = st.selectbox("Sélectionner un deal", options=list(names), format_func=lambda x: f"{names[x]} ({x})")
 with col2:
     llm_provider = st.selectbox("Fournisseur IA", ["anthropic", "openai", "deepseek"], format_func=lambda x: {"anthropic": "Claude", "openai": "GPT-4", "deepseek": "DeepSeek"}[x])
 
@@ -128,10 +137,10 @@ with tab1:
                         label_visibility="collapsed"
                     )
                     if new_status != current:
-                        stage_data.checklist_status[item['id']] = new_status
+                        stage_data.set_checklist_status(item['id'], new_status)
     
     if st.button("💾 Sauvegarder", type="primary", use_container_width=True):
-        storage.save(deal)
+        save_deal(storage, deal)
         st.success("✅ Sauvegardé !")
 
 # =============================================================================
@@ -161,7 +170,8 @@ with tab2:
                         risk_category=deal.risk_category,
                         employees=deal.employees,
                         two_x_data=deal.two_x_data,
-                        checklist_status=stage_data.checklist_status
+                        checklist_status=stage_data.checklist_status,
+                        ehs_references=get_ehs_references(deal.sector, deal.subsector)
                     )
                     
                     response = llm_manager.generate_response(
@@ -173,7 +183,7 @@ with tab2:
                     )
                     
                     stage_data.analysis_result = response
-                    storage.save(deal)
+                    save_deal(storage, deal)
                     st.success("✅ Analyse générée !")
                     st.rerun()
                     
@@ -208,7 +218,7 @@ with tab2:
                         stage_data.analysis_result += "\n\n---\n\n## SYNTHÈSE DD\n\n" + response
                     else:
                         stage_data.analysis_result = response
-                    storage.save(deal)
+                    save_deal(storage, deal)
                     st.success("✅ Synthèse ajoutée !")
                     st.rerun()
                     
@@ -232,7 +242,7 @@ with tab3:
     new_comment = st.text_area("Nouvelle note", placeholder="Observations terrain...")
     if st.button("💬 Ajouter") and new_comment:
         deal.add_comment(new_comment, "Analyste DD")
-        storage.save(deal)
+        save_deal(storage, deal)
         st.rerun()
     
     st.markdown("---")
@@ -286,7 +296,7 @@ with tab4:
         if st.button("✅ Valider la DD", type="primary", use_container_width=True):
             if "NO-GO" in decision:
                 deal.reject(rationale)
-                storage.save(deal)
+                save_deal(storage, deal)
                 st.error("❌ Deal rejeté")
             else:
                 stage_data.decision = "GO" if "GO -" in decision else "GO_WITH_CONDITIONS"
@@ -294,7 +304,7 @@ with tab4:
                 if conditions_text:
                     stage_data.conditions = [c.strip() for c in conditions_text.split('\n') if c.strip()]
                 stage_data.status = DealStatus.APPROVED
-                storage.save(deal)
+                save_deal(storage, deal)
                 st.success("✅ DD validée !")
                 st.balloons()
     
@@ -303,7 +313,7 @@ with tab4:
             if st.button("🚀 Passer au IC", use_container_width=True):
                 try:
                     deal.advance_stage(DealStage.INVESTMENT_COMMITTEE)
-                    storage.save(deal)
+                    save_deal(storage, deal)
                     st.rerun()
                 except ValueError as e:
                     st.error(str(e))
@@ -5,8 +5,11 @@ import streamlit as st
 from datetime import datetime, timedelta
 
 from models.deal import Deal, DealStage, DealStatus, ESAPItem
+from services.deal_query import DealQuery
 from services.deal_storage import get_deal_storage
+from components.save_status import save_deal, render_save_conflict
 from prompts.memo_prompt import format_memo_prompt, MEMO_SYSTEM_PROMPT
+from utils.ehs_processor import get_ehs_references, warm_up_ehs
 from engine.llm_service import get_llm_manager, ProviderType
 from config.two_x_challenge import get_threshold
 from config.risk_classification import get_risk_display
@@ -20,6 +23,9 @@ st.set_page_config(
 
 # Initialiser le storage
 storage = get_deal_storage()
+render_save_conflict()
+# Page ouverte directement : préparer les guidelines EHS pendant la saisie
+warm_up_ehs()
 
 # Header
 st.title("👥 Comité d'Investissement")
@@ -28,33 +34,40 @@ st.markdown("Préparation du mémo IC et décision finale d'investissement")
 st.markdown("---")
 
 # Récupérer les deals en IC
-ic_deals = storage.get_by_stage(DealStage.INVESTMENT_COMMITTEE)
+ic_deals = storage.get_summaries(DealStage.INVESTMENT_COMMITTEE)
 
-# Aussi récupérer les deals DD approuvés
-dd_approved = storage.get_by_status(DealStage.DUE_DILIGENCE, DealStatus.APPROVED)
+# Aussi récupérer les deals DD approuvés (conditions lues dans l'historique des stages)
+dd_approved = storage.query(DealQuery(
+    stage=DealStage.DUE_DILIGENCE,
+    status=DealStatus.APPROVED,
+    fields=["id", "company_name", "country", "two_x_eligible", "stage_history"]
+))
 
 # Section: Deals prêts pour IC
 if dd_approved:
     st.info(f"📥 **{len(dd_approved)} deal(s)** avec DD validée, prêts pour le Comité")
     
     with st.expander("Voir les deals prêts pour IC"):
-        for deal in dd_approved:
+        for row in dd_approved:
             col1, col2, col3 = st.columns([3, 1, 1])
             
             with col1:
-                st.markdown(f"**{deal.company_name}** — {deal.country}")
-                dd_data = deal.get_stage_data(DealStage.DUE_DILIGENCE)
+                st.markdown(f"**{row['company_name']}** — {row['country']}")
+                dd_data = row["stage_history"].get(DealStage.DUE_DILIGENCE.value)
                 if dd_data and dd_data.conditions:
                     st.caption(f"⚠️ {len(dd_data.conditions)} condition(s) préalable(s)")
             
             with col2:
-                st.markdown(f"{'✅' if deal.two_x_eligible else '❌'} 2X")
+                st.markdown(f"{'✅' if row['two_x_eligible'] else '❌'} 2X")
             
             with col3:
-                if st.button(f"▶️ Passer en IC", key=f"to_ic_{deal.id}"):
+                if st.button(f"▶️ Passer en IC", key=f"to_ic_{row['id']}"):
+                    deal = storage.get(row["id"])
                     try:
+                        if not deal:
+                            raise ValueError("Deal non trouvé")
                         deal.advance_stage(DealStage.INVESTMENT_COMMITTEE)
-                        storage.save(deal)
+                        save_deal(storage, deal)
                         st.success(f"Deal passé en IC")
                         st.rerun()
                     except ValueError as e:
@@ -71,10 +84,11 @@ if not ic_deals:
 # Sélectionner un deal
 st.subheader("Sélectionner un deal")
 
+ic_names = {d.id: d.company_name for d in ic_deals}
 selected_id = st.selectbox(
     "Deal",
-    options=[d.id for d in ic_deals],
-    format_func=lambda x: f"{storage.get(x).company_name} ({x})",
+    options=list(ic_names),
+    format_func=lambda x: f"{ic_names[x]} ({x})",
     key="ic_deal_selector"
 )
 
@@ -149,7 +163,8 @@ with tab1:
                     employment_threshold=int(get_threshold('employment', deal.sector) * 100),
                     two_x_status="Éligible" if deal.two_x_eligible else "Non éligible",
                     two_x_criteria_met=deal.two_x_criteria_met,
-                    date=datetime.now().strftime("%d/%m/%Y")
+                    date=datetime.now().strftime("%d/%m/%Y"),
+                    ehs_references=get_ehs_references(deal.sector, deal.subsector, max_chars=3000)
                 )
                 
                 response = llm_manager.generate_response(
@@ -162,7 +177,7 @@ with tab1:
                 # Sauvegarder le résultat
                 stage_data = deal.get_current_stage_data()
                 stage_data.analysis_result = response
-                storage.save(deal)
+                save_deal(storage, deal)
                 
                 st.success("✅ Mémo généré avec succès !")
                 
@@ -246,7 +261,7 @@ with tab2:
                     kpi=esap_kpi if esap_kpi else None
                 )
                 deal.add_esap_item(new_item)
-                storage.save(deal)
+                save_deal(storage, deal)
                 st.success("✅ Action ESAP ajoutée")
                 st.rerun()
             else:
@@ -301,7 +316,7 @@ with tab2:
                 with col1:
                     if st.button(f"🗑️ Supprimer", key=f"del_esap_{item.id}"):
                         deal.esap_items = [i for i in deal.esap_items if i.id != item.id]
-                        storage.save(deal)
+                        save_deal(storage, deal)
                         st.rerun()
     else:
         st.info("Aucune action ESAP définie. Ajoutez des actions ci-dessus.")
@@ -383,14 +398,14 @@ with tab4:
             
             if "REJECTED" in decision:
                 deal.reject(rationale)
-                storage.save(deal)
+                save_deal(storage, deal)
                 st.error("❌ Investissement rejeté par le Comité")
             else:
                 stage_data.decision = "APPROVED" if "APPROVED -" in decision else "APPROVED_WITH_CONDITIONS"
                 stage_data.decision_rationale = rationale
                 stage_data.status = DealStatus.APPROVED
                 stage_data.completed_at = datetime.now()
-                storage.save(deal)
+                save_deal(storage, deal)
                 st.success("✅ Décision enregistrée !")
                 st.balloons()
     
@@ -399,7 +414,7 @@ with tab4:
             if st.button("🚀 Passer en Monitoring", use_container_width=True):
                 try:
                     deal.advance_stage(DealStage.MONITORING)
-                    storage.save(deal)
+                    save_deal(storage, deal)
                     st.success("✅ Deal passé en Monitoring !")
                     st.rerun()
                 except ValueError as e:
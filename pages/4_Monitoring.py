@@ -6,7 +6,9 @@ from datetime import datetime
 import pandas as pd
 
 from models.deal import Deal, DealStage, DealStatus
+from services.deal_query import DealQuery
 from services.deal_storage import get_deal_storage
+from components.save_status import save_deal, render_save_conflict
 from config.two_x_challenge import calculate_2x_eligibility
 from engine.llm_service import get_llm_manager, ProviderType
 from prompts.monitoring_prompts import (
@@ -18,6 +20,7 @@ from prompts.monitoring_prompts import (
 st.set_page_config(page_title="Monitoring - ESG Analyzer", page_icon="📊", layout="wide")
 
 storage = get_deal_storage()
+render_save_conflict()
 
 st.title("📊 Monitoring Portfolio")
 st.markdown("Suivi post-investissement et rapports IA")
@@ -40,29 +43,38 @@ with col5:
 
 st.markdown("---")
 
-# Deals IC approuvés
-ic_approved = storage.get_by_status(DealStage.INVESTMENT_COMMITTEE, DealStatus.APPROVED)
+# Deals IC approuvés (en-têtes ; deal complet chargé à l'activation)
+ic_approved = storage.query(DealQuery(stage=DealStage.INVESTMENT_COMMITTEE, status=DealStatus.APPROVED))
 if ic_approved:
     st.info(f"🚀 **{len(ic_approved)} deal(s)** prêts pour monitoring")
     with st.expander("Activer"):
-        for deal in ic_approved:
+        for summary in ic_approved:
             col1, col2 = st.columns([3, 1])
             with col1:
-                st.markdown(f"**{deal.company_name}**")
+                st.markdown(f"**{summary.company_name}**")
             with col2:
-                if st.button(f"▶️", key=f"act_{deal.id}"):
-                    deal.advance_stage(DealStage.MONITORING)
-                    storage.save(deal)
+                if st.button(f"▶️", key=f"act_{summary.id}"):
+                    deal = storage.get(summary.id)
+                    if deal:
+                        deal.advance_stage(DealStage.MONITORING)
+                        save_deal(storage, deal)
                     st.rerun()
     st.markdown("---")
 
-# Deals en monitoring
-monitoring_deals = storage.get_by_stage(DealStage.MONITORING)
+# Deals en monitoring : avancement ESAP lu dans les en-têtes, actions pour les retards
+monitoring_deals = storage.query(DealQuery(
+    stage=DealStage.MONITORING,
+    sort="company_name",
+    descending=False,
+    fields=["id", "company_name", "country", "sector", "two_x_eligible", "esap_total", "esap_completed", "esap_items"]
+))
 
 if not monitoring_deals:
     st.warning("📭 Aucun deal en monitoring.")
     st.stop()
 
+monitoring_names = {row["id"]: row["company_name"] for row in monitoring_deals}
+
 # Sélection LLM
 col1, col2 = st.columns([3, 1])
 with col2:
@@ -81,16 +93,15 @@ with tab1:
     st.subheader("Portfolio en monitoring")
     
     data = []
-    for deal in monitoring_deals:
-        esap = deal.get_esap_summary()
+    for row in monitoring_deals:
         data.append({
-            "Entreprise": deal.company_name,
-            "Pays": deal.country,
-            "Secteur": deal.sector,
-            "2X": "✅" if deal.two_x_eligible else "❌",
-            "ESAP": f"{esap['completed']}/{esap['total']}",
-            "% ESAP": esap['completion_rate'],
-            "Retard": esap['overdue']
+            "Entreprise": row["company_name"],
+            "Pays": row["country"],
+            "Secteur": row["sector"],
+            "2X": "✅" if row["two_x_eligible"] else "❌",
+            "ESAP": f"{row['esap_completed']}/{row['esap_total']}",
+            "% ESAP": (row["esap_completed"] / row["esap_total"]) * 100 if row["esap_total"] else 0,
+            "Retard": sum(1 for item in row["esap_items"] if item.is_overdue())
         })
     
     df = pd.DataFrame(data)
@@ -110,7 +121,7 @@ with tab1:
 with tab2:
     st.subheader("Suivi ESAP")
     
-    selected_id = st.selectbox("Deal", options=[d.id for d in monitoring_deals], format_func=lambda x: storage.get(x).company_name, key="esap_deal")
+    selected_id = st.selectbox("Deal", options=list(monitoring_names), format_func=lambda x: monitoring_names[x], key="esap_deal")
     deal = storage.get(selected_id)
     
     if deal:
@@ -154,7 +165,7 @@ with tab2:
                     )
                     if new_st != item.status:
                         item.status = new_st
-                        storage.save(deal)
+                        save_deal(storage, deal)
                         st.rerun()
                 st.markdown("---")
         else:
@@ -166,7 +177,7 @@ with tab2:
 with tab3:
     st.subheader("KPIs ESG & Impact")
     
-    selected_id = st.selectbox("Deal", options=[d.id for d in monitoring_deals], format_func=lambda x: storage.get(x).company_name, key="kpi_deal")
+    selected_id = st.selectbox("Deal", options=list(monitoring_names), format_func=lambda x: monitoring_names[x], key="kpi_deal")
     deal = storage.get(selected_id)
     
     if deal:
@@ -183,9 +194,11 @@ with tab3:
             total = st.number_input("Total employés", 1, 100000, deal.employees or 50)
         
         if st.button("📊 Mettre à jour", type="primary"):
-            deal.two_x_data['women_ownership_pct'] = own
-            deal.two_x_data['women_management_pct'] = mgmt
-            deal.two_x_data['women_employees_pct'] = emp
+            deal.update_two_x_data(
+                women_ownership_pct=own,
+                women_management_pct=mgmt,
+                women_employees_pct=emp
+            )
             deal.employees = total
             
             result = calculate_2x_eligibility(deal.two_x_data, deal.sector)
@@ -200,7 +213,7 @@ with tab3:
                 "two_x_eligible": deal.two_x_eligible
             })
             
-            storage.save(deal)
+            save_deal(storage, deal)
             st.success("✅ Mis à jour !")
             st.rerun()
         
@@ -222,7 +235,7 @@ with tab3:
 with tab4:
     st.subheader("🤖 Rapports IA")
     
-    selected_id = st.selectbox("Deal", options=[d.id for d in monitoring_deals], format_func=lambda x: storage.get(x).company_name, key="report_deal")
+    selected_id = st.selectbox("Deal", options=list(monitoring_names), format_func=lambda x: monitoring_names[x], key="report_deal")
     deal = storage.get(selected_id)
     
     if deal:
@@ -29,9 +29,14 @@ def format_dd_analysis_prompt(
     risk_category: str,
     employees: int,
     two_x_data: dict,
-    checklist_status: dict = None
+    checklist_status: dict = None,
+    ehs_references: str = ""
 ) -> str:
-    """Formate le prompt pour l'analyse DD."""
+    """
+    Formate le prompt pour l'analyse DD.
+    
+    ehs_references : extraits des guidelines IFC-EHS à citer (voir utils.ehs_processor.get_ehs_references).
+    """
     
     checklist_summary = ""
     if checklist_status:
@@ -44,6 +49,15 @@ def format_dd_analysis_prompt(
 - Points conformes: {conformes}/{total}
 - Points partiels: {partiels}/{total}
 - Points non conformes: {non_conformes}/{total}
+"""
+    
+    ehs_section = ""
+    if ehs_references:
+        ehs_section = f"""
+## EXTRAITS DES GUIDELINES IFC-EHS SECTORIELLES
+Cite ces exigences (guideline, page) lorsqu'elles s'appliquent aux risques identifiés.
+
+{ehs_references}
 """
     
     return f"""# ANALYSE DUE DILIGENCE - {company_name}
@@ -63,7 +77,7 @@ def format_dd_analysis_prompt(
 - Détention féminine: {two_x_data.get('women_ownership_pct', 0)}%
 - Management féminin: {two_x_data.get('women_management_pct', 0)}%
 - Employées femmes: {two_x_data.get('women_employees_pct', 0)}%
-{checklist_summary}
+{checklist_summary}{ehs_section}
 
 ---
 
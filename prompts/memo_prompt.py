@@ -142,12 +142,14 @@ def format_memo_prompt(
     employment_threshold: int,
     two_x_status: str,
     two_x_criteria_met: int,
-    date: str
+    date: str,
+    ehs_references: str = ""
 ) -> str:
     """
     Formate le prompt mémo avec toutes les variables.
+    ehs_references : extraits des guidelines IFC-EHS à citer, ajoutés en fin de prompt.
     """
-    return MEMO_SECTION_PROMPT.format(
+    prompt = MEMO_SECTION_PROMPT.format(
         company_name=company_name,
         country=country,
         country_context=country_context,
@@ -167,3 +169,10 @@ def format_memo_prompt(
         two_x_criteria_met=two_x_criteria_met,
         date=date
     )
+    if ehs_references:
+        prompt += f"""
+**Extraits des guidelines IFC-EHS sectorielles (à citer si pertinents) :**
+
+{ehs_references}
+"""
+    return prompt
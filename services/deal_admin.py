@@ -0,0 +1,159 @@
+"""
+Commandes d'administration du stockage des deals.
+
+Usage:
+    python -m services.deal_admin [--backend json|sqlite] convert --codec msgpack
+    python -m services.deal_admin [--backend json|sqlite] migrate [--workers 4]
+    python -m services.deal_admin [--backend json|sqlite] export backup.ndjson.zst
+    python -m services.deal_admin [--backend json|sqlite] export backup.zip --documents
+    python -m services.deal_admin [--backend json|sqlite] import backup.zip [--workers 4]
+    python -m services.deal_admin [--backend json|sqlite] archive [--days 180]
+    python -m services.deal_admin [--backend json|sqlite] restore DEAL_ID
+
+À lancer application arrêtée : les deals sont réécrits dans le backend.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+from loguru import logger
+
+from models.deal import CODECS, SCHEMA_VERSION, Deal, DealCodec, get_codec
+from services.deal_export import export_deals, import_deals, iter_deals
+from services.deal_storage import DealStorage
+from services.storage_backends import StorageBackend, create_backend
+
+# Taille des lots (lecture parallèle, écriture groupée)
+BATCH_SIZE = 500
+
+
+def open_backend(name: str, codec: Optional[DealCodec] = None) -> StorageBackend:
+    """Backend aux emplacements utilisés par l'application (codec : DEAL_CODEC)."""
+    codec = codec or get_codec(os.getenv(DealStorage.CODEC_ENV, "json"))
+    return create_backend(name, DealStorage.STORAGE_DIR, DealStorage.DB_PATH, codec)
+
+
+def save_all(backend: StorageBackend, deals: List[Deal]) -> int:
+    """Écrit des deals par lots (un verrou ou une transaction par lot). Retourne le nombre écrit."""
+    for start in range(0, len(deals), BATCH_SIZE):
+        backend.save_many(deals[start:start + BATCH_SIZE])
+    return len(deals)
+
+
+def convert_codec(backend: StorageBackend, codec: DealCodec) -> int:
+    """
+    Réécrit tous les deals (et leurs parties volumineuses) avec un codec.
+    Retourne le nombre de deals convertis.
+    """
+    backend.codec = codec
+    deals = list(backend.load_all())
+    for deal in deals:
+        deal.mark_parts_dirty()
+    return save_all(backend, deals)
+
+
+def _migrate_batch(backend_name: str, deal_ids: List[str]) -> int:
+    """Charge un lot de deals et réécrit ceux lus dans un schéma antérieur (processus de travail)."""
+    backend = open_backend(backend_name)
+    outdated = []
+    for deal_id in deal_ids:
+        try:
+            deal = backend.load(deal_id)
+        except Exception as e:
+            logger.error(f"Error loading deal {deal_id}: {e}")
+            continue
+        if deal is not None and deal.needs_schema_upgrade:
+            outdated.append(deal)
+    return save_all(backend, outdated)
+
+
+def migrate_schema(backend_name: str, workers: int = 4) -> int:
+    """
+    Réécrit au schéma courant tous les deals stockés dans un schéma antérieur,
+    lus et migrés en parallèle par lots. Retourne le nombre de deals migrés.
+    """
+    summaries, _ = open_backend(backend_name).load_summaries({})
+    deal_ids = sorted(summary.id for summary in summaries)
+    batches = [deal_ids[start:start + BATCH_SIZE] for start in range(0, len(deal_ids), BATCH_SIZE)]
+    if workers <= 1 or len(batches) <= 1:
+        return sum(_migrate_batch(backend_name, batch) for batch in batches)
+    # Processus séparés : le décodage et la migration des documents sont limités par le CPU
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(_migrate_batch, [backend_name] * len(batches), batches))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m services.deal_admin", description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json", help="Backend de stockage")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert = commands.add_parser("convert", help="Réécrire tous les deals dans un autre format")
+    convert.add_argument("--codec", choices=sorted(CODECS), required=True, help="Format cible")
+
+    migrate = commands.add_parser("migrate", help=f"Réécrire les deals au schéma courant (v{SCHEMA_VERSION})")
+    migrate.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processus parallèles")
+
+    export = commands.add_parser("export", help="Exporter le portfolio en NDJSON (.ndjson, .ndjson.zst, .zip)")
+    export.add_argument("path", type=Path, help="Fichier d'export")
+    export.add_argument("--documents", action="store_true", help="Inclure les documents téléversés (.zip)")
+
+    import_ = commands.add_parser("import", help="Importer un export (les deals présents sont remplacés)")
+    import_.add_argument("path", type=Path, help="Fichier d'export")
+    import_.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processus de décodage")
+
+    archive = commands.add_parser("archive", help="Archiver les deals rejetés ou sortis inactifs")
+    archive.add_argument("--days", type=int, default=None, help="Ancienneté minimale (défaut : DEAL_ARCHIVE_DAYS)")
+
+    restore = commands.add_parser("restore", help="Restaurer un deal archivé")
+    restore.add_argument("deal_id", help="ID du deal")
+
+    args = parser.parse_args(argv)
+    try:
+        return _run(args)
+    except ValueError as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        return 1
+
+
+def _run(args: argparse.Namespace) -> int:
+    if args.command == "convert":
+        codec = get_codec(args.codec)
+        start = time.perf_counter()
+        count = convert_codec(open_backend(args.backend), codec)
+        print(f"{count} deals convertis en {codec.name} ({time.perf_counter() - start:.1f} s)")
+        print(f"Définir DEAL_CODEC={codec.name} pour que l'application écrive dans ce format.")
+    elif args.command == "migrate":
+        start = time.perf_counter()
+        count = migrate_schema(args.backend, args.workers)
+        print(f"{count} deals migrés au schéma v{SCHEMA_VERSION} ({time.perf_counter() - start:.1f} s)")
+    elif args.command == "export":
+        start = time.perf_counter()
+        backend = open_backend(args.backend)
+        summaries, _ = backend.load_summaries({})
+        deal_ids = sorted(summary.id for summary in summaries)
+        count = export_deals(iter_deals(backend, deal_ids), args.path, args.documents)
+        print(f"{count} deals exportés dans {args.path} ({time.perf_counter() - start:.1f} s)")
+    elif args.command == "import":
+        start = time.perf_counter()
+        count = import_deals(args.path, open_backend(args.backend).save_many, args.workers, DealStorage.DOCUMENTS_DIR)
+        print(f"{count} deals importés depuis {args.path} ({time.perf_counter() - start:.1f} s)")
+    elif args.command == "archive":
+        storage = DealStorage(backend=open_backend(args.backend))
+        count = storage.archive_inactive(args.days)
+        print(f"{count} deals archivés ({len(storage.archive)} dans l'archive)")
+    elif args.command == "restore":
+        deal = DealStorage(backend=open_backend(args.backend)).restore(args.deal_id)
+        if deal is None:
+            print(f"Deal {args.deal_id} introuvable dans l'archive", file=sys.stderr)
+            return 1
+        print(f"Deal {deal.id} ({deal.company_name}) restauré")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
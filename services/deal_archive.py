@@ -0,0 +1,215 @@
+"""
+Archive froide des deals clos (rejetés ou sortis).
+
+Chaque deal archivé est un document complet (Deal.to_dict, parties
+volumineuses comprises) compressé en gzip ou lzma dans data/archive/.
+L'index compressé _index.json.gz garde l'en-tête (DealSummary) de chaque deal
+archivé et la fréquence de ses tokens : la liste et la recherche plein texte
+des deals archivés ne décompressent aucun deal.
+
+Les deals archivés ne sont plus dans le backend, donc ni dans le cache ni
+dans les index en mémoire ; DealStorage les archive, les recherche et les
+restaure à la demande.
+"""
+
+import gzip
+import lzma
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from models.deal import Deal, DealStage, DealSummary
+from services.deal_search import CorpusStats, DealSearchIndex, term_counts
+from services.storage_backends import _dumps, _loads, atomic_write_bytes
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    # Windows : verrou inter-processus indisponible (mono-processus)
+    HAS_FCNTL = False
+
+# Stages des deals archivables
+ARCHIVED_STAGES = (DealStage.REJECTED, DealStage.EXITED)
+
+# Compression des documents archivés : extension, module (compress/decompress)
+COMPRESSIONS = {
+    "gzip": (".json.gz", gzip),
+    "lzma": (".json.xz", lzma),
+}
+
+
+class DealArchive:
+    """
+    Deals archivés, un fichier compressé par deal, et leur index.
+    L'index est relu quand un autre processus l'a modifié.
+    """
+
+    INDEX_FILE = "_index.json.gz"
+    LOCK_FILE = "_index.lock"
+
+    def __init__(self, archive_dir: Path, compression: str = "gzip"):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Compression d'archive inconnue : {compression}")
+        self.archive_dir = Path(archive_dir)
+        self.compression = compression
+        self._thread_lock = threading.RLock()
+        # deal_id -> {"file", "archived_at", "summary", "terms"}, chargé à la première utilisation
+        self._entries: Optional[Dict[str, Dict]] = None
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._search_index: Optional[DealSearchIndex] = None
+        # Index en cours de modification par batch() (None hors lot)
+        self._batch: Optional[Dict[str, Dict]] = None
+
+    @contextmanager
+    def _locked(self):
+        """Verrou exclusif entre threads et entre processus."""
+        with self._thread_lock:
+            if not HAS_FCNTL:
+                yield
+                return
+            self.archive_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.archive_dir / self.LOCK_FILE, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self) -> Dict[str, Dict]:
+        """Index à jour (relu seulement si le fichier a changé)."""
+        with self._thread_lock:
+            path = self.archive_dir / self.INDEX_FILE
+            try:
+                stat = path.stat()
+                stamp = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                stamp = None
+            if self._entries is not None and stamp == self._stamp:
+                return self._entries
+            entries = {}
+            if stamp is not None:
+                entries = _loads(gzip.decompress(path.read_bytes()))
+                for entry in entries.values():
+                    entry["summary"] = DealSummary.from_dict(entry["summary"])
+            self._entries, self._stamp, self._search_index = entries, stamp, None
+            return entries
+
+    def _save_index(self, entries: Dict[str, Dict]):
+        """Écrit l'index (sous verrou)."""
+        data = {
+            deal_id: {**entry, "summary": entry["summary"].to_dict()}
+            for deal_id, entry in entries.items()
+        }
+        path = self.archive_dir / self.INDEX_FILE
+        atomic_write_bytes(path, gzip.compress(_dumps(data)))
+        stat = path.stat()
+        self._entries, self._stamp, self._search_index = entries, (stat.st_mtime_ns, stat.st_size), None
+
+    @contextmanager
+    def batch(self):
+        """
+        Regroupe des put() sous un même verrou : l'index n'est réécrit qu'une
+        fois, en sortie du bloc (y compris après une erreur, pour les deals
+        déjà écrits).
+        """
+        with self._thread_lock:
+            if self._batch is not None:
+                # Lot déjà ouvert par ce thread (le verrou fichier n'est pas réentrant)
+                yield
+                return
+            with self._locked():
+                self.archive_dir.mkdir(parents=True, exist_ok=True)
+                self._batch = dict(self._load())
+                try:
+                    yield
+                finally:
+                    entries, self._batch = self._batch, None
+                    self._save_index(entries)
+
+    def put(self, deal: Deal):
+        """Archive un deal (remplace une version archivée précédente)."""
+        extension, module = COMPRESSIONS[self.compression]
+        with self.batch():
+            filename = f"{deal.id}{extension}"
+            atomic_write_bytes(self.archive_dir / filename, module.compress(_dumps(deal.to_dict())))
+            previous = self._batch.get(deal.id)
+            if previous is not None and previous["file"] != filename:
+                (self.archive_dir / previous["file"]).unlink(missing_ok=True)
+            self._batch[deal.id] = {
+                "file": filename,
+                "archived_at": datetime.now().isoformat(),
+                "summary": DealSummary.from_deal(deal),
+                "terms": term_counts(deal),
+            }
+
+    def put_many(self, deals: Iterable[Deal]) -> int:
+        """Archive des deals en un lot (un seul verrou et une seule écriture de l'index)."""
+        count = 0
+        with self.batch():
+            for deal in deals:
+                self.put(deal)
+                count += 1
+        return count
+
+    def get(self, deal_id: str) -> Optional[Deal]:
+        """Relit un deal archivé (décompressé à chaque appel, jamais mis en cache)."""
+        entry = self._load().get(deal_id)
+        if entry is None:
+            return None
+        filename = entry["file"]
+        module = next(module for extension, module in COMPRESSIONS.values() if filename.endswith(extension))
+        try:
+            return Deal.from_dict(_loads(module.decompress((self.archive_dir / filename).read_bytes())))
+        except Exception as e:
+            logger.error(f"Error reading archived deal {deal_id}: {e}")
+            return None
+
+    def remove(self, deal_id: str):
+        """Retire un deal de l'archive (après sa restauration)."""
+        with self._locked():
+            entries = dict(self._load())
+            entry = entries.pop(deal_id, None)
+            if entry is None:
+                return
+            self._save_index(entries)
+            (self.archive_dir / entry["file"]).unlink(missing_ok=True)
+
+    def __contains__(self, deal_id: str) -> bool:
+        return deal_id in self._load()
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def summaries(self) -> List[DealSummary]:
+        """En-têtes des deals archivés."""
+        return [entry["summary"] for entry in self._load().values()]
+
+    def _index(self) -> DealSearchIndex:
+        """Index plein texte des deals archivés, construit depuis l'index de l'archive."""
+        with self._thread_lock:
+            entries = self._load()
+            if self._search_index is None:
+                index = DealSearchIndex()
+                for deal_id, entry in entries.items():
+                    index.add_terms(deal_id, entry["terms"])
+                self._search_index = index
+            return self._search_index
+
+    def search_stats(self, query: str) -> CorpusStats:
+        """Statistiques BM25 des deals archivés pour une requête."""
+        with self._thread_lock:
+            return self._index().stats(query)
+
+    def search(self, query: str, limit: Optional[int] = None,
+               stats: Optional[CorpusStats] = None) -> List[Tuple[str, float]]:
+        """
+        Recherche plein texte dans les deals archivés : (deal_id, score BM25).
+        `stats` : voir DealSearchIndex.search.
+        """
+        with self._thread_lock:
+            return self._index().search(query, limit, stats)
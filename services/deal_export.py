@@ -0,0 +1,226 @@
+"""
+Export et import du portfolio en NDJSON : un deal (Deal.to_dict) par ligne,
+écrit et relu en flux, en mémoire constante quelle que soit la taille du
+portfolio.
+
+Le format dépend de l'extension du fichier :
+- .ndjson : texte brut
+- .ndjson.zst : compressé zstd (paquet zstandard)
+- .zip : deals.ndjson compressé, et optionnellement les fichiers des
+  documents téléversés (clé "path" de uploaded_documents) sous
+  documents/<deal_id>/
+
+L'import décode les lignes par lots en parallèle (processus) et écrit chaque
+lot en une fois dans le backend (save_many). Les deals déjà présents sont
+remplacés, les autres conservés.
+"""
+
+import io
+import os
+import shutil
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+from models.deal import Deal
+from services.storage_backends import StorageBackend, _dumps, _loads
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+# Entrée des deals dans une archive zip
+DEALS_ENTRY = "deals.ndjson"
+DOCUMENTS_PREFIX = "documents/"
+
+# Lignes décodées par lot, et lots en attente par processus (mémoire bornée)
+BATCH_SIZE = 500
+PENDING_PER_WORKER = 2
+
+
+def _kind(path: Path) -> str:
+    """Format d'un fichier d'export selon son extension : "zip", "zstd" ou "ndjson"."""
+    if path.suffix == ".zip":
+        return "zip"
+    if path.suffix == ".zst":
+        if not HAS_ZSTD:
+            raise ValueError("Export .zst : installer zstandard")
+        return "zstd"
+    return "ndjson"
+
+
+def _document_name(deal_id: str, position: int, path: str) -> str:
+    """Nom d'un document téléversé dans l'archive (position : index dans uploaded_documents)."""
+    return f"{DOCUMENTS_PREFIX}{deal_id}/{position}_{os.path.basename(path)}"
+
+
+def document_files(deal: Deal) -> Iterator[Tuple[str, Path]]:
+    """Fichiers des documents téléversés d'un deal présents sur disque : (nom d'archive, chemin)."""
+    for position, document in enumerate(deal.uploaded_documents):
+        path = document.get("path")
+        if isinstance(path, str) and os.path.isfile(path):
+            yield _document_name(deal.id, position, path), Path(path)
+
+
+def iter_deals(backend: StorageBackend, deal_ids: Iterable[str]) -> Iterator[Deal]:
+    """Deals chargés un par un (les deals supprimés entre-temps sont ignorés)."""
+    for deal_id in deal_ids:
+        deal = backend.load(deal_id)
+        if deal is not None:
+            yield deal
+
+
+@contextmanager
+def _writer(path: Path, kind: str) -> Iterator[BinaryIO]:
+    if kind == "zip":
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+            with archive.open(DEALS_ENTRY, "w", force_zip64=True) as out:
+                yield out
+    elif kind == "zstd":
+        with open(path, "wb") as f, zstandard.ZstdCompressor().stream_writer(f, closefd=False) as out:
+            yield out
+    else:
+        with open(path, "wb") as out:
+            yield out
+
+
+@contextmanager
+def _reader(path: Path) -> Iterator[BinaryIO]:
+    kind = _kind(path)
+    if kind == "zip":
+        with zipfile.ZipFile(path) as archive, archive.open(DEALS_ENTRY) as f:
+            yield f
+    elif kind == "zstd":
+        with open(path, "rb") as f, zstandard.ZstdDecompressor().stream_reader(f) as reader:
+            yield io.BufferedReader(reader)
+    else:
+        with open(path, "rb") as f:
+            yield f
+
+
+def export_deals(deals: Iterable[Deal], path: Path, include_documents: bool = False) -> int:
+    """
+    Écrit les deals dans un fichier d'export, en flux. Le fichier n'apparaît
+    qu'une fois complet. Retourne le nombre de deals exportés.
+    """
+    path = Path(path)
+    kind = _kind(path)
+    if include_documents and kind != "zip":
+        raise ValueError("Les documents ne s'exportent que dans une archive .zip")
+
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    count = 0
+    # Seuls les chemins des documents sont gardés, copiés après les deals
+    documents: List[Tuple[str, Path]] = []
+    try:
+        with _writer(tmp_path, kind) as out:
+            for deal in deals:
+                out.write(_dumps(deal.to_dict()) + b"\n")
+                count += 1
+                if include_documents:
+                    documents.extend(document_files(deal))
+        if documents:
+            with zipfile.ZipFile(tmp_path, "a", zipfile.ZIP_DEFLATED) as archive:
+                for name, file in documents:
+                    archive.write(file, name)
+        os.replace(tmp_path, path)
+    except Exception:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+    return count
+
+
+def _read_batches(f: BinaryIO, batch_size: int) -> Iterator[List[bytes]]:
+    batch = []
+    for line in f:
+        if line.strip():
+            batch.append(line)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _parse_batch(lines: List[bytes]) -> List[Deal]:
+    """Décode un lot de lignes (exécuté dans un processus de travail)."""
+    deals = []
+    for line in lines:
+        try:
+            deals.append(Deal.from_dict(_loads(line)))
+        except Exception as e:
+            logger.error(f"Skipping unreadable exported deal: {e}")
+    return deals
+
+
+def _restore_documents(archive: zipfile.ZipFile, deal: Deal, documents_dir: Path) -> None:
+    """Extrait les documents d'un deal de l'archive et y fait pointer leurs chemins."""
+    for position, document in enumerate(deal.uploaded_documents):
+        path = document.get("path")
+        if not isinstance(path, str):
+            continue
+        try:
+            info = archive.getinfo(_document_name(deal.id, position, path))
+        except KeyError:
+            continue
+        target = documents_dir / deal.id / info.filename.rsplit("/", 1)[-1]
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with archive.open(info) as src, open(target, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        document["path"] = str(target)
+
+
+def import_deals(
+    path: Path,
+    save_batch: Callable[[List[Deal]], Any],
+    workers: int = 1,
+    documents_dir: Optional[Path] = None,
+    batch_size: int = BATCH_SIZE
+) -> int:
+    """
+    Relit un fichier d'export et écrit ses deals par lots avec `save_batch`
+    (typiquement backend.save_many). Les lots sont décodés dans `workers`
+    processus, avec au plus PENDING_PER_WORKER lots en attente par processus.
+    Les documents d'une archive zip sont extraits dans documents_dir/<deal_id>/
+    si documents_dir est donné. Retourne le nombre de deals importés.
+    """
+    path = Path(path)
+    count = 0
+    with ExitStack() as stack:
+        archive = None
+        if documents_dir is not None and _kind(path) == "zip":
+            archive = stack.enter_context(zipfile.ZipFile(path))
+        executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers)) if workers > 1 else None
+        pending = deque()
+
+        def write(deals: List[Deal]):
+            nonlocal count
+            for deal in deals:
+                if archive is not None:
+                    _restore_documents(archive, deal, Path(documents_dir))
+                # Parties volumineuses réécrites même si le deal existe déjà
+                deal.mark_parts_dirty()
+            if deals:
+                save_batch(deals)
+                count += len(deals)
+
+        lines = stack.enter_context(_reader(path))
+        for batch in _read_batches(lines, batch_size):
+            if executor is None:
+                write(_parse_batch(batch))
+                continue
+            pending.append(executor.submit(_parse_batch, batch))
+            # Lots écrits dans l'ordre du fichier
+            while len(pending) > workers * PENDING_PER_WORKER:
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+    return count
@@ -0,0 +1,199 @@
+"""
+Index secondaires en mémoire sur les en-têtes (DealSummary) du cache partagé.
+Chaque index associe une clé (stage, (stage, statut), pays, secteur,
+éligibilité 2X) aux IDs des deals correspondants ; les requêtes coûtent
+O(taille du résultat) au lieu d'un parcours du portfolio.
+Les statistiques du portfolio sont maintenues par deltas à chaque
+ajout/suppression, et compute_statistics() les recalcule entièrement
+pour vérification.
+Les listes sont paginées par curseur (page_of) : une page coûte
+O(n log k) via un tas, sans trier tout le portfolio.
+"""
+
+import heapq
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from models.deal import DealStage, DealSummary
+
+INACTIVE_STAGES = (DealStage.REJECTED, DealStage.EXITED)
+
+
+# Nom de l'index -> clé d'un deal
+INDEX_KEYS: Dict[str, Callable[[DealSummary], Any]] = {
+    "stage": lambda deal: deal.current_stage,
+    "stage_status": lambda deal: (deal.current_stage, deal.status),
+    "country": lambda deal: deal.country,
+    "sector": lambda deal: deal.sector,
+    "two_x": lambda deal: deal.two_x_eligible,
+}
+
+
+# Clé de tri des pages -> valeur comparable d'un en-tête
+SORT_KEYS: Dict[str, Callable[[DealSummary], Any]] = {
+    "updated_at": lambda deal: deal.updated_at,
+    "created_at": lambda deal: deal.created_at,
+    "company_name": lambda deal: deal.company_name.casefold(),
+}
+
+_DATE_SORT_KEYS = ("updated_at", "created_at")
+
+
+class DealPage(NamedTuple):
+    """Page de résultats : en-têtes, curseur de la page suivante (None si dernière), total filtré."""
+    items: List[DealSummary]
+    next_cursor: Optional[str]
+    total: int
+
+
+def encode_cursor(sort: str, deal: DealSummary) -> str:
+    """Curseur désignant la position d'un deal dans l'ordre de tri `sort`."""
+    value = SORT_KEYS[sort](deal)
+    return f"{value.isoformat() if isinstance(value, datetime) else value}|{deal.id}"
+
+
+def decode_cursor(sort: str, cursor: str) -> Tuple[Any, str]:
+    """Curseur -> clé de tri (valeur, deal_id)."""
+    value, _, deal_id = cursor.rpartition("|")
+    return (datetime.fromisoformat(value) if sort in _DATE_SORT_KEYS else value), deal_id
+
+
+def page_of(
+    deals: Iterable[DealSummary],
+    sort: str = "updated_at",
+    descending: bool = True,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = 20
+) -> DealPage:
+    """
+    Page de `limit` deals après `cursor` dans l'ordre (clé de tri, id).
+    Seuls les `limit + 1` premiers deals sont gardés (tas), sans tri complet ;
+    sans limite, tous les deals sont triés.
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Clé de tri inconnue : {sort}")
+    key_of = SORT_KEYS[sort]
+    after = decode_cursor(sort, cursor) if cursor else None
+    deals = list(deals)
+    candidates = deals
+    if after is not None:
+        if descending:
+            candidates = [deal for deal in deals if (key_of(deal), deal.id) < after]
+        else:
+            candidates = [deal for deal in deals if (key_of(deal), deal.id) > after]
+    if limit is None:
+        items = sorted(candidates, key=lambda deal: (key_of(deal), deal.id), reverse=descending)
+        return DealPage(items, None, len(deals))
+    select = heapq.nlargest if descending else heapq.nsmallest
+    top = select(limit + 1, candidates, key=lambda deal: (key_of(deal), deal.id))
+    items = top[:limit]
+    next_cursor = encode_cursor(sort, items[-1]) if len(top) > limit else None
+    return DealPage(items, next_cursor, len(deals))
+
+
+def _contribution(deal: DealSummary) -> Tuple[int, int, int, int]:
+    """Contribution d'un deal aux agrégats : (actif, 2X actif, actions ESAP, actions ESAP terminées)."""
+    active = deal.current_stage not in INACTIVE_STAGES
+    # Avancement ESAP déjà limité aux deals en monitoring par DealSummary
+    return int(active), int(active and deal.two_x_eligible), deal.esap_total, deal.esap_completed
+
+
+def _statistics(total: int, by_stage: Dict, by_sector: Dict, by_country: Dict,
+                active: int, two_x_eligible: int, esap_total: int, esap_completed: int) -> Dict:
+    return {
+        "total": total,
+        "active": active,
+        "by_stage": by_stage,
+        "by_sector": by_sector,
+        "by_country": by_country,
+        "two_x_eligible": two_x_eligible,
+        "two_x_rate": (two_x_eligible / active * 100) if active else 0,
+        "esap_total": esap_total,
+        "esap_completed": esap_completed,
+        "esap_completion_rate": (esap_completed / esap_total * 100) if esap_total > 0 else 0
+    }
+
+
+def compute_statistics(deals: List[DealSummary]) -> Dict:
+    """Recalcule entièrement les statistiques du portfolio (référence des deltas)."""
+    by_stage = {stage.value: 0 for stage in DealStage}
+    by_sector, by_country = {}, {}
+    totals = [0, 0, 0, 0]
+    for deal in deals:
+        by_stage[deal.current_stage.value] += 1
+        by_sector[deal.sector] = by_sector.get(deal.sector, 0) + 1
+        by_country[deal.country] = by_country.get(deal.country, 0) + 1
+        for i, value in enumerate(_contribution(deal)):
+            totals[i] += value
+    return _statistics(len(deals), by_stage, by_sector, by_country, *totals)
+
+
+class DealIndex:
+    """
+    Index hash maintenus à chaque ajout/suppression de deal dans le cache.
+    Les IDs sont rangés dans des dict (ensembles ordonnés) : l'ordre des
+    résultats suit l'ordre d'indexation.
+    """
+
+    def __init__(self):
+        self._indexes: Dict[str, Dict[Any, Dict[str, None]]] = {name: {} for name in INDEX_KEYS}
+        # Clés et contribution aux agrégats de chaque deal (pour le retirer en O(1))
+        self._keys: Dict[str, Tuple] = {}
+        self._contributions: Dict[str, Tuple[int, int, int, int]] = {}
+        # Sommes des contributions : actifs, 2X actifs, actions ESAP, actions terminées
+        self._totals = [0, 0, 0, 0]
+
+    def add(self, deal: DealSummary):
+        """Indexe un deal (ou le réindexe s'il l'était déjà)."""
+        keys = tuple(key_of(deal) for key_of in INDEX_KEYS.values())
+        contribution = _contribution(deal)
+        if self._keys.get(deal.id) == keys and self._contributions.get(deal.id) == contribution:
+            return
+        self.remove(deal.id)
+        for name, key in zip(INDEX_KEYS, keys):
+            self._indexes[name].setdefault(key, {})[deal.id] = None
+        self._keys[deal.id] = keys
+        self._contributions[deal.id] = contribution
+        for i, value in enumerate(contribution):
+            self._totals[i] += value
+
+    def remove(self, deal_id: str):
+        """Retire un deal des index."""
+        keys = self._keys.pop(deal_id, None)
+        if keys is None:
+            return
+        for name, key in zip(INDEX_KEYS, keys):
+            ids = self._indexes[name][key]
+            del ids[deal_id]
+            if not ids:
+                del self._indexes[name][key]
+        for i, value in enumerate(self._contributions.pop(deal_id)):
+            self._totals[i] -= value
+
+    def rebuild(self, deals: Iterable[DealSummary]):
+        """Reconstruit tous les index."""
+        self.__init__()
+        for deal in deals:
+            self.add(deal)
+
+    def ids(self, name: str, key: Any) -> List[str]:
+        """IDs des deals dont l'index `name` vaut `key`."""
+        return list(self._indexes[name].get(key, ()))
+
+    def count(self, name: str, key: Any) -> int:
+        """Nombre de deals dont l'index `name` vaut `key`."""
+        return len(self._indexes[name].get(key, ()))
+
+    def counts(self, name: str) -> Dict[Any, int]:
+        """Nombre de deals par valeur d'un index."""
+        return {key: len(ids) for key, ids in self._indexes[name].items()}
+
+    def statistics(self) -> Dict:
+        """Statistiques du portfolio, lues dans les agrégats maintenus (O(1))."""
+        return _statistics(
+            len(self._keys),
+            {stage.value: self.count("stage", stage) for stage in DealStage},
+            self.counts("sector"),
+            self.counts("country"),
+            *self._totals
+        )
@@ -0,0 +1,252 @@
+"""
+Journal append-only des mutations de deals.
+
+Chaque sauvegarde ajoute une ligne JSON (champs modifiés et opérations
+métier effectuées) au lieu de réécrire le deal. Un thread de compaction écrit
+périodiquement les deals modifiés dans le backend (snapshot reconstitué depuis
+le journal, jamais depuis les objets des sessions), puis déplace les entrées
+compactées dans l'archive du journal, qui garde l'historique complet.
+
+Au démarrage, les entrées non compactées sont rejouées sur les snapshots :
+la reprise après un arrêt brutal est exacte. Un seul processus écrivain.
+"""
+
+import atexit
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+from loguru import logger
+
+from models.deal import Deal
+from services.storage_backends import _dumps, _loads, atomic_write_bytes
+
+
+class DealJournal:
+    """
+    Journal des mutations (NDJSON) : une entrée par sauvegarde
+    {seq, ts, deal_id, ops, patch} ou par suppression {seq, ts, deal_id, deleted}.
+    """
+
+    ARCHIVE_SUFFIX = ".archive"
+
+    def __init__(self, path: Path, compact_every: int = 500, compact_interval: float = 60.0):
+        """
+        Args:
+            path: Fichier du journal
+            compact_every: Nombre d'entrées déclenchant une compaction anticipée
+            compact_interval: Délai maximal entre deux compactions (secondes)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.archive_path = self.path.with_name(self.path.name + self.ARCHIVE_SUFFIX)
+        self.compact_every = compact_every
+        self.compact_interval = compact_interval
+
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._seq = 0
+        self._uncompacted = 0
+        # Deals à écrire dans le backend -> parties volumineuses modifiées (None : toutes)
+        self._pending: Dict[str, Optional[Set[str]]] = {}
+        # Deals en cours d'écriture par la compaction
+        self._compacting: Dict[str, Optional[Set[str]]] = {}
+
+        self._load: Optional[Callable[[str], Optional[Deal]]] = None
+        self._persist: Optional[Callable[[Deal], bool]] = None
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _read_entries(self, path: Path) -> List[Dict]:
+        """Lit les entrées d'un fichier journal (ignore une dernière ligne tronquée)."""
+        if not path.exists():
+            return []
+        entries = []
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    logger.warning(f"Ignoring truncated journal entry in {path}")
+                    break
+                entries.append(_loads(line))
+        return entries
+
+    def _write(self, entry: Dict):
+        """Ajoute une entrée et la force sur disque (sous self._lock)."""
+        self._seq += 1
+        entry = {"seq": self._seq, "ts": datetime.now().isoformat(), **entry}
+        with open(self.path, 'ab') as f:
+            f.write(_dumps(entry) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._uncompacted += 1
+        if self._uncompacted >= self.compact_every:
+            self._wakeup.set()
+
+    def append(self, deal: Deal):
+        """Journalise les modifications d'un deal depuis sa dernière entrée."""
+        entry = {"deal_id": deal.id, "ops": deal.pop_ops(), "patch": deal.dirty_patch()}
+        parts = deal.dirty_parts()
+        with self._lock:
+            self._write(entry)
+            if deal.id in self._pending and self._pending[deal.id] is not None:
+                self._pending[deal.id] |= parts
+            elif deal.id not in self._pending:
+                self._pending[deal.id] = set(parts)
+        deal.clear_dirty()
+
+    def record_delete(self, deal_id: str):
+        """Journalise la suppression d'un deal (déjà supprimé du backend)."""
+        with self._lock:
+            self._write({"deal_id": deal_id, "deleted": True})
+            self._pending.pop(deal_id, None)
+
+    @staticmethod
+    def _replay(entries: List[Dict], load: Callable[[str], Optional[Deal]]) -> Dict[str, Optional[Deal]]:
+        """
+        Rejoue des entrées sur les snapshots du backend, chargés par
+        `load(deal_id)`. Retourne les deals reconstitués (None pour un deal supprimé).
+        """
+        states: Dict[str, Optional[Dict]] = {}
+        for entry in entries:
+            deal_id = entry["deal_id"]
+            if entry.get("deleted"):
+                states[deal_id] = None
+                continue
+            if deal_id not in states:
+                deal = load(deal_id)
+                states[deal_id] = deal.to_dict() if deal else None
+            states[deal_id] = Deal.apply_patch(states[deal_id] or {}, entry["patch"])
+        return {deal_id: Deal.from_dict(data) if data else None for deal_id, data in states.items()}
+    
+    def recover(self, load: Callable[[str], Optional[Deal]]) -> Dict[str, Optional[Deal]]:
+        """
+        Rejoue les entrées non compactées sur les snapshots du backend,
+        chargés par `load(deal_id)`. Retourne les deals reconstitués
+        (None pour un deal supprimé).
+        """
+        entries = self._read_entries(self.path)
+        deals = self._replay(entries, load)
+        with self._lock:
+            for entry in entries:
+                self._seq = max(self._seq, entry["seq"])
+            for deal_id, deal in deals.items():
+                if deal is None:
+                    self._pending.pop(deal_id, None)
+                else:
+                    # Le snapshot diffère du backend : tout réécrire
+                    self._pending[deal_id] = None
+            self._uncompacted = len(entries)
+        if entries:
+            logger.info(f"Replayed {len(entries)} journal entries")
+        return deals
+
+    def is_pending(self, deal_id: str) -> bool:
+        """True si le deal a des modifications pas encore écrites dans le backend."""
+        with self._lock:
+            return deal_id in self._pending or deal_id in self._compacting
+
+    def history(self, deal_id: str) -> List[Dict]:
+        """Entrées (archivées puis courantes) concernant un deal, dans l'ordre."""
+        with self._lock:
+            entries = self._read_entries(self.archive_path) + self._read_entries(self.path)
+        return [entry for entry in entries if entry["deal_id"] == deal_id]
+
+    def _requeue(self, deal_id: str, parts: Optional[Set[str]]):
+        """Remet un deal à écrire, avec les parties déjà en attente (sous self._lock)."""
+        if deal_id not in self._pending:
+            self._pending[deal_id] = parts
+        elif self._pending[deal_id] is not None:
+            self._pending[deal_id] = None if parts is None else self._pending[deal_id] | parts
+    
+    def compact(self) -> int:
+        """
+        Écrit dans le backend les deals modifiés, reconstitués depuis leur
+        snapshot et les entrées du journal, puis archive les entrées
+        compactées. Retourne le nombre de deals écrits.
+        """
+        if self._persist is None:
+            return 0
+        with self._compact_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._compacting = pending
+                seq = self._seq
+                entries = [
+                    entry for entry in self._read_entries(self.path)
+                    if entry["seq"] <= seq and entry["deal_id"] in pending
+                ]
+            if not pending:
+                return 0
+            
+            failed = {}
+            try:
+                deals = self._replay(entries, self._load)
+                for deal_id, parts in pending.items():
+                    deal = deals.get(deal_id)
+                    if deal is None:
+                        continue
+                    # Le journal a consommé l'état "modifié" : le rétablir pour le backend
+                    deal.mark_parts_dirty(parts)
+                    if not self._persist(deal):
+                        failed[deal_id] = parts
+            except Exception:
+                failed = pending
+                raise
+            finally:
+                with self._lock:
+                    self._compacting = {}
+                    if failed:
+                        # Garder le journal intact : il reste la seule copie de ces modifications
+                        for deal_id, parts in failed.items():
+                            self._requeue(deal_id, parts)
+                    else:
+                        self._archive_until(seq)
+            return len(pending) - len(failed)
+
+    def _archive_until(self, seq: int):
+        """Déplace les entrées jusqu'à seq dans l'archive (sous self._lock)."""
+        entries = self._read_entries(self.path)
+        compacted = [entry for entry in entries if entry["seq"] <= seq]
+        remaining = [entry for entry in entries if entry["seq"] > seq]
+        if compacted:
+            with open(self.archive_path, 'ab') as f:
+                f.write(b"".join(_dumps(entry) + b"\n" for entry in compacted))
+                f.flush()
+                os.fsync(f.fileno())
+        atomic_write_bytes(self.path, b"".join(_dumps(entry) + b"\n" for entry in remaining))
+        self._uncompacted = len(remaining)
+
+    def start(self, load: Callable[[str], Optional[Deal]], persist: Callable[[Deal], bool]):
+        """
+        Démarre la compaction en arrière-plan.
+        `load(deal_id)` lit le snapshot d'un deal dans le backend ;
+        `persist(deal)` y écrit un deal reconstitué et retourne False si
+        l'écriture doit être retentée.
+        """
+        self._load = load
+        self._persist = persist
+        self._thread = threading.Thread(target=self._run, name="deal-journal-compaction", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.compact_interval)
+            self._wakeup.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.compact()
+            except Exception as e:
+                logger.error(f"Error compacting deal journal: {e}")
+
+    def close(self):
+        """Arrête la compaction en arrière-plan et compacte une dernière fois."""
+        self._stop.set()
+        self._wakeup.set()
+        try:
+            self.compact()
+        except Exception as e:
+            logger.error(f"Error compacting deal journal: {e}")
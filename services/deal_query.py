@@ -0,0 +1,102 @@
+"""
+Requêtes composites sur les en-têtes des deals.
+Une DealQuery combine des filtres (stage, statut, pays, secteur, risque,
+éligibilité 2X, analyste, périodes de création/modification, tags), un tri,
+une limite et une projection. DealStorage l'exécute via les index en mémoire,
+ou la délègue en SQL quand le backend SQLite est actif.
+"""
+
+from dataclasses import dataclass, field, fields as dataclass_fields
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.deal import Deal, DealStage, DealStatus, DealSummary
+
+# Champs projetables sans charger le deal complet
+SUMMARY_FIELDS = tuple(f.name for f in dataclass_fields(DealSummary))
+
+
+@dataclass
+class DealQuery:
+    """
+    Filtres (combinés en ET, None = pas de filtre), tri et projection.
+    `tags` : le deal doit porter tous les tags donnés.
+    Les bornes de dates sont inclusives.
+    """
+    stage: Optional[DealStage] = None
+    status: Optional[DealStatus] = None
+    country: Optional[str] = None
+    sector: Optional[str] = None
+    risk_category: Optional[str] = None
+    two_x_eligible: Optional[bool] = None
+    analyst: Optional[str] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    updated_after: Optional[datetime] = None
+    updated_before: Optional[datetime] = None
+    tags: List[str] = field(default_factory=list)
+
+    # Tri ("updated_at", "created_at", "company_name") et nombre maximal de résultats
+    sort: str = "updated_at"
+    descending: bool = True
+    limit: Optional[int] = None
+
+    # Champs retournés (None : en-têtes DealSummary)
+    fields: Optional[List[str]] = None
+
+    def index_keys(self) -> List[Tuple[str, Any]]:
+        """Entrées d'index (DealIndex) utilisables pour présélectionner les deals."""
+        keys = []
+        if self.stage is not None:
+            if self.status is not None:
+                keys.append(("stage_status", (self.stage, self.status)))
+            else:
+                keys.append(("stage", self.stage))
+        if self.country is not None:
+            keys.append(("country", self.country))
+        if self.sector is not None:
+            keys.append(("sector", self.sector))
+        if self.two_x_eligible is not None:
+            keys.append(("two_x", self.two_x_eligible))
+        return keys
+
+    def matches(self, deal: DealSummary) -> bool:
+        """Vérifie tous les filtres sur un en-tête."""
+        if self.stage is not None and deal.current_stage != self.stage:
+            return False
+        if self.status is not None and deal.status != self.status:
+            return False
+        if self.country is not None and deal.country != self.country:
+            return False
+        if self.sector is not None and deal.sector != self.sector:
+            return False
+        if self.risk_category is not None and deal.risk_category != self.risk_category:
+            return False
+        if self.two_x_eligible is not None and deal.two_x_eligible != self.two_x_eligible:
+            return False
+        if self.analyst is not None and deal.analyst != self.analyst:
+            return False
+        if self.created_after is not None and deal.created_at < self.created_after:
+            return False
+        if self.created_before is not None and deal.created_at > self.created_before:
+            return False
+        if self.updated_after is not None and deal.updated_at < self.updated_after:
+            return False
+        if self.updated_before is not None and deal.updated_at > self.updated_before:
+            return False
+        return all(tag in deal.tags for tag in self.tags)
+
+    def needs_full_deals(self) -> bool:
+        """True si la projection demande des champs absents des en-têtes."""
+        return bool(self.fields) and any(name not in SUMMARY_FIELDS for name in self.fields)
+
+    def project(self, summary: DealSummary, deal: Optional[Deal] = None) -> Dict[str, Any]:
+        """
+        Champs demandés : lus dans l'en-tête quand il les porte (statut et
+        analyste du stage actuel, avancement ESAP...), sinon dans le deal
+        complet, requis si needs_full_deals().
+        """
+        return {
+            name: getattr(summary, name) if name in SUMMARY_FIELDS else getattr(deal, name)
+            for name in self.fields
+        }
@@ -0,0 +1,225 @@
+"""
+Index plein texte des deals (index inversé local, classement BM25).
+
+Couvre la fiche entreprise, la description, les analyses, décisions,
+commentaires et conditions de chaque stage, les actions ESAP et le texte des
+documents. Tokenisation française insensible aux accents et à la casse, mots
+vides ignorés, pluriels simples ramenés au singulier. Les termes suffixés par
+"*" (et le dernier terme de la requête, pour la saisie en cours) sont
+recherchés par préfixe.
+"""
+
+import math
+import re
+from bisect import bisect_left
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from models.deal import Deal
+from utils.ehs_index import BM25_B, BM25_K1, normalize
+
+FRENCH_STOPWORDS = {
+    "a", "au", "aux", "avec", "ce", "ces", "dans", "de", "des", "du", "elle", "en",
+    "est", "et", "il", "ils", "la", "le", "les", "leur", "leurs", "l", "d", "ne",
+    "ou", "par", "pas", "pour", "qu", "que", "qui", "sa", "se", "ses", "son", "sont",
+    "sur", "un", "une", "y",
+}
+
+# Champs des documents téléversés pouvant contenir du texte
+DOCUMENT_TEXT_KEYS = ("name", "filename", "title", "text", "content", "extracted_text")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _stem(token: str) -> str:
+    """Ramène les pluriels simples au singulier (enfants -> enfant, risques -> risque)."""
+    if len(token) > 3 and token[-1] in "sx" and token[-2] not in "su":
+        return token[:-1]
+    return token
+
+
+def tokenize_fr(text: str) -> List[str]:
+    """Tokens normalisés (sans accents, mots vides retirés, pluriels simples réduits)."""
+    # Texte ASCII : pas d'accents à retirer, la décomposition Unicode est inutile
+    text = text.lower() if text.isascii() else normalize(text)
+    return [_stem(t) for t in _TOKEN_RE.findall(text) if t not in FRENCH_STOPWORDS]
+
+
+def deal_texts(deal: Deal) -> Iterator[str]:
+    """Textes indexés d'un deal."""
+    yield deal.company_name
+    yield deal.country
+    yield deal.sector
+    yield deal.subsector or ""
+    yield deal.description or ""
+    for stage_data in deal.stage_history.values():
+        yield stage_data.analysis_result or ""
+        yield stage_data.decision_rationale or ""
+        yield from stage_data.conditions
+        yield from stage_data.documents
+        for comment in stage_data.comments:
+            yield comment.get("text", "")
+    for item in deal.esap_items:
+        yield item.action
+        yield item.kpi or ""
+        for note in item.progress_notes:
+            yield note.get("note", "")
+    for document in deal.uploaded_documents:
+        for key in DOCUMENT_TEXT_KEYS:
+            value = document.get(key)
+            if isinstance(value, str):
+                yield value
+
+
+def term_counts(deal: Deal) -> Dict[str, int]:
+    """Fréquence de chaque token dans les textes indexés d'un deal."""
+    counts: Dict[str, int] = {}
+    for text in deal_texts(deal):
+        for token in tokenize_fr(text):
+            counts[token] = counts.get(token, 0) + 1
+    return counts
+
+
+class CorpusStats(NamedTuple):
+    """
+    Statistiques BM25 d'un corpus pour une requête : nombre de deals,
+    longueur totale et nombre de deals contenant chaque terme de la requête.
+    """
+    count: int
+    total_length: int
+    doc_freq: Dict[str, int]
+
+    def merge(self, other: 'CorpusStats') -> 'CorpusStats':
+        """Statistiques des deux corpus réunis."""
+        doc_freq = dict(self.doc_freq)
+        for term, freq in other.doc_freq.items():
+            doc_freq[term] = doc_freq.get(term, 0) + freq
+        return CorpusStats(self.count + other.count, self.total_length + other.total_length, doc_freq)
+
+
+class DealSearchIndex:
+    """
+    Index inversé token -> {deal_id: fréquence}, mis à jour deal par deal.
+    Une requête retourne les deals contenant tous ses termes, classés par BM25.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.lengths: Dict[str, int] = {}
+        self._total_length = 0
+        # Termes de chaque deal (pour le retirer sans le re-tokeniser)
+        self._terms: Dict[str, Dict[str, int]] = {}
+        # Vocabulaire trié pour les requêtes par préfixe (reconstruit à la demande)
+        self._vocabulary: Optional[List[str]] = None
+
+    @classmethod
+    def build(cls, deals: Iterator[Deal]) -> 'DealSearchIndex':
+        index = cls()
+        for deal in deals:
+            index.add(deal)
+        return index
+
+    def add(self, deal: Deal):
+        """Indexe un deal (remplace son entrée précédente)."""
+        self.add_terms(deal.id, term_counts(deal))
+    
+    def add_terms(self, deal_id: str, counts: Dict[str, int]):
+        """Indexe un deal à partir de ses fréquences de tokens (term_counts)."""
+        if self._terms.get(deal_id) == counts:
+            return
+        self.remove(deal_id)
+        for token, count in counts.items():
+            if token not in self.postings:
+                self.postings[token] = {}
+                self._vocabulary = None
+            self.postings[token][deal_id] = count
+        length = sum(counts.values())
+        self._terms[deal_id] = counts
+        self.lengths[deal_id] = length
+        self._total_length += length
+
+    def remove(self, deal_id: str):
+        """Retire un deal de l'index."""
+        counts = self._terms.pop(deal_id, None)
+        if counts is None:
+            return
+        for token in counts:
+            postings = self.postings[token]
+            del postings[deal_id]
+            if not postings:
+                del self.postings[token]
+                self._vocabulary = None
+        self._total_length -= self.lengths.pop(deal_id)
+
+    def _expand(self, prefix: str) -> List[str]:
+        """Termes du vocabulaire commençant par un préfixe."""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        start = bisect_left(self._vocabulary, prefix)
+        terms = []
+        for term in self._vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def _parse(self, query: str) -> List[List[str]]:
+        """Requête -> liste de groupes de termes (un groupe par mot, plusieurs si préfixe)."""
+        words = query.split()
+        groups = []
+        for position, word in enumerate(words):
+            is_prefix = word.endswith("*") or (position == len(words) - 1 and not query.endswith(" "))
+            for raw in _TOKEN_RE.findall(normalize(word)):
+                if raw in FRENCH_STOPWORDS:
+                    continue
+                token = _stem(raw)
+                terms = set(self._expand(raw)) if is_prefix else set()
+                if token in self.postings:
+                    terms.add(token)
+                groups.append(sorted(terms))
+        return groups
+
+    def stats(self, query: str) -> CorpusStats:
+        """Statistiques BM25 de cet index pour les termes d'une requête."""
+        terms = {term for group in self._parse(query) for term in group}
+        return CorpusStats(
+            len(self.lengths), self._total_length, {term: len(self.postings[term]) for term in terms}
+        )
+
+    def search(self, query: str, limit: Optional[int] = None,
+               stats: Optional[CorpusStats] = None) -> List[Tuple[str, float]]:
+        """
+        Deals contenant tous les termes de la requête, classés par BM25.
+        Retourne des couples (deal_id, score), meilleur d'abord.
+        `stats` : statistiques d'un corpus plus large (cet index et d'autres,
+        voir CorpusStats.merge) ; les scores de ces index sont alors comparables.
+        """
+        groups = self._parse(query)
+        if not groups or not self.lengths or any(not terms for terms in groups):
+            return []
+
+        if stats is None:
+            stats = CorpusStats(len(self.lengths), self._total_length, {})
+        total = stats.count
+        avg_length = stats.total_length / total or 1
+        scores: Optional[Dict[str, float]] = None
+        # Termes les plus rares d'abord : l'intersection reste petite
+        for terms in sorted(groups, key=lambda ts: sum(len(self.postings[t]) for t in ts)):
+            group_scores: Dict[str, float] = {}
+            for term in terms:
+                postings = self.postings[term]
+                freq = stats.doc_freq.get(term, len(postings))
+                idf = math.log(1 + (total - freq + 0.5) / (freq + 0.5))
+                for deal_id, tf in postings.items():
+                    if scores is not None and deal_id not in scores:
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[deal_id] / avg_length)
+                    group_scores[deal_id] = group_scores.get(deal_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+            if scores is None:
+                scores = group_scores
+            else:
+                scores = {deal_id: scores[deal_id] + score for deal_id, score in group_scores.items()}
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit else ranked
@@ -1,112 +1,648 @@
 """
-Service de stockage des deals avec persistence fichiers JSON.
-Utilise Streamlit session_state comme cache et fichiers JSON pour persistence.
+Service de stockage des deals.
+Utilise un cache partagé par toutes les sessions du processus (st.cache_resource)
+et un backend de persistence : fichiers JSON (par défaut) ou SQLite
+(DEAL_STORAGE_BACKEND=sqlite).
+Le cache garde les en-têtes (DealSummary) de tous les deals pour les listes
+et tableaux de bord ; les deals complets sont chargés à leur ouverture et
+conservés dans un cache LRU borné (DEAL_CACHE_SIZE).
+Le cache suit le flux de changements du backend : les écritures d'autres
+processus sont rechargées deal par deal, et les écritures concurrentes sur un
+même deal sont refusées (contrôle de version optimiste).
+En mode écriture différée (DEAL_WRITE_DELAY), les sauvegardes successives d'un
+même deal sont regroupées en une seule écriture.
+En mode journal (DEAL_JOURNAL=1), les sauvegardes sont ajoutées à un journal
+append-only et compactées périodiquement dans le backend.
 """
 
-import json
+import atexit
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from itertools import chain
 from pathlib import Path
-from typing import List, Optional, Dict
-from datetime import datetime
+from typing import Any, Callable, List, Optional, Dict, Union
+from datetime import datetime, timedelta
 import streamlit as st
 from loguru import logger
 
-from models.deal import Deal, DealStage, DealStatus
+from models.deal import Deal, DealStage, DealStatus, DealSummary, get_codec
+from services.deal_index import DealIndex, DealPage, compute_statistics, page_of
+from services.deal_archive import ARCHIVED_STAGES, DealArchive
+from services.deal_export import export_deals, import_deals, iter_deals
+from services.deal_journal import DealJournal
+from services.deal_query import DealQuery
+from services.deal_search import DealSearchIndex
+from services.storage_backends import Change, DealConflictError, StorageBackend, _dumps, _loads, create_backend
+
+
+def _detached(deal: Deal) -> Deal:
+    """Copie indépendante d'un deal, sans modifications en attente, datée de son chargement."""
+    copy = Deal.from_dict(_loads(_dumps(deal.to_dict())))
+    copy._loaded_at = copy.updated_at
+    return copy
+
+
+class DealCache:
+    """
+    Cache des deals partagé par toutes les sessions du processus.
+    Les en-têtes (DealSummary) de tous les deals restent en mémoire pour les
+    listes, index et statistiques ; les deals complets ne sont chargés qu'à
+    leur ouverture et conservés dans un cache LRU borné.
+    Les deals du cache ne sont jamais remis aux sessions : chacune reçoit sa
+    propre copie (get), et le cache n'est mis à jour qu'après une sauvegarde
+    acceptée. Les modifications non sauvegardées d'une session restent
+    invisibles des autres.
+    """
+    
+    def __init__(self, max_deals: int = 256):
+        self.summaries: Dict[str, DealSummary] = {}
+        # Deals complets, du moins au plus récemment utilisé
+        self.deals: OrderedDict[str, Deal] = OrderedDict()
+        self.max_deals = max_deals
+        self.lock = threading.RLock()
+        self.loaded = False
+        # Dernière version de stockage reflétée par le cache
+        self.version = 0
+        # Empreinte par deal (mtime/taille/hash ou version) : relecture incrémentale
+        self.manifest: Dict[str, Dict] = {}
+        # File d'écriture différée (None : écriture synchrone)
+        self.write_behind: Optional['WriteBehindQueue'] = None
+        # Journal des mutations (None : pas de journal)
+        self.journal: Optional[DealJournal] = None
+        # Index secondaires (stage, statut, pays, secteur, 2X)
+        self.index = DealIndex()
+        # Index plein texte, construit à la première recherche
+        self.search_index: Optional[DealSearchIndex] = None
+    
+    def put(self, deal: Deal):
+        """Ajoute ou remplace un deal complet et met à jour les index (sous self.lock)."""
+        self.deals[deal.id] = deal
+        self.deals.move_to_end(deal.id)
+        self.put_summary(DealSummary.from_deal(deal))
+        if self.search_index is not None:
+            self.search_index.add(deal)
+        self._evict()
+    
+    def put_summary(self, summary: DealSummary):
+        """Ajoute ou remplace l'en-tête d'un deal (sous self.lock)."""
+        self.summaries[summary.id] = summary
+        self.index.add(summary)
+        deal = self.deals.get(summary.id)
+        if deal is not None and deal.version < summary.version:
+            # Deal chargé devenu obsolète : rechargé à sa prochaine ouverture
+            del self.deals[summary.id]
+    
+    def remove(self, deal_id: str):
+        """Retire un deal et ses entrées d'index (sous self.lock)."""
+        self.summaries.pop(deal_id, None)
+        self.deals.pop(deal_id, None)
+        self.index.remove(deal_id)
+        if self.search_index is not None:
+            self.search_index.remove(deal_id)
+    
+    def touch(self, deal_id: str) -> Optional[Deal]:
+        """Deal complet s'il est chargé, marqué comme récemment utilisé (sous self.lock)."""
+        deal = self.deals.get(deal_id)
+        if deal is not None:
+            self.deals.move_to_end(deal_id)
+        return deal
+    
+    def is_pinned(self, deal_id: str) -> bool:
+        """True si le deal a des modifications en attente d'écriture (non évinçable)."""
+        if self.journal is not None and self.journal.is_pending(deal_id):
+            return True
+        return self.write_behind is not None and self.write_behind.is_pending(deal_id)
+    
+    def _evict(self):
+        """Décharge les deals les moins récemment utilisés au-delà de max_deals."""
+        excess = len(self.deals) - self.max_deals
+        if excess <= 0:
+            return
+        for deal_id in [deal_id for deal_id in self.deals if not self.is_pinned(deal_id)][:excess]:
+            del self.deals[deal_id]
+
+
+class WriteBehindQueue:
+    """
+    Écriture différée des deals.
+    Les sauvegardes d'un même deal pendant `delay` secondes sont regroupées :
+    seul le dernier état est écrit. Les écritures en attente sont vidées à
+    l'arrêt du processus.
+    """
+    
+    def __init__(self, persist: Callable[[Deal], bool], delay: float):
+        self.persist = persist
+        self.delay = delay
+        self._pending: Dict[str, Deal] = {}
+        # Deals en cours d'écriture par flush()
+        self._flushing: Dict[str, Deal] = {}
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
+    
+    def schedule(self, deal: Deal):
+        """
+        Programme l'écriture d'un deal (remplace une écriture en attente, dont
+        les parties volumineuses modifiées restent à écrire).
+        """
+        with self._lock:
+            previous = self._pending.get(deal.id)
+            if previous is not None:
+                deal.mark_parts_dirty(previous.dirty_parts())
+            self._pending[deal.id] = deal
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+    
+    def discard(self, deal_id: str):
+        """Annule l'écriture en attente d'un deal."""
+        with self._lock:
+            self._pending.pop(deal_id, None)
+    
+    def is_pending(self, deal_id: str) -> bool:
+        """True si l'écriture du deal est en attente ou en cours."""
+        with self._lock:
+            return deal_id in self._pending or deal_id in self._flushing
+    
+    def flush(self) -> int:
+        """Écrit immédiatement les deals en attente. Retourne le nombre de deals écrits."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushing = pending
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        try:
+            written = 0
+            for deal in pending.values():
+                if not self.persist(deal):
+                    continue
+                written += 1
+                with self._lock:
+                    # Sauvegarde programmée pendant l'écriture : elle part de la version écrite
+                    rescheduled = self._pending.get(deal.id)
+                    if rescheduled is not None and rescheduled.version < deal.version:
+                        rescheduled.version = deal.version
+            return written
+        finally:
+            with self._lock:
+                self._flushing = {}
+
+
+@st.cache_resource(show_spinner=False)
+def _get_shared_cache(cache_key: str, max_deals: int) -> DealCache:
+    """Un cache par backend (clé = type + emplacement), créé une fois par processus."""
+    return DealCache(max_deals)
 
 
 class DealStorage:
     """
     Service de stockage des deals.
-    - Cache en mémoire via session_state
-    - Persistence via fichiers JSON
+    - Cache en mémoire partagé entre sessions (st.cache_resource)
+    - Persistence via un backend (fichiers JSON ou SQLite)
     """
     
     STORAGE_DIR = Path("data/deals")
+    DB_PATH = Path("data/deals.db")
+    
+    # Documents téléversés restaurés par import_portfolio
+    DOCUMENTS_DIR = Path("data/documents")
+    
+    # Variable d'environnement de choix du backend ("json" ou "sqlite")
+    BACKEND_ENV = "DEAL_STORAGE_BACKEND"
+    
+    # Format d'écriture des deals ("json" ou "msgpack") ; les deux sont lus
+    CODEC_ENV = "DEAL_CODEC"
+    
+    # Délai d'écriture différée en secondes (0 : écriture synchrone)
+    WRITE_DELAY_ENV = "DEAL_WRITE_DELAY"
+    
+    # Journal des mutations ("1" pour l'activer)
+    JOURNAL_ENV = "DEAL_JOURNAL"
+    JOURNAL_PATH = Path("data/deals.journal")
     
-    def __init__(self):
-        """Initialise le stockage."""
-        # Créer le répertoire si nécessaire
-        self.STORAGE_DIR.mkdir(parents=True, exist_ok=True)
+    # Nombre maximal de deals complets gardés en mémoire
+    CACHE_SIZE_ENV = "DEAL_CACHE_SIZE"
+    DEFAULT_CACHE_SIZE = 256
+    
+    # Archive froide des deals rejetés ou sortis depuis plus de DEAL_ARCHIVE_DAYS jours
+    ARCHIVE_DIR = Path("data/archive")
+    ARCHIVE_DAYS_ENV = "DEAL_ARCHIVE_DAYS"
+    DEFAULT_ARCHIVE_DAYS = 180
+    ARCHIVE_COMPRESSION_ENV = "DEAL_ARCHIVE_COMPRESSION"  # "gzip" ou "lzma"
+    
+    def __init__(
+        self,
+        backend: Optional[StorageBackend] = None,
+        write_delay: Optional[float] = None,
+        journal_path: Optional[Path] = None,
+        archive: Optional[DealArchive] = None
+    ):
+        """
+        Initialise le stockage.
         
-        # Initialiser le cache session
-        if 'deals_cache' not in st.session_state:
-            st.session_state.deals_cache = {}
-            self._load_all_deals()
-    
-    def _load_all_deals(self):
-        """Charge tous les deals depuis les fichiers JSON."""
-        loaded = 0
-        errors = 0
+        Args:
+            backend: Backend de persistence (par défaut selon DEAL_STORAGE_BACKEND)
+            write_delay: Fenêtre de regroupement des sauvegardes en secondes
+                         (par défaut DEAL_WRITE_DELAY, 0 = écriture synchrone)
+            journal_path: Active le journal des mutations dans ce fichier
+                          (par défaut JOURNAL_PATH si DEAL_JOURNAL=1)
+            archive: Archive des deals clos (par défaut ARCHIVE_DIR)
+        """
+        self.backend = backend or create_backend(
+            os.getenv(self.BACKEND_ENV, "json"), self.STORAGE_DIR, self.DB_PATH,
+            get_codec(os.getenv(self.CODEC_ENV, "json"))
+        )
+        # DealArchive définit __len__ : une archive vide injectée est fausse
+        self.archive = archive if archive is not None else DealArchive(
+            self.ARCHIVE_DIR, os.getenv(self.ARCHIVE_COMPRESSION_ENV, "gzip")
+        )
+        if write_delay is None:
+            write_delay = float(os.getenv(self.WRITE_DELAY_ENV, "0"))
+        if journal_path is None and os.getenv(self.JOURNAL_ENV) == "1":
+            journal_path = self.JOURNAL_PATH
+        
+        max_deals = int(os.getenv(self.CACHE_SIZE_ENV, str(self.DEFAULT_CACHE_SIZE)))
         
-        for filepath in self.STORAGE_DIR.glob("*.json"):
+        # Cache partagé, chargé une seule fois par processus
+        self._cache = _get_shared_cache(self.backend.cache_key, max_deals)
+        with self._cache.lock:
+            if not self._cache.loaded:
+                self._load_all_deals()
+                self._cache.loaded = True
+            if journal_path is not None and self._cache.journal is None:
+                # Rejouer les mutations non compactées sur les snapshots
+                journal = DealJournal(journal_path)
+                self._cache.journal = journal
+                for deal_id, deal in journal.recover(self.backend.load).items():
+                    if deal is None:
+                        self._cache.remove(deal_id)
+                    else:
+                        self._cache.put(deal)
+                journal.start(self.backend.load, self._snapshot)
+            elif write_delay > 0 and self._cache.write_behind is None:
+                self._cache.write_behind = WriteBehindQueue(self._persist, write_delay)
+    
+    def _load_all_deals(self) -> int:
+        """
+        Charge les en-têtes des deals depuis le backend.
+        Seuls les deals modifiés depuis le dernier chargement sont relus.
+        Retourne le nombre de deals modifiés ou supprimés.
+        """
+        # Version lue avant les deals : un changement concurrent sera rejoué par refresh()
+        self._cache.version = self.backend.current_version()
+        
+        summaries, removed = self.backend.load_summaries(self._cache.manifest)
+        for summary in summaries:
+            self._cache.put_summary(summary)
+        for deal_id in removed:
+            self._cache.remove(deal_id)
+        if self._cache.search_index is not None and (summaries or removed):
+            self._cache.search_index = None
+        
+        if summaries or removed:
+            logger.info(f"Loaded {len(summaries)} deal summaries ({len(removed)} removed)")
+        return len(summaries) + len(removed)
+    
+    def _hydrate(self, deal_id: str) -> Optional[Deal]:
+        """Deal complet, chargé depuis le backend s'il n'est pas en cache (sous self._cache.lock)."""
+        deal = self._cache.touch(deal_id)
+        if deal is None and deal_id in self._cache.summaries:
             try:
-                content = filepath.read_text(encoding='utf-8')
-                data = json.loads(content)
-                deal = Deal.from_dict(data)
-                st.session_state.deals_cache[deal.id] = deal
-                loaded += 1
+                deal = self.backend.load(deal_id)
             except Exception as e:
-                logger.error(f"Error loading deal from {filepath}: {e}")
-                errors += 1
-        
-        if loaded > 0 or errors > 0:
-            logger.info(f"Loaded {loaded} deals, {errors} errors")
+                logger.error(f"Error loading deal {deal_id}: {e}")
+                return None
+            if deal is None:
+                self._cache.remove(deal_id)
+            else:
+                self._cache.put(deal)
+        return deal
     
-    def save(self, deal: Deal) -> bool:
+    def _from_ids(self, deal_ids: List[str]) -> List[Deal]:
+        """Résout des IDs en copies de deals complets (chargés à la demande)."""
+        with self._cache.lock:
+            deals = [self._hydrate(deal_id) for deal_id in deal_ids]
+            return [_detached(deal) for deal in deals if deal is not None]
+    
+    def reload(self, deal_id: Optional[str] = None):
         """
-        Sauvegarde un deal.
-        Met à jour le cache et écrit sur disque.
+        Relit depuis le backend : un seul deal si deal_id est donné,
+        sinon tous les deals modifiés depuis le dernier chargement.
+        """
+        with self._cache.lock:
+            if deal_id is None:
+                self._load_all_deals()
+                return
+            deal = self.backend.load(deal_id)
+            if deal is None:
+                self._cache.remove(deal_id)
+            elif deal_id in self._cache.deals or self._cache.search_index is not None:
+                self._cache.put(deal)
+            else:
+                # Deal non ouvert : seul son en-tête est gardé
+                self._cache.put_summary(DealSummary.from_deal(deal))
+    
+    def refresh(self) -> int:
+        """
+        Applique au cache les changements faits par d'autres processus depuis
+        la dernière synchronisation. Seuls les deals modifiés sont relus.
+        Retourne le nombre de deals rechargés.
         """
         try:
-            # Mettre à jour le timestamp
-            deal.updated_at = datetime.now()
-            
-            # Mettre à jour le cache
-            st.session_state.deals_cache[deal.id] = deal
-            
-            # Sauvegarder sur disque
-            filepath = self.STORAGE_DIR / f"{deal.id}.json"
-            filepath.write_text(deal.to_json(), encoding='utf-8')
+            if self.backend.current_version() <= self._cache.version:
+                return 0
+            with self._cache.lock:
+                changes = self.backend.changes_since(self._cache.version)
+                if changes is None:
+                    # Flux tronqué au-delà de notre version : relecture par empreintes
+                    logger.info("Deal change feed truncated, reloading changed deals")
+                    return self._load_all_deals()
+                # Dernier changement par deal
+                latest: Dict[str, Change] = {change.deal_id: change for change in changes}
+                refreshed = 0
+                for deal_id, change in latest.items():
+                    cached = self._cache.summaries.get(deal_id)
+                    if change.op == "save" and cached is not None and cached.version >= change.version:
+                        continue  # Écriture de ce processus, déjà dans le cache
+                    self.reload(deal_id)
+                    refreshed += 1
+                if changes:
+                    self._cache.version = max(self._cache.version, changes[-1].version)
+            if refreshed:
+                logger.debug(f"Refreshed {refreshed} deals from other sessions")
+            return refreshed
+        except Exception as e:
+            logger.error(f"Error refreshing deal cache: {e}")
+            return 0
+    
+    def changes_since(self, version: int) -> Optional[List[Change]]:
+        """
+        Changements (version, deal_id, opération) postérieurs à une version,
+        ou None si le flux ne remonte plus jusqu'à elle.
+        """
+        return self.backend.changes_since(version)
+    
+    def _track_version(self, deal: Deal):
+        """Reporte dans le cache la version écrite par le backend (sous self._cache.lock)."""
+        cached = self._cache.deals.get(deal.id)
+        if cached is not None and cached.version < deal.version:
+            cached.version = deal.version
+        summary = self._cache.summaries.get(deal.id)
+        if summary is not None and summary.version < deal.version:
+            self._cache.put_summary(replace(summary, version=deal.version))
+    
+    def _persist(self, deal: Deal) -> bool:
+        """Écrit un deal dans le backend (vérifie et incrémente deal.version)."""
+        try:
+            with self._cache.lock:
+                self.backend.save(deal)
+                self._track_version(deal)
             
             logger.debug(f"Deal {deal.id} ({deal.company_name}) saved successfully")
             return True
             
+        except DealConflictError as e:
+            logger.warning(f"Save conflict on deal {deal.id}: {e}")
+            # Recharger la version à jour pour la prochaine lecture
+            self.reload(deal.id)
+            return False
         except Exception as e:
             logger.error(f"Error saving deal {deal.id}: {e}")
             return False
     
+    def _snapshot(self, deal: Deal) -> bool:
+        """
+        Compaction du journal : écrit dans le backend un deal reconstitué
+        depuis le journal. Retourne False si l'écriture doit être retentée.
+        """
+        with self._cache.lock:
+            try:
+                self.backend.save(deal)
+                self._track_version(deal)
+                return True
+            except DealConflictError as e:
+                logger.warning(f"Save conflict on deal {deal.id}: {e}")
+                self.reload(deal.id)
+                return True
+            except Exception as e:
+                logger.error(f"Error saving deal {deal.id}: {e}")
+                return False
+    
+    def save(self, deal: Deal) -> bool:
+        """
+        Sauvegarde un deal.
+        Écrit sur disque puis reporte les champs modifiés dans la copie du cache.
+        Refuse l'écriture (False) si le deal a été modifié ailleurs depuis son
+        chargement, par une autre session ou un autre processus.
+        En écriture différée, le cache est mis à jour immédiatement et l'écriture
+        programmée ; un conflit avec un autre processus est alors seulement journalisé.
+        En mode journal, seules les modifications sont ajoutées au journal.
+        """
+        with self._cache.lock:
+            base = None
+            summary = self._cache.summaries.get(deal.id)
+            if summary is not None:
+                if deal._loaded_at is not None and summary.updated_at != deal._loaded_at:
+                    # Sauvegardé par une autre session depuis le chargement de cette copie
+                    logger.warning(f"Save conflict on deal {deal.id}: modified by another session")
+                    return False
+                # Partir de la dernière version écrite (écritures différées ou compactées depuis)
+                if deal.version < summary.version:
+                    deal.version = summary.version
+                # Détecter les mutations en place non signalées par mark_dirty()
+                base = self._hydrate(deal.id)
+                if base is not None:
+                    deal.mark_changes(base)
+                else:
+                    deal.mark_dirty(*deal.to_dict())
+                    deal.mark_parts_dirty()
+            
+            # Mettre à jour le timestamp
+            deal.updated_at = datetime.now()
+            # Relevé avant l'écriture, qui oublie les champs modifiés
+            changes = deal.changed_fields()
+            
+            journal = self._cache.journal
+            if journal is not None:
+                try:
+                    journal.append(deal)
+                except Exception as e:
+                    logger.error(f"Error journaling deal {deal.id}: {e}")
+                    return False
+                self._cache_saved(deal, base, changes)
+                return True
+            
+            write_behind = self._cache.write_behind
+            if write_behind is not None:
+                # La file écrit la copie du cache ; la session garde la sienne
+                cached = self._cache_saved(deal, base, changes)
+                cached.mark_parts_dirty(deal.dirty_parts())
+                write_behind.schedule(cached)
+                deal.clear_dirty()
+                return True
+            
+            if not self._persist(deal):
+                return False
+            self._cache_saved(deal, base, changes)
+            return True
+    
+    def _cache_saved(self, deal: Deal, base: Optional[Deal], changes) -> Deal:
+        """
+        Reporte une sauvegarde acceptée dans le cache (sous self._cache.lock).
+        Seuls les champs modifiés sont recopiés dans la copie du cache (base) ;
+        un deal qui n'y est pas (nouveau, rechargé entre-temps) est copié en entier.
+        """
+        if base is not None and self._cache.deals.get(deal.id) is base:
+            base.copy_changes(deal, changes)
+            cached = base
+        else:
+            cached = _detached(deal)
+        self._cache.put(cached)
+        deal._loaded_at = deal.updated_at
+        return cached
+    
+    def flush(self) -> int:
+        """Écrit immédiatement les sauvegardes différées ou journalisées en attente."""
+        if self._cache.journal is not None:
+            return self._cache.journal.compact()
+        if self._cache.write_behind is None:
+            return 0
+        return self._cache.write_behind.flush()
+    
+    def get_history(self, deal_id: str) -> List[Dict]:
+        """Historique des mutations d'un deal (mode journal uniquement)."""
+        if self._cache.journal is None:
+            return []
+        return self._cache.journal.history(deal_id)
+    
     def get(self, deal_id: str) -> Optional[Deal]:
-        """Récupère un deal par son ID."""
-        return st.session_state.deals_cache.get(deal_id)
+        """
+        Récupère un deal complet par son ID (chargé à la demande).
+        Retourne une copie propre à l'appelant : ses modifications ne sont
+        visibles des autres sessions qu'une fois sauvegardées.
+        """
+        with self._cache.lock:
+            deal = self._hydrate(deal_id)
+            return _detached(deal) if deal is not None else None
+    
+    def get_summary(self, deal_id: str) -> Optional[DealSummary]:
+        """Récupère l'en-tête d'un deal sans le charger."""
+        return self._cache.summaries.get(deal_id)
     
     def get_all(self) -> List[Deal]:
-        """Récupère tous les deals."""
-        return list(st.session_state.deals_cache.values())
+        """Récupère tous les deals (charge les deals complets : préférer get_summaries)."""
+        return self._from_ids(list(self._cache.summaries))
+    
+    def get_summaries(self, stage: Optional[DealStage] = None, status: Optional[DealStatus] = None) -> List[DealSummary]:
+        """En-têtes des deals, éventuellement filtrés par stage et statut (listes, tableaux de bord)."""
+        return self._select(DealQuery(stage=stage, status=status))
+    
+    def count(self, stage: Optional[DealStage] = None, status: Optional[DealStatus] = None) -> int:
+        """Nombre de deals, éventuellement filtrés par stage et statut (index, O(1))."""
+        with self._cache.lock:
+            if stage is None:
+                return len(self._cache.summaries)
+            if status is None:
+                return self._cache.index.count("stage", stage)
+            return self._cache.index.count("stage_status", (stage, status))
+    
+    def _select(self, query: DealQuery) -> List[DealSummary]:
+        """En-têtes satisfaisant les filtres, présélectionnés par l'index le plus sélectif."""
+        with self._cache.lock:
+            index = self._cache.index
+            keys = query.index_keys()
+            if keys:
+                name, key = min(keys, key=lambda item: index.count(*item))
+                candidates = [self._cache.summaries[deal_id] for deal_id in index.ids(name, key)]
+            else:
+                candidates = list(self._cache.summaries.values())
+        return [deal for deal in candidates if query.matches(deal)]
+    
+    def _pushdown(self) -> bool:
+        """
+        True si les requêtes peuvent être exécutées par le backend : SQLite,
+        sans écriture différée ni journal (la base reflète alors le cache).
+        """
+        return (
+            self.backend.supports_queries
+            and self._cache.write_behind is None
+            and self._cache.journal is None
+        )
+    
+    def query(self, query: DealQuery) -> List[Union[DealSummary, Dict[str, Any]]]:
+        """
+        Exécute une requête composite : en SQL avec le backend SQLite, sinon
+        via les index en mémoire. Retourne les en-têtes triés, ou les champs
+        demandés (query.fields) ; les champs absents des en-têtes chargent
+        les deals complets.
+        """
+        results = None
+        if self._pushdown():
+            try:
+                deal_ids = self.backend.select_ids(query)
+                with self._cache.lock:
+                    summaries = self._cache.summaries
+                    results = [summaries[deal_id] for deal_id in deal_ids if deal_id in summaries]
+            except Exception as e:
+                logger.error(f"Error running deal query in backend, using indexes: {e}")
+        if results is None:
+            results = page_of(self._select(query), query.sort, query.descending, None, query.limit).items
+        
+        if not query.fields:
+            return results
+        if query.needs_full_deals():
+            deals = {deal.id: deal for deal in self._from_ids([summary.id for summary in results])}
+            return [query.project(summary, deals[summary.id]) for summary in results if summary.id in deals]
+        return [query.project(summary) for summary in results]
+    
+    def query_page(self, query: Optional[DealQuery] = None, cursor: Optional[str] = None, limit: int = 20) -> DealPage:
+        """
+        Page d'en-têtes satisfaisant une requête, triée selon query.sort
+        ("updated_at", "created_at", "company_name").
+        Passer le next_cursor d'une page pour obtenir la suivante ; le curseur
+        reste valide si des deals sont ajoutés ou modifiés entre deux pages.
+        """
+        query = query or DealQuery()
+        return page_of(self._select(query), query.sort, query.descending, cursor, limit)
     
     def get_by_stage(self, stage: DealStage) -> List[Deal]:
         """Récupère les deals à un stage donné."""
-        return [d for d in self.get_all() if d.current_stage == stage]
+        return self._from_ids(self._cache.index.ids("stage", stage))
     
     def get_by_status(self, stage: DealStage, status: DealStatus) -> List[Deal]:
         """Récupère les deals à un stage et statut donnés."""
-        deals = self.get_by_stage(stage)
-        return [d for d in deals if d.get_current_stage_data() and d.get_current_stage_data().status == status]
+        return self._from_ids(self._cache.index.ids("stage_status", (stage, status)))
     
     def get_active_deals(self) -> List[Deal]:
         """Récupère les deals actifs (non rejetés, non sortis)."""
         excluded = [DealStage.REJECTED, DealStage.EXITED]
-        return [d for d in self.get_all() if d.current_stage not in excluded]
+        with self._cache.lock:
+            deal_ids = [
+                deal_id
+                for stage in DealStage if stage not in excluded
+                for deal_id in self._cache.index.ids("stage", stage)
+            ]
+        return self._from_ids(deal_ids)
     
     def delete(self, deal_id: str) -> bool:
         """Supprime un deal."""
         try:
-            # Supprimer du cache
-            if deal_id in st.session_state.deals_cache:
-                del st.session_state.deals_cache[deal_id]
-            
-            # Supprimer le fichier
-            filepath = self.STORAGE_DIR / f"{deal_id}.json"
-            if filepath.exists():
-                filepath.unlink()
+            with self._cache.lock:
+                # Supprimer du cache partagé (et l'écriture différée en attente)
+                self._cache.remove(deal_id)
+                if self._cache.write_behind is not None:
+                    self._cache.write_behind.discard(deal_id)
+                
+                # Supprimer du backend
+                self.backend.delete(deal_id)
+                
+                # Empêcher le rejeu des entrées antérieures du journal
+                if self._cache.journal is not None:
+                    self._cache.journal.record_delete(deal_id)
             
             logger.info(f"Deal {deal_id} deleted")
             return True
@@ -115,75 +651,146 @@ class DealStorage:
             logger.error(f"Error deleting deal {deal_id}: {e}")
             return False
     
-    def search(self, query: str) -> List[Deal]:
-        """Recherche des deals par nom d'entreprise ou pays."""
-        query_lower = query.lower()
-        results = []
-        
-        for deal in self.get_all():
-            if (query_lower in deal.company_name.lower() or 
-                query_lower in deal.country.lower() or
-                query_lower in deal.sector.lower()):
-                results.append(deal)
+    def search(self, query: str, limit: Optional[int] = None, include_archived: bool = False) -> List[Deal]:
+        """
+        Recherche plein texte (entreprise, pays, secteur, description, analyses,
+        décisions, commentaires, ESAP, documents), résultats classés par pertinence.
+        Avec include_archived, les deals archivés trouvés sont relus depuis l'archive.
+        """
+        with self._cache.lock:
+            if self._cache.search_index is None:
+                # Deals chargés (éventuellement non encore écrits), puis les autres lus en flux
+                loaded = self._cache.deals
+                self._cache.search_index = DealSearchIndex.build(chain(
+                    list(loaded.values()),
+                    (deal for deal in self.backend.load_all() if deal.id not in loaded)
+                ))
+            if not include_archived:
+                results = self._cache.search_index.search(query, limit)
+            else:
+                live_stats = self._cache.search_index.stats(query)
+        if not include_archived:
+            return self._from_ids([deal_id for deal_id, _ in results])
         
-        return results
+        # Scores des deux index calculés sur le corpus réuni (deals courants et
+        # archivés) : comparables, comme s'ils venaient d'un seul index.
+        # L'archive est interrogée hors du verrou du cache (archive_inactive
+        # prend les verrous dans l'ordre inverse).
+        stats = live_stats.merge(self.archive.search_stats(query))
+        with self._cache.lock:
+            results = self._cache.search_index.search(query, limit, stats)
+        ranked = sorted(results + self.archive.search(query, limit, stats), key=lambda item: (-item[1], item[0]))
+        if limit:
+            ranked = ranked[:limit]
+        deals = []
+        for deal_id, _ in ranked:
+            deal = self.get(deal_id) if deal_id in self._cache.summaries else None
+            deal = deal or self.archive.get(deal_id)
+            if deal is not None:
+                deals.append(deal)
+        return deals
     
     def get_statistics(self) -> Dict:
-        """Retourne des statistiques sur le portfolio."""
-        deals = self.get_all()
-        
-        # Par stage
-        by_stage = {}
-        for stage in DealStage:
-            by_stage[stage.value] = len([d for d in deals if d.current_stage == stage])
-        
-        # Par secteur
-        by_sector = {}
-        for deal in deals:
-            by_sector[deal.sector] = by_sector.get(deal.sector, 0) + 1
-        
-        # Par pays
-        by_country = {}
-        for deal in deals:
-            by_country[deal.country] = by_country.get(deal.country, 0) + 1
-        
-        # 2X Challenge
-        active_deals = self.get_active_deals()
-        two_x_eligible = len([d for d in active_deals if d.two_x_eligible])
-        
-        # ESAP (pour deals en monitoring)
-        monitoring_deals = self.get_by_stage(DealStage.MONITORING)
-        total_esap_items = sum(len(d.esap_items) for d in monitoring_deals)
-        completed_esap = sum(
-            sum(1 for item in d.esap_items if item.status == "completed")
-            for d in monitoring_deals
-        )
-        
-        return {
-            "total": len(deals),
-            "active": len(active_deals),
-            "by_stage": by_stage,
-            "by_sector": by_sector,
-            "by_country": by_country,
-            "two_x_eligible": two_x_eligible,
-            "two_x_rate": (two_x_eligible / len(active_deals) * 100) if active_deals else 0,
-            "esap_total": total_esap_items,
-            "esap_completed": completed_esap,
-            "esap_completion_rate": (completed_esap / total_esap_items * 100) if total_esap_items > 0 else 0
-        }
+        """Retourne des statistiques sur le portfolio (agrégats maintenus par deltas)."""
+        with self._cache.lock:
+            return self._cache.index.statistics()
+    
+    def check_statistics(self) -> bool:
+        """Compare les agrégats maintenus à un recalcul complet (tests, diagnostic)."""
+        with self._cache.lock:
+            incremental = self._cache.index.statistics()
+            expected = compute_statistics(list(self._cache.summaries.values()))
+        if incremental != expected:
+            logger.error(f"Incremental statistics out of sync: {incremental} != {expected}")
+            return False
+        return True
+    
+    def get_recent_summaries(self, limit: int = 10) -> List[DealSummary]:
+        """En-têtes des deals les plus récemment modifiés (top-k, sans tri complet)."""
+        return self.query(DealQuery(limit=limit))
     
     def get_recent_deals(self, limit: int = 10) -> List[Deal]:
         """Récupère les deals les plus récents."""
-        deals = self.get_all()
-        deals.sort(key=lambda d: d.updated_at, reverse=True)
-        return deals[:limit]
+        return self._from_ids([summary.id for summary in self.get_recent_summaries(limit)])
+    
+    def archive_inactive(self, days: Optional[int] = None) -> int:
+        """
+        Déplace dans l'archive les deals rejetés ou sortis non modifiés depuis
+        `days` jours (par défaut DEAL_ARCHIVE_DAYS). Ils quittent le backend,
+        le cache et les index. Retourne le nombre de deals archivés.
+        """
+        if days is None:
+            days = int(os.getenv(self.ARCHIVE_DAYS_ENV, str(self.DEFAULT_ARCHIVE_DAYS)))
+        cutoff = datetime.now() - timedelta(days=days)
+        # Le backend doit refléter les dernières modifications
+        self.flush()
+        
+        archived_ids = []
+        # Index de l'archive écrit une seule fois pour tout le lot
+        with self.archive.batch():
+            for stage in ARCHIVED_STAGES:
+                for summary in self.query(DealQuery(stage=stage, updated_before=cutoff)):
+                    try:
+                        deal = self.backend.load(summary.id)
+                        if deal is None or deal.current_stage not in ARCHIVED_STAGES:
+                            continue
+                        self.archive.put(deal)
+                    except Exception as e:
+                        logger.error(f"Error archiving deal {summary.id}: {e}")
+                        continue
+                    archived_ids.append(summary.id)
+        # Supprimés du stockage courant seulement une fois l'index de l'archive écrit
+        archived = sum(1 for deal_id in archived_ids if self.delete(deal_id))
+        if archived:
+            logger.info(f"Archived {archived} closed deals")
+        return archived
     
-    def export_portfolio(self) -> Dict:
-        """Exporte tout le portfolio pour backup."""
-        return {
-            "exported_at": datetime.now().isoformat(),
-            "deals": [deal.to_dict() for deal in self.get_all()]
-        }
+    def get_archived_summaries(self) -> List[DealSummary]:
+        """En-têtes des deals archivés."""
+        return self.archive.summaries()
+    
+    def get_archived(self, deal_id: str) -> Optional[Deal]:
+        """Lit un deal archivé sans le restaurer."""
+        return self.archive.get(deal_id)
+    
+    def restore(self, deal_id: str) -> Optional[Deal]:
+        """Remet un deal archivé dans le stockage courant et le retire de l'archive."""
+        if deal_id in self._cache.summaries:
+            # Archivage interrompu avant la suppression : le deal courant fait foi
+            self.archive.remove(deal_id)
+            return self.get(deal_id)
+        deal = self.archive.get(deal_id)
+        if deal is None:
+            return None
+        # Absent du backend : tout le deal est à écrire (journal compris)
+        deal.mark_dirty(*deal.to_dict())
+        deal.mark_parts_dirty()
+        if not self.save(deal):
+            return None
+        self.archive.remove(deal_id)
+        logger.info(f"Deal {deal_id} restored from archive")
+        return deal
+    
+    def export_portfolio(self, path: Path, include_documents: bool = False) -> int:
+        """
+        Exporte tout le portfolio (backup) en NDJSON, deal par deal, sans le
+        charger en mémoire : .ndjson, .ndjson.zst ou .zip (avec les documents
+        téléversés si include_documents). Retourne le nombre de deals exportés.
+        """
+        self.flush()
+        with self._cache.lock:
+            deal_ids = sorted(self._cache.summaries)
+        return export_deals(iter_deals(self.backend, deal_ids), path, include_documents)
+    
+    def import_portfolio(self, path: Path, workers: int = 1) -> int:
+        """
+        Importe un export (export_portfolio) par lots : les deals présents
+        sont remplacés, les autres conservés. Retourne le nombre de deals importés.
+        """
+        self.flush()
+        count = import_deals(path, self.backend.save_many, workers, self.DOCUMENTS_DIR)
+        self.refresh()
+        return count
 
 
 # Singleton pattern
@@ -195,12 +802,16 @@ def get_deal_storage() -> DealStorage:
     global _storage_instance
     if _storage_instance is None:
         _storage_instance = DealStorage()
+    else:
+        # Prendre en compte les écritures des autres processus
+        _storage_instance.refresh()
     return _storage_instance
 
 
 def reset_storage():
     """Reset le storage (pour tests)."""
     global _storage_instance
+    if _storage_instance is not None:
+        _storage_instance.flush()
     _storage_instance = None
-    if 'deals_cache' in st.session_state:
-        del st.session_state.deals_cache
+    _get_shared_cache.clear()
@@ -0,0 +1,885 @@
+"""
+Backends de persistence des deals.
+- JsonFileBackend : un fichier JSON par deal dans data/deals/
+- SQLiteBackend : une base SQLite (mode WAL) avec colonnes indexées
+  (stage, statut, pays, secteur, catégorie de risque, éligibilité 2X)
+  et le document complet du deal
+
+Chaque écriture incrémente une version de stockage monotone et alimente un
+flux de changements (version, deal_id, opération) que les autres processus
+interrogent pour ne rafraîchir que les deals modifiés.
+
+Les parties volumineuses d'un deal (analyses par stage, historique des KPIs)
+sont stockées à part (fichiers annexes ou table deal_parts) et ne sont
+réécrites que lorsqu'elles ont été modifiées.
+
+Les en-têtes des deals (DealSummary) se chargent sans désérialiser les deals :
+manifeste persisté (_summaries) en JSON, colonne `summary` en SQLite.
+"""
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+from loguru import logger
+
+from models.deal import (
+    ANALYSIS_PART, DOCUMENT_EXTENSIONS, KPI_PART, Deal, DealCodec, DealSummary, JsonCodec, decode_document
+)
+from services.deal_query import DealQuery
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    # Windows : verrou inter-processus indisponible (mono-processus)
+    HAS_FCNTL = False
+
+# Fichiers internes (manifeste, journal, en-têtes SQLite) : toujours en JSON
+JSON_CODEC = JsonCodec()
+
+
+def _loads(data: bytes):
+    """Décode un document JSON (orjson si disponible)."""
+    return JSON_CODEC.decode(data)
+
+
+def _dumps(data: Dict) -> bytes:
+    """Encode un document JSON compact en UTF-8 (orjson si disponible)."""
+    return JSON_CODEC.encode(data)
+
+
+# Taille encodée à partir de laquelle une partie volumineuse est stockée à part
+PART_MIN_BYTES = 4096
+
+
+def _pop_parts(data: Dict) -> Dict[str, Any]:
+    """Retire du document d'un deal ses parties volumineuses non vides."""
+    parts = {}
+    if data.get("monitoring_kpis"):
+        parts[KPI_PART] = data.pop("monitoring_kpis")
+    for stage_name, stage_data in data.get("stage_history", {}).items():
+        if stage_data.get("analysis_result"):
+            parts[ANALYSIS_PART + stage_name] = stage_data.pop("analysis_result")
+    return parts
+
+
+def _put_part(data: Dict, part: str, value: Any) -> None:
+    """Réinsère une partie volumineuse dans le document d'un deal."""
+    if part == KPI_PART:
+        data["monitoring_kpis"] = value
+    elif part.startswith(ANALYSIS_PART):
+        stage_data = data.get("stage_history", {}).get(part[len(ANALYSIS_PART):])
+        if stage_data is not None:
+            stage_data["analysis_result"] = value
+
+
+def split_deal(deal: Deal, stored_parts: Set[str], codec: DealCodec = JSON_CODEC) -> Tuple[Dict, Dict[str, Optional[bytes]]]:
+    """
+    Sépare le document d'un deal en un cœur et ses parties volumineuses.
+    
+    Retourne (cœur, {partie: contenu encodé à écrire, ou None si la partie
+    déjà stockée est inchangée}). Les parties absentes du résultat restent
+    dans le cœur (petites ou vides).
+    """
+    data = deal.to_dict()
+    dirty = deal.dirty_parts()
+    parts = {}
+    for part, value in _pop_parts(data).items():
+        if part in stored_parts and part not in dirty:
+            parts[part] = None
+            continue
+        encoded = codec.encode(value)
+        if len(encoded) < PART_MIN_BYTES:
+            _put_part(data, part, value)
+        else:
+            parts[part] = encoded
+    return data, parts
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """
+    Écrit un fichier via un fichier temporaire et un renommage atomique :
+    un lecteur voit l'ancienne ou la nouvelle version, jamais un fichier tronqué.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        # mkstemp crée les fichiers en 0600
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class DealConflictError(Exception):
+    """Le deal a été modifié par une autre session depuis son chargement."""
+
+
+class Change(NamedTuple):
+    """Entrée du flux de changements."""
+    version: int
+    deal_id: str
+    op: str  # "save" ou "delete"
+
+
+class StorageBackend:
+    """Interface commune des backends de persistence."""
+
+    # True si le backend sait filtrer/compter sans charger les deals
+    supports_queries = False
+
+    # Le flux de changements garde au moins les CHANGES_KEEP derniers changements
+    # (au plus le double) : un lecteur plus en retard recharge tout
+    CHANGES_KEEP = 10_000
+    
+    @property
+    def cache_key(self) -> str:
+        """Identifie les données persistées (clé du cache partagé)."""
+        raise NotImplementedError
+
+    def load_all(self) -> Iterator[Deal]:
+        """Itère sur tous les deals persistés."""
+        raise NotImplementedError
+
+    def load(self, deal_id: str) -> Optional[Deal]:
+        """Charge un deal par son ID."""
+        raise NotImplementedError
+
+    def load_summaries(self, manifest: Dict[str, Dict]) -> Tuple[List[DealSummary], List[str]]:
+        """
+        En-têtes des deals modifiés depuis l'état décrit par `manifest`
+        (deal_id -> empreinte), mis à jour sur place.
+        Retourne (en-têtes modifiés ou nouveaux, IDs supprimés).
+        Par défaut tous les deals sont relus entièrement.
+        """
+        summaries = [DealSummary.from_deal(deal) for deal in self.load_all()]
+        loaded_ids = {summary.id for summary in summaries}
+        removed = [deal_id for deal_id in manifest if deal_id not in loaded_ids]
+        manifest.clear()
+        manifest.update({deal_id: {} for deal_id in loaded_ids})
+        return summaries, removed
+
+    def save(self, deal: Deal) -> int:
+        """
+        Persiste un deal (création ou mise à jour) et retourne la nouvelle
+        version de stockage, affectée à deal.version.
+        Lève DealConflictError si le deal persisté a une autre version que deal.version.
+        """
+        raise NotImplementedError
+
+    def save_many(self, deals: List[Deal]) -> int:
+        """
+        Persiste plusieurs deals en un lot (import en masse, sans contrôle de
+        version). Retourne la dernière version.
+        """
+        raise NotImplementedError
+
+    def delete(self, deal_id: str) -> int:
+        """Supprime un deal et retourne la nouvelle version de stockage."""
+        raise NotImplementedError
+
+    def current_version(self) -> int:
+        """Version de stockage courante (appel peu coûteux, pour le polling)."""
+        raise NotImplementedError
+
+    def changes_since(self, version: int) -> Optional[List[Change]]:
+        """
+        Changements postérieurs à une version, du plus ancien au plus récent.
+        None si le flux ne remonte plus jusqu'à cette version (tronqué) :
+        l'appelant doit alors tout recharger.
+        """
+        raise NotImplementedError
+
+    def select_ids(self, query: DealQuery) -> List[str]:
+        """IDs des deals satisfaisant une requête, triés et limités."""
+        raise NotImplementedError
+
+
+class JsonFileBackend(StorageBackend):
+    """
+    Un fichier par deal, encodé par le codec choisi (JSON par défaut, ou
+    msgpack) ; le format de chaque fichier est reconnu à la lecture.
+    Les parties volumineuses sont dans parts/<deal_id>/, un fichier par partie
+    et par version, référencé par la clé "parts" du fichier du deal.
+    Le flux de changements est un journal texte (_changes.log), tronqué aux
+    derniers changements, et la version courante est dans _version, protégés
+    par un verrou fichier inter-processus.
+    Les en-têtes des deals et les empreintes de leurs fichiers sont conservés
+    dans _summaries : au démarrage, seuls les fichiers modifiés sont relus.
+    """
+
+    PARTS_DIR = "parts"
+    SUMMARIES_FILE = "_summaries"
+    VERSION_FILE = "_version"
+    CHANGES_FILE = "_changes.log"
+    LOCK_FILE = "_changes.lock"
+
+    # Lecture parallèle des fichiers au chargement à froid
+    LOAD_WORKERS = 8
+
+    def __init__(self, storage_dir: Path, max_workers: Optional[int] = None, codec: Optional[DealCodec] = None):
+        self.storage_dir = Path(storage_dir)
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers or self.LOAD_WORKERS
+        # Codec des écritures ; les lectures acceptent tous les formats
+        self.codec = codec or JSON_CODEC
+        self._thread_lock = threading.RLock()
+        # Position de lecture du flux : (inode, première version, dernière version lue, offset)
+        self._log_cursor: Tuple[int, Optional[int], int, int] = (0, None, 0, 0)
+
+    @property
+    def cache_key(self) -> str:
+        return f"json:{self.storage_dir.resolve()}"
+
+    def _path(self, deal_id: str) -> Path:
+        return self.storage_dir / f"{deal_id}{self.codec.extension}"
+
+    def _find(self, deal_id: str) -> Optional[Path]:
+        """Fichier existant d'un deal, quel que soit son format."""
+        for extension in (self.codec.extension, *DOCUMENT_EXTENSIONS):
+            path = self.storage_dir / f"{deal_id}{extension}"
+            if path.exists():
+                return path
+        return None
+
+    def _deal_paths(self) -> Dict[str, Path]:
+        """deal_id -> fichier, tous formats (celui du codec courant en priorité)."""
+        paths: Dict[str, Path] = {}
+        for extension in (self.codec.extension, *DOCUMENT_EXTENSIONS):
+            for path in self.storage_dir.glob(f"*{extension}"):
+                paths.setdefault(path.stem, path)
+        return paths
+
+    def _parts_dir(self, deal_id: str) -> Path:
+        return self.storage_dir / self.PARTS_DIR / deal_id
+
+    def _decode(self, raw: bytes) -> Deal:
+        """Décode le fichier d'un deal et y réinsère ses parties annexes."""
+        data = decode_document(raw)
+        refs = data.pop("parts", None)
+        if refs:
+            parts_dir = self._parts_dir(data["id"])
+            for part, filename in refs.items():
+                _put_part(data, part, decode_document((parts_dir / filename).read_bytes()))
+        return Deal.from_dict(data)
+
+    @contextmanager
+    def _locked(self):
+        """Verrou exclusif entre threads et entre processus."""
+        with self._thread_lock:
+            if not HAS_FCNTL:
+                yield
+                return
+            with open(self.storage_dir / self.LOCK_FILE, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _record_change(self, deal_id: str, op: str) -> int:
+        """Incrémente la version et journalise le changement (sous verrou)."""
+        return self._record_changes([deal_id], op)
+
+    def _record_changes(self, deal_ids: List[str], op: str) -> int:
+        """Journalise des changements consécutifs (sous verrou). Retourne la dernière version."""
+        version = self.current_version()
+        lines = []
+        for deal_id in deal_ids:
+            version += 1
+            lines.append(f"{version}\t{deal_id}\t{op}\n")
+        with open(self.storage_dir / self.CHANGES_FILE, 'a', encoding='utf-8') as f:
+            f.write("".join(lines))
+        atomic_write_bytes(self.storage_dir / self.VERSION_FILE, str(version).encode())
+        if version // self.CHANGES_KEEP > (version - len(deal_ids)) // self.CHANGES_KEEP:
+            self._truncate_changes(version - self.CHANGES_KEEP)
+        return version
+
+    def _truncate_changes(self, up_to: int) -> None:
+        """Retire du flux les changements de version <= up_to (sous verrou)."""
+        changes_path = self.storage_dir / self.CHANGES_FILE
+        with open(changes_path, 'rb') as f:
+            kept = [line for line in f if int(line.split(b"\t", 1)[0]) > up_to]
+        # Nouveau fichier (nouvel inode) : les lecteurs repartent de son début
+        atomic_write_bytes(changes_path, b"".join(kept))
+
+    def load_all(self) -> Iterator[Deal]:
+        """Lit les fichiers un à un : un seul deal décodé en mémoire à la fois."""
+        for filepath in self._deal_paths().values():
+            try:
+                yield self._decode(filepath.read_bytes())
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logger.error(f"Error loading deal from {filepath}: {e}")
+
+    def load(self, deal_id: str) -> Optional[Deal]:
+        filepath = self._find(deal_id)
+        if filepath is None:
+            return None
+        return self._decode(filepath.read_bytes())
+
+    def _read_summary(self, filepath: Path, known: Optional[Dict]) -> Optional[Dict]:
+        """
+        Empreinte et en-tête d'un fichier, relu seulement si son empreinte
+        diffère de `known` (retourné tel quel sinon). None si le fichier a disparu.
+        """
+        try:
+            stat = filepath.stat()
+            if known and known.get("mtime_ns") == stat.st_mtime_ns and known.get("size") == stat.st_size:
+                return known
+            data = filepath.read_bytes()
+            entry = {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha256": hashlib.sha256(data).hexdigest(),
+            }
+            if known and known.get("sha256") == entry["sha256"]:
+                entry["summary"] = known["summary"]
+            else:
+                # Le cœur du fichier suffit : les parties annexes ne sont pas lues
+                entry["summary"] = DealSummary.from_deal_dict(decode_document(data))
+            return entry
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Error loading deal summary from {filepath}: {e}")
+            return known
+
+    def _load_summaries_file(self) -> Dict[str, Dict]:
+        """Manifeste persisté : deal_id -> empreinte et en-tête."""
+        path = self.storage_dir / self.SUMMARIES_FILE
+        if not path.exists():
+            return {}
+        try:
+            entries = _loads(path.read_bytes())
+            for entry in entries.values():
+                entry["summary"] = DealSummary.from_dict(entry["summary"])
+            return entries
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable summary manifest {path}: {e}")
+            return {}
+
+    def _save_summaries_file(self, manifest: Dict[str, Dict]) -> None:
+        entries = {
+            deal_id: {**entry, "summary": entry["summary"].to_dict()}
+            for deal_id, entry in manifest.items()
+        }
+        atomic_write_bytes(self.storage_dir / self.SUMMARIES_FILE, _dumps(entries))
+
+    def load_summaries(self, manifest: Dict[str, Dict]) -> Tuple[List[DealSummary], List[str]]:
+        paths = self._deal_paths()
+        removed = [deal_id for deal_id in manifest if deal_id not in paths]
+        for deal_id in removed:
+            del manifest[deal_id]
+        # Chargement à froid : partir du manifeste persisté
+        stored = {} if manifest else self._load_summaries_file()
+
+        def read(item: Tuple[str, Path]):
+            known = manifest.get(item[0]) or stored.get(item[0])
+            return item[0], known, self._read_summary(item[1], known)
+
+        items = list(paths.items())
+        workers = self.max_workers if not manifest and not stored and len(items) > 1 else 1
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(read, items))
+        else:
+            results = [read(item) for item in items]
+
+        summaries = []
+        changed = bool(removed) or any(deal_id not in paths for deal_id in stored)
+        for deal_id, known, entry in results:
+            if entry is not known:
+                changed = True
+            if entry is None:
+                manifest.pop(deal_id, None)
+                continue
+            if manifest.get(deal_id) is not entry:
+                summaries.append(entry["summary"])
+            manifest[deal_id] = entry
+        if changed:
+            try:
+                self._save_summaries_file(manifest)
+            except Exception as e:
+                logger.warning(f"Could not write summary manifest: {e}")
+        return summaries, removed
+
+    def save(self, deal: Deal) -> int:
+        with self._locked():
+            existing = self._find(deal.id)
+            stored = decode_document(existing.read_bytes()) if existing is not None else {}
+            if existing is not None and stored.get("version", 0) != deal.version:
+                raise DealConflictError(
+                    f"Deal {deal.id} modifié ailleurs (version {stored.get('version', 0)}, chargée {deal.version})"
+                )
+            self._write(deal, self.current_version() + 1, existing, stored.get("parts") or {})
+            # Journalisé après l'écriture : le flux ne référence que des fichiers complets
+            return self._record_change(deal.id, "save")
+
+    def save_many(self, deals: List[Deal]) -> int:
+        with self._locked():
+            version = self.current_version()
+            written = []
+            try:
+                for deal in deals:
+                    existing = self._find(deal.id)
+                    stored = decode_document(existing.read_bytes()) if existing is not None else {}
+                    self._write(deal, version + len(written) + 1, existing, stored.get("parts") or {})
+                    written.append(deal.id)
+            finally:
+                # Une seule écriture du journal et de la version pour le lot
+                if written:
+                    version = self._record_changes(written, "save")
+            return version
+
+    def _write(self, deal: Deal, version: int, existing: Optional[Path], stored_refs: Dict[str, str]) -> None:
+        """Écrit le fichier d'un deal et ses parties modifiées avec la version donnée (sous verrou)."""
+        filepath = self._path(deal.id)
+        previous = deal.version
+        deal.version = version
+        try:
+            data, parts = split_deal(deal, set(stored_refs), self.codec)
+            refs = {}
+            parts_dir = self._parts_dir(deal.id)
+            for part, encoded in parts.items():
+                if encoded is None:
+                    refs[part] = stored_refs[part]
+                    continue
+                # Nom versionné : le fichier du deal ne référence que des parties complètes
+                refs[part] = f"{part.replace(':', '-')}.v{deal.version}{self.codec.extension}"
+                parts_dir.mkdir(parents=True, exist_ok=True)
+                atomic_write_bytes(parts_dir / refs[part], encoded)
+            if refs:
+                data["parts"] = refs
+            atomic_write_bytes(filepath, self.codec.encode(data))
+        except Exception:
+            deal.version = previous
+            raise
+        deal.clear_dirty()
+        # Deal précédemment écrit dans un autre format
+        if existing is not None and existing != filepath:
+            existing.unlink()
+
+        # Supprimer les parties remplacées
+        if parts_dir.exists():
+            live = set(refs.values())
+            for path in parts_dir.iterdir():
+                if path.name not in live and not path.name.startswith("."):
+                    path.unlink()
+
+    def delete(self, deal_id: str) -> int:
+        with self._locked():
+            for extension in DOCUMENT_EXTENSIONS:
+                filepath = self.storage_dir / f"{deal_id}{extension}"
+                if filepath.exists():
+                    filepath.unlink()
+            shutil.rmtree(self._parts_dir(deal_id), ignore_errors=True)
+            return self._record_change(deal_id, "delete")
+
+    def current_version(self) -> int:
+        try:
+            return int((self.storage_dir / self.VERSION_FILE).read_text(encoding='utf-8') or 0)
+        except FileNotFoundError:
+            return 0
+
+    def changes_since(self, version: int) -> Optional[List[Change]]:
+        changes_path = self.storage_dir / self.CHANGES_FILE
+        with self._thread_lock:
+            try:
+                f = open(changes_path, 'r', encoding='utf-8')
+            except FileNotFoundError:
+                return [] if self.current_version() <= version else None
+            with f:
+                inode, first_version, cursor_version, offset = self._log_cursor
+                current_inode = os.fstat(f.fileno()).st_ino
+                if current_inode != inode or version < cursor_version:
+                    # Flux tronqué depuis la dernière lecture, ou lecteur plus ancien
+                    inode, first_version, cursor_version, offset = current_inode, None, 0, 0
+                changes = []
+                f.seek(offset)
+                while True:
+                    line = f.readline()
+                    if not line.endswith("\n"):
+                        # Ligne en cours d'écriture : relue au prochain appel
+                        break
+                    offset = f.tell()
+                    entry_version, deal_id, op = line.rstrip("\n").split("\t")
+                    change = Change(int(entry_version), deal_id, op)
+                    if first_version is None:
+                        first_version = change.version
+                    cursor_version = change.version
+                    if change.version > version:
+                        changes.append(change)
+            self._log_cursor = (inode, first_version, cursor_version, offset)
+            if first_version is not None and version < first_version - 1:
+                return None
+            return changes
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Base SQLite en mode WAL.
+    Les colonnes indexées sont dénormalisées depuis le deal à chaque sauvegarde,
+    l'en-tête (DealSummary) est stocké en JSON dans la colonne `summary`,
+    le document dans la colonne `document` et les parties volumineuses dans
+    la table `deal_parts` : texte JSON, ou BLOB avec le codec msgpack.
+    """
+
+    supports_queries = True
+
+    # Clé de tri -> expression SQL
+    SORT_COLUMNS = {
+        "updated_at": "updated_at",
+        "created_at": "created_at",
+        "company_name": "py_lower(company_name)",
+    }
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS deals (
+            id TEXT PRIMARY KEY,
+            company_name TEXT NOT NULL,
+            country TEXT,
+            sector TEXT,
+            subsector TEXT,
+            current_stage TEXT NOT NULL,
+            current_status TEXT,
+            risk_category TEXT,
+            two_x_eligible INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT,
+            updated_at TEXT,
+            version INTEGER NOT NULL DEFAULT 0,
+            summary TEXT,
+            document TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS deal_parts (
+            deal_id TEXT NOT NULL,
+            part TEXT NOT NULL,
+            content TEXT NOT NULL,
+            PRIMARY KEY (deal_id, part)
+        );
+        CREATE TABLE IF NOT EXISTS changes (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            deal_id TEXT NOT NULL,
+            op TEXT NOT NULL,
+            changed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS idx_deals_stage_status ON deals(current_stage, current_status);
+        CREATE INDEX IF NOT EXISTS idx_deals_country ON deals(country);
+        CREATE INDEX IF NOT EXISTS idx_deals_sector ON deals(sector);
+        CREATE INDEX IF NOT EXISTS idx_deals_risk ON deals(risk_category);
+        CREATE INDEX IF NOT EXISTS idx_deals_two_x ON deals(two_x_eligible);
+        CREATE INDEX IF NOT EXISTS idx_deals_updated ON deals(updated_at);
+    """
+
+    def __init__(self, db_path: Path, codec: Optional[DealCodec] = None):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Codec des écritures ; les lectures acceptent tous les formats
+        self.codec = codec or JSON_CODEC
+        # Streamlit sert chaque session dans son thread : une connexion par thread
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+            # Bases créées avant le contrôle de version
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(deals)")}
+            if "version" not in columns:
+                conn.execute("ALTER TABLE deals ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            # Bases créées avant les en-têtes : calculés depuis les documents
+            if "summary" not in columns:
+                conn.execute("ALTER TABLE deals ADD COLUMN summary TEXT")
+                rows = conn.execute("SELECT id, document FROM deals").fetchall()
+                conn.executemany(
+                    "UPDATE deals SET summary = ? WHERE id = ?",
+                    [(self._encode_summary(DealSummary.from_deal_dict(self._from_column(document))), deal_id)
+                     for deal_id, document in rows]
+                )
+
+    @property
+    def cache_key(self) -> str:
+        return f"sqlite:{self.db_path.resolve()}"
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # lower() de SQLite ignore les accents : utiliser celui de Python
+            conn.create_function("py_lower", 1, lambda value: value.lower() if value else value, deterministic=True)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _encode_summary(summary: DealSummary) -> str:
+        return _dumps(summary.to_dict()).decode('utf-8')
+
+    def _to_column(self, data: Any):
+        """Encode une valeur pour les colonnes document/content (texte pour JSON)."""
+        encoded = data if isinstance(data, bytes) else self.codec.encode(data)
+        return encoded.decode('utf-8') if self.codec.name == "json" else encoded
+
+    @staticmethod
+    def _from_column(value) -> Any:
+        """Décode une colonne document/content (texte JSON ou BLOB)."""
+        return decode_document(value.encode('utf-8') if isinstance(value, str) else value)
+
+    def _row(self, deal: Deal, document: Dict) -> tuple:
+        stage_data = deal.get_current_stage_data()
+        return (
+            deal.id,
+            deal.company_name,
+            deal.country,
+            deal.sector,
+            deal.subsector,
+            deal.current_stage.value,
+            stage_data.status.value if stage_data else None,
+            deal.risk_category,
+            int(deal.two_x_eligible),
+            deal.created_at.isoformat(),
+            deal.updated_at.isoformat(),
+            deal.version,
+            self._encode_summary(DealSummary.from_deal(deal)),
+            self._to_column(document),
+        )
+
+    @classmethod
+    def _decode(cls, document, parts: Dict[str, Any]) -> Deal:
+        """Décode le document d'un deal et y réinsère ses parties."""
+        data = cls._from_column(document)
+        for part, content in parts.items():
+            _put_part(data, part, cls._from_column(content))
+        return Deal.from_dict(data)
+
+    def _load_parts(self, deal_ids: Optional[List[str]] = None) -> Dict[str, Dict[str, str]]:
+        """Parties des deals donnés (de tous les deals si deal_ids est None)."""
+        if deal_ids is None:
+            rows = self._connect().execute("SELECT deal_id, part, content FROM deal_parts")
+        else:
+            placeholders = ",".join("?" * len(deal_ids))
+            rows = self._connect().execute(
+                f"SELECT deal_id, part, content FROM deal_parts WHERE deal_id IN ({placeholders})", deal_ids
+            )
+        parts: Dict[str, Dict[str, str]] = {}
+        for deal_id, part, content in rows:
+            parts.setdefault(deal_id, {})[part] = content
+        return parts
+
+    def load_all(self) -> Iterator[Deal]:
+        parts = self._load_parts()
+        for deal_id, document in self._connect().execute("SELECT id, document FROM deals"):
+            try:
+                yield self._decode(document, parts.get(deal_id, {}))
+            except Exception as e:
+                logger.error(f"Error loading deal {deal_id} from SQLite: {e}")
+
+    def load(self, deal_id: str) -> Optional[Deal]:
+        row = self._connect().execute("SELECT document FROM deals WHERE id = ?", (deal_id,)).fetchone()
+        if not row:
+            return None
+        return self._decode(row[0], self._load_parts([deal_id]).get(deal_id, {}))
+
+    def load_summaries(self, manifest: Dict[str, Dict]) -> Tuple[List[DealSummary], List[str]]:
+        conn = self._connect()
+        versions = dict(conn.execute("SELECT id, version FROM deals"))
+        removed = [deal_id for deal_id in manifest if deal_id not in versions]
+        for deal_id in removed:
+            del manifest[deal_id]
+        changed = [
+            deal_id for deal_id, version in versions.items()
+            if manifest.get(deal_id, {}).get("version") != version
+        ]
+        summaries = []
+        for start in range(0, len(changed), 500):
+            batch = changed[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            for deal_id, version, summary in conn.execute(
+                f"SELECT id, version, summary FROM deals WHERE id IN ({placeholders})", batch
+            ):
+                try:
+                    summaries.append(DealSummary.from_dict(_loads(summary)))
+                    manifest[deal_id] = {"version": version}
+                except Exception as e:
+                    logger.error(f"Error loading deal summary {deal_id} from SQLite: {e}")
+        return summaries, removed
+
+    def _record_change(self, conn: sqlite3.Connection, deal_id: str, op: str) -> int:
+        version = conn.execute("INSERT INTO changes (deal_id, op) VALUES (?, ?)", (deal_id, op)).lastrowid
+        if version % self.CHANGES_KEEP == 0:
+            # AUTOINCREMENT : les versions supprimées ne sont jamais réattribuées
+            conn.execute("DELETE FROM changes WHERE version <= ?", (version - self.CHANGES_KEEP,))
+        return version
+
+    def save(self, deal: Deal) -> int:
+        conn = self._connect()
+        with conn:
+            # BEGIN IMMEDIATE : vérification de version et écriture atomiques
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT version FROM deals WHERE id = ?", (deal.id,)).fetchone()
+            if row and row[0] != deal.version:
+                raise DealConflictError(
+                    f"Deal {deal.id} modifié ailleurs (version {row[0]}, chargée {deal.version})"
+                )
+            previous = deal.version
+            deal.version = self._record_change(conn, deal.id, "save")
+            try:
+                self._upsert(conn, [deal])
+            except Exception:
+                deal.version = previous
+                raise
+        deal.clear_dirty()
+        return deal.version
+
+    def save_many(self, deals: List[Deal]) -> int:
+        """
+        Persiste plusieurs deals dans une seule transaction (import en masse,
+        sans contrôle de version). Retourne la dernière version.
+        """
+        conn = self._connect()
+        version = self.current_version()
+        with conn:
+            for deal in deals:
+                deal.version = version = self._record_change(conn, deal.id, "save")
+            self._upsert(conn, deals)
+        for deal in deals:
+            deal.clear_dirty()
+        return version
+
+    def _upsert(self, conn: sqlite3.Connection, deals: List[Deal]) -> None:
+        """Écrit les deals ; seules les parties modifiées sont réécrites."""
+        rows = []
+        for deal in deals:
+            stored_parts = {
+                row[0] for row in conn.execute("SELECT part FROM deal_parts WHERE deal_id = ?", (deal.id,))
+            }
+            document, parts = split_deal(deal, stored_parts, self.codec)
+            conn.executemany(
+                "INSERT OR REPLACE INTO deal_parts (deal_id, part, content) VALUES (?, ?, ?)",
+                [(deal.id, part, self._to_column(encoded)) for part, encoded in parts.items() if encoded is not None]
+            )
+            conn.executemany(
+                "DELETE FROM deal_parts WHERE deal_id = ? AND part = ?",
+                [(deal.id, part) for part in stored_parts - set(parts)]
+            )
+            rows.append(self._row(deal, document))
+        conn.executemany(
+            """
+            INSERT INTO deals (id, company_name, country, sector, subsector, current_stage,
+                               current_status, risk_category, two_x_eligible, created_at,
+                               updated_at, version, summary, document)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                company_name = excluded.company_name,
+                country = excluded.country,
+                sector = excluded.sector,
+                subsector = excluded.subsector,
+                current_stage = excluded.current_stage,
+                current_status = excluded.current_status,
+                risk_category = excluded.risk_category,
+                two_x_eligible = excluded.two_x_eligible,
+                created_at = excluded.created_at,
+                updated_at = excluded.updated_at,
+                version = excluded.version,
+                summary = excluded.summary,
+                document = excluded.document
+            """,
+            rows
+        )
+
+    def delete(self, deal_id: str) -> int:
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM deals WHERE id = ?", (deal_id,))
+            conn.execute("DELETE FROM deal_parts WHERE deal_id = ?", (deal_id,))
+            return self._record_change(conn, deal_id, "delete")
+
+    def current_version(self) -> int:
+        row = self._connect().execute("SELECT MAX(version) FROM changes").fetchone()
+        return row[0] or 0
+
+    def changes_since(self, version: int) -> Optional[List[Change]]:
+        conn = self._connect()
+        first_version = conn.execute("SELECT MIN(version) FROM changes").fetchone()[0]
+        if first_version is not None and version < first_version - 1:
+            return None
+        rows = conn.execute(
+            "SELECT version, deal_id, op FROM changes WHERE version > ? ORDER BY version", (version,)
+        )
+        return [Change(*row) for row in rows]
+
+    def is_empty(self) -> bool:
+        return self._connect().execute("SELECT 1 FROM deals LIMIT 1").fetchone() is None
+
+    def select_ids(self, query: DealQuery) -> List[str]:
+        """
+        Traduit la requête en SQL : filtres sur les colonnes indexées,
+        analyste et tags lus dans l'en-tête JSON, tri et limite.
+        """
+        if query.sort not in self.SORT_COLUMNS:
+            raise ValueError(f"Clé de tri inconnue : {query.sort}")
+        clauses, params = [], []
+        equals = {
+            "current_stage": query.stage.value if query.stage else None,
+            "current_status": query.status.value if query.status else None,
+            "country": query.country,
+            "sector": query.sector,
+            "risk_category": query.risk_category,
+            "two_x_eligible": None if query.two_x_eligible is None else int(query.two_x_eligible),
+            "json_extract(summary, '$.analyst')": query.analyst,
+        }
+        for column, value in equals.items():
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        bounds = (
+            ("created_at >= ?", query.created_after),
+            ("created_at <= ?", query.created_before),
+            ("updated_at >= ?", query.updated_after),
+            ("updated_at <= ?", query.updated_before),
+        )
+        for clause, value in bounds:
+            if value is not None:
+                clauses.append(clause)
+                params.append(value.isoformat())
+        for tag in query.tags:
+            clauses.append("EXISTS (SELECT 1 FROM json_each(summary, '$.tags') WHERE value = ?)")
+            params.append(tag)
+
+        sql = "SELECT id FROM deals"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        direction = "DESC" if query.descending else "ASC"
+        sql += f" ORDER BY {self.SORT_COLUMNS[query.sort]} {direction}, id {direction}"
+        if query.limit is not None:
+            sql += " LIMIT ?"
+            params.append(query.limit)
+        return [row[0] for row in self._connect().execute(sql, params)]
+
+
+def create_backend(name: str, storage_dir: Path, db_path: Path, codec: Optional[DealCodec] = None) -> StorageBackend:
+    """
+    Instancie un backend par son nom ("json" ou "sqlite") et le codec de ses
+    écritures (JSON par défaut).
+    Au premier lancement en SQLite, les deals JSON existants sont importés.
+    """
+    if name == "json":
+        return JsonFileBackend(storage_dir, codec=codec)
+    if name == "sqlite":
+        backend = SQLiteBackend(db_path, codec=codec)
+        if backend.is_empty() and Path(storage_dir).exists():
+            deals = list(JsonFileBackend(storage_dir).load_all())
+            if deals:
+                backend.save_many(deals)
+                logger.info(f"Imported {len(deals)} JSON deals into {db_path}")
+        return backend
+    raise ValueError(f"Backend de stockage inconnu : {name}")
@@ -0,0 +1,95 @@
+"""
+Fixtures partagées : petits PDFs de guidelines IFC-EHS générés à la volée,
+stockages de deals isolés par test.
+"""
+import pytest
+
+from services.deal_archive import DealArchive
+from services.deal_storage import DealStorage, _get_shared_cache
+
+# Guidelines de test : fichier -> pages (lignes séparées par \n)
+GUIDELINES = {
+    "2007-mining-ehs-guidelines-en.pdf": [
+        "1. Introduction\nThe mining guidelines apply to mining operations.\nDust control on haul roads.",
+        "1.1 Environment\nWastewater effluent limits apply to tailings ponds.\nMonitor effluent quality monthly.",
+    ],
+    "2007-textiles-manufacturing-ehs-guidelines-en.pdf": [
+        "1. Industry-Specific Impacts\nTextiles manufacturing uses dyes and chemicals.\nWastewater from dyeing needs treatment.",
+        "2.1 Occupational Health\nNoise exposure of workers near looms must be limited.",
+    ],
+    "2007-health-care-facilities-ehs-guidelines-en.pdf": [
+        "1.0 Environmental\nHealth care waste includes infectious and hazardous waste.\nHazardous waste storage must be secured.",
+    ],
+}
+
+
+def make_pdf(pages) -> bytes:
+    """PDF minimal (une police Type1, un flux de texte par page), lisible par PyPDF2."""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for text in pages:
+        stream = "BT /F1 10 Tf 20 800 Td 12 TL " + " ".join(f"({line}) Tj T*" for line in text.split("\n")) + " ET"
+        page_ids.append(len(objects) + 1)
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 600 850] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects) + 2} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>"
+
+    body = "%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(body))
+        body += f"{number} 0 obj\n{obj}\nendobj\n"
+    xref = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    body += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    body += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return body.encode("latin-1")
+
+
+@pytest.fixture
+def ehs_dir(tmp_path):
+    """Répertoire de guidelines EHS de test."""
+    directory = tmp_path / "ifc-ehs"
+    directory.mkdir()
+    for filename, pages in GUIDELINES.items():
+        (directory / filename).write_bytes(make_pdf(pages))
+    return directory
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    _get_shared_cache.clear()
+    yield
+    _get_shared_cache.clear()
+
+
+@pytest.fixture
+def open_storage(tmp_path):
+    """
+    Ouvre un DealStorage sur un backend, en écriture synchrone, différée ou
+    journalisée. Les écritures en attente sont faites en fin de test.
+    """
+    opened = []
+
+    def open_(backend, mode: str = "sync") -> DealStorage:
+        storage = DealStorage(
+            backend=backend,
+            write_delay=3600 if mode == "write_behind" else 0,
+            journal_path=tmp_path / "deals.journal" if mode == "journal" else None,
+            archive=DealArchive(tmp_path / "archive"),
+        )
+        opened.append(storage)
+        return storage
+
+    yield open_
+    for storage in opened:
+        if storage._cache.journal is not None:
+            storage._cache.journal.close()
+        storage.flush()
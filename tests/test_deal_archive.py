@@ -0,0 +1,64 @@
+"""
+Tests de l'archive froide des deals clos : archivage, recherche et restauration.
+"""
+from datetime import datetime
+
+import pytest
+
+from models.deal import DealStage, DealStatus
+from services.deal_archive import DealArchive
+from services.deal_storage import DealStorage
+from tests.test_deal_storage import BACKENDS, MODES, make_deal, new_backend
+
+
+def closed_deal(i: int, updated_at: datetime):
+    deal = make_deal(i, updated_at)
+    deal.stage_history["screening"].status = DealStatus.REJECTED
+    deal.current_stage = DealStage.REJECTED
+    deal.description = f"Élevage avicole {i}"
+    return deal
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+@pytest.mark.parametrize("mode", MODES)
+def test_archive_search_and_restore_use_the_injected_archive(kind, mode, tmp_path, open_storage, monkeypatch):
+    # Répertoire courant isolé : l'archive par défaut (data/archive) y serait créée
+    monkeypatch.chdir(tmp_path)
+    backend = new_backend(kind, tmp_path)
+    old, recent = closed_deal(1, datetime(2020, 1, 1)), closed_deal(2, datetime.now())
+    active = make_deal(3, datetime(2020, 1, 1))
+    active.description = "Élevage avicole 3"
+    backend.save_many([old, recent, active])
+    storage = open_storage(backend, mode)
+    archive_dir = tmp_path / "archive"
+    assert len(storage.archive) == 0 and storage.archive.archive_dir == archive_dir
+
+    assert storage.archive_inactive(days=30) == 1
+    assert sorted(path.name for path in archive_dir.glob("*.gz")) == ["D0001.json.gz", "_index.json.gz"]
+    assert not (tmp_path / "data").exists()
+    assert backend.load("D0001") is None and storage.get_summary("D0001") is None
+    assert [summary.id for summary in storage.get_archived_summaries()] == ["D0001"]
+    archived = storage.get_archived("D0001")
+    assert archived.to_dict() == {**old.to_dict(), "version": archived.version}
+
+    # Recherche : deals courants seulement, ou archivés compris (relus depuis l'archive)
+    assert sorted(deal.id for deal in storage.search("avicole")) == ["D0002", "D0003"]
+    assert sorted(deal.id for deal in storage.search("avicole", include_archived=True)) == ["D0001", "D0002", "D0003"]
+
+    restored = storage.restore("D0001")
+    assert restored is not None and restored.description == "Élevage avicole 1"
+    storage.flush()
+    assert backend.load("D0001").description == "Élevage avicole 1"
+    assert storage.get_summary("D0001") is not None
+    assert len(storage.archive) == 0
+    assert sorted(path.name for path in archive_dir.glob("*.gz")) == ["_index.json.gz"]
+    assert not (tmp_path / "data").exists()
+
+
+def test_default_archive_only_when_none_is_injected(tmp_path, monkeypatch):
+    monkeypatch.setattr(DealStorage, "ARCHIVE_DIR", tmp_path / "default")
+    empty = DealArchive(tmp_path / "injected", compression="lzma")
+    assert not empty
+
+    assert DealStorage(backend=new_backend("json", tmp_path), archive=empty).archive is empty
+    assert DealStorage(backend=new_backend("json", tmp_path)).archive.archive_dir == tmp_path / "default"
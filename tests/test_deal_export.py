@@ -0,0 +1,64 @@
+"""
+Tests de l'export NDJSON du portfolio et de son import par lots.
+"""
+import pytest
+
+from services.deal_storage import DealStorage
+from tests.test_deal_storage import make_deal, new_backend
+from tests.test_storage_backends import full_deal
+
+
+def without_version(deal):
+    data = deal.to_dict()
+    data.pop("version")
+    return data
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_export_then_import_round_trips_the_portfolio(workers, tmp_path, open_storage):
+    source = open_storage(new_backend("json", tmp_path / "source"))
+    deals = [full_deal(0)] + [make_deal(i) for i in range(1, 6)]
+    source.backend.save_many(deals)
+    source.refresh()
+    path = tmp_path / "portfolio.ndjson"
+    assert source.export_portfolio(path) == 6
+    assert len(path.read_bytes().splitlines()) == 6
+
+    target_backend = new_backend("sqlite", tmp_path / "target")
+    kept = make_deal(9)
+    replaced = make_deal(1)
+    replaced.description = "Version antérieure, remplacée par l'import"
+    target_backend.save_many([kept, replaced])
+    target = open_storage(target_backend)
+
+    assert target.import_portfolio(path, workers=workers) == 6
+
+    assert sorted(summary.id for summary in target.get_summaries()) == [f"D{i:04d}" for i in (0, 1, 2, 3, 4, 5, 9)]
+    for deal in deals:
+        assert without_version(target.get(deal.id)) == without_version(deal)
+    assert target.get("D0009").description == kept.description
+
+
+def test_zip_export_carries_uploaded_documents(tmp_path, open_storage, monkeypatch):
+    document = tmp_path / "business-plan.pdf"
+    document.write_bytes(b"%PDF-1.4 plan")
+    deal = make_deal(1)
+    deal.uploaded_documents = [{"name": "Business plan", "path": str(document)}]
+    source = open_storage(new_backend("json", tmp_path / "source"))
+    source.backend.save(deal)
+    source.refresh()
+    path = tmp_path / "portfolio.zip"
+    assert source.export_portfolio(path, include_documents=True) == 1
+
+    with pytest.raises(ValueError):
+        source.export_portfolio(tmp_path / "portfolio.ndjson", include_documents=True)
+
+    monkeypatch.setattr(DealStorage, "DOCUMENTS_DIR", tmp_path / "documents")
+    target = open_storage(new_backend("json", tmp_path / "target"))
+    assert target.import_portfolio(path) == 1
+
+    [restored] = target.get("D0001").uploaded_documents
+    assert restored["name"] == "Business plan"
+    assert restored["path"].startswith(str(tmp_path / "documents" / "D0001"))
+    with open(restored["path"], "rb") as f:
+        assert f.read() == b"%PDF-1.4 plan"
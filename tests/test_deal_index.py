@@ -0,0 +1,127 @@
+"""
+Tests des index secondaires, des statistiques maintenues par deltas et de
+la pagination par curseur.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.deal import DealStage, DealStatus, ESAPItem
+from services.deal_index import INDEX_KEYS
+from services.deal_query import DealQuery
+from tests.test_deal_storage import BACKENDS, MODES, make_deal, new_backend
+
+COUNTRIES = ["Sénégal", "Mali", "Bénin"]
+SECTORS = ["Agribusiness", "Santé"]
+
+
+def seed(backend, count: int = 9):
+    deals = []
+    for i in range(count):
+        deal = make_deal(i)
+        deal.country = COUNTRIES[i % 3]
+        deal.sector = SECTORS[i % 2]
+        deal.two_x_eligible = i % 4 == 0
+        deals.append(deal)
+    backend.save_many(deals)
+
+
+def assert_indexes_match_scan(storage):
+    """Chaque entrée d'index désigne exactement les deals qu'un parcours complet trouve."""
+    index, summaries = storage._cache.index, storage._cache.summaries.values()
+    for name, key_of in INDEX_KEYS.items():
+        keys = {key_of(summary) for summary in summaries}
+        assert set(index.counts(name)) == keys
+        for key in keys:
+            assert sorted(index.ids(name, key)) == sorted(s.id for s in summaries if key_of(s) == key)
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_indexes_follow_saves_and_deletes(kind, tmp_path, open_storage):
+    backend = new_backend(kind, tmp_path)
+    seed(backend)
+    storage = open_storage(backend)
+    assert_indexes_match_scan(storage)
+
+    deal = storage.get("D0001")
+    deal.stage_history["screening"].status = DealStatus.APPROVED
+    deal.advance_stage(DealStage.DUE_DILIGENCE, analyst="Awa")
+    deal.country = "Togo"
+    assert storage.save(deal)
+    rejected = storage.get("D0002")
+    rejected.reject("Hors thèse")
+    assert storage.save(rejected)
+    assert storage.delete("D0003")
+
+    assert [d.id for d in storage.get_by_stage(DealStage.DUE_DILIGENCE)] == ["D0001"]
+    assert [d.id for d in storage.get_by_status(DealStage.DUE_DILIGENCE, DealStatus.IN_PROGRESS)] == ["D0001"]
+    assert [d.id for d in storage.get_by_stage(DealStage.REJECTED)] == ["D0002"]
+    assert "D0002" not in {d.id for d in storage.get_active_deals()}
+    assert storage._cache.index.ids("country", "Togo") == ["D0001"]
+    assert "D0003" not in storage._cache.index.ids("sector", SECTORS[1])
+    assert_indexes_match_scan(storage)
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+@pytest.mark.parametrize("mode", MODES)
+def test_incremental_statistics_match_full_recount(kind, mode, tmp_path, open_storage):
+    backend = new_backend(kind, tmp_path)
+    seed(backend)
+    storage = open_storage(backend, mode)
+    assert storage.check_statistics()
+    assert storage.get_statistics()["active"] == 9
+
+    # Deal en monitoring : seul à compter dans l'avancement ESAP
+    deal = storage.get("D0004")
+    deal.current_stage = DealStage.MONITORING
+    deal.esap_items = [
+        ESAPItem(id=f"E{n}", category="HSE", action="SGES", responsible="DG",
+                 deadline=None, status="completed" if n < 2 else "in_progress", priority="high")
+        for n in range(3)
+    ]
+    assert storage.save(deal)
+    assert storage.check_statistics()
+
+    deal.update_esap_status("E2", "completed")
+    assert storage.save(deal)
+    rejected = storage.get("D0000")
+    rejected.reject("Hors thèse")
+    assert storage.save(rejected)
+    assert storage.check_statistics()
+
+    assert storage.delete("D0008")
+    assert storage.check_statistics()
+
+    stats = storage.get_statistics()
+    assert (stats["total"], stats["active"]) == (8, 7)
+    assert stats["by_stage"]["monitoring"] == 1 and stats["by_stage"]["rejected"] == 1
+    # 2X : D0004 seul (D0000 rejeté, D0008 supprimé)
+    assert stats["two_x_eligible"] == 1
+    assert (stats["esap_total"], stats["esap_completed"]) == (3, 3)
+    assert stats["by_country"] == {"Sénégal": 3, "Mali": 3, "Bénin": 2}
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+@pytest.mark.parametrize("sort", ["updated_at", "created_at", "company_name"])
+@pytest.mark.parametrize("descending", [True, False])
+def test_query_page_pages_are_disjoint_and_complete(kind, sort, descending, tmp_path, open_storage):
+    backend = new_backend(kind, tmp_path)
+    same_time = datetime(2026, 6, 1)
+    # Dates identiques deux à deux : l'ordre départage par id
+    backend.save_many([make_deal(i, same_time + timedelta(days=i // 2)) for i in range(23)])
+    storage = open_storage(backend)
+
+    query = DealQuery(sort=sort, descending=descending)
+    seen, cursor = [], None
+    while True:
+        page = storage.query_page(query, cursor=cursor, limit=5)
+        assert page.total == 23
+        seen.extend(summary.id for summary in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert len(seen) == len(set(seen)) == 23
+    assert seen == [summary.id for summary in storage.query(query)]
+    # Top-k : la première page des plus récents
+    assert [s.id for s in storage.get_recent_summaries(3)] == ["D0022", "D0021", "D0020"]
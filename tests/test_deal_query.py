@@ -0,0 +1,70 @@
+"""
+Tests des requêtes composites (DealQuery) : filtres, exécutés via les index
+en mémoire ou en SQL, et projection de champs.
+"""
+from datetime import datetime
+
+import pytest
+
+from models.deal import DealStage, DealStatus, ESAPItem, StageData
+from services.deal_query import DealQuery
+from tests.test_deal_storage import BACKENDS, make_deal, new_backend
+
+
+def seed(backend):
+    deals = []
+    for i in range(8):
+        deal = make_deal(i)
+        deal.country = "Mali" if i % 2 else "Sénégal"
+        deal.tags = ["prioritaire"] if i % 3 == 0 else []
+        if i >= 4:
+            deal.stage_history["screening"].status = DealStatus.APPROVED
+            deal.advance_stage(DealStage.DUE_DILIGENCE, analyst="Awa")
+        deals.append(deal)
+    monitored = deals[7]
+    monitored.current_stage = DealStage.MONITORING
+    monitored.stage_history["monitoring"] = StageData(
+        stage=DealStage.MONITORING, status=DealStatus.IN_PROGRESS, started_at=datetime(2026, 3, 1), analyst="Moussa"
+    )
+    monitored.esap_items = [
+        ESAPItem(id="E1", category="HSE", action="SGES", responsible="DG",
+                 deadline=datetime(2020, 1, 1), status="in_progress", priority="high")
+    ]
+    backend.save_many(deals)
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_filters_combine(kind, tmp_path, open_storage):
+    backend = new_backend(kind, tmp_path)
+    seed(backend)
+    storage = open_storage(backend)
+
+    ids = lambda query: [summary.id for summary in storage.query(query)]
+    assert ids(DealQuery(stage=DealStage.DUE_DILIGENCE, country="Sénégal", sort="created_at")) == ["D0006", "D0004"]
+    assert ids(DealQuery(stage=DealStage.DUE_DILIGENCE, status=DealStatus.IN_PROGRESS, analyst="Awa",
+                         sort="created_at", descending=False)) == ["D0004", "D0005", "D0006"]
+    assert ids(DealQuery(tags=["prioritaire"], sort="created_at", descending=False)) == ["D0000", "D0003", "D0006"]
+    assert ids(DealQuery(created_before=datetime(2026, 1, 1, 1), sort="created_at")) == ["D0001", "D0000"]
+    assert ids(DealQuery(country="Mali", limit=2, sort="created_at")) == ["D0007", "D0005"]
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_projection_mixes_summary_and_deal_fields(kind, tmp_path, open_storage):
+    backend = new_backend(kind, tmp_path)
+    seed(backend)
+    storage = open_storage(backend)
+
+    # Champs des en-têtes seulement : aucun deal complet chargé
+    rows = storage.query(DealQuery(stage=DealStage.DUE_DILIGENCE, sort="created_at",
+                                   fields=["id", "status", "analyst"]))
+    assert rows[0] == {"id": "D0006", "status": DealStatus.IN_PROGRESS, "analyst": "Awa"}
+    assert not storage._cache.deals
+
+    # Statut, analyste et avancement ESAP (en-tête) avec des champs du deal complet
+    [row] = storage.query(DealQuery(stage=DealStage.MONITORING, fields=[
+        "company_name", "status", "analyst", "esap_total", "esap_completed", "esap_items", "stage_history"
+    ]))
+    assert (row["status"], row["analyst"]) == (DealStatus.IN_PROGRESS, "Moussa")
+    assert (row["esap_total"], row["esap_completed"]) == (1, 0)
+    assert [item.is_overdue() for item in row["esap_items"]] == [True]
+    assert row["stage_history"]["due_diligence"].analyst == "Awa"
@@ -0,0 +1,67 @@
+"""
+Tests de la recherche plein texte des deals (index inversé, classement BM25).
+"""
+from datetime import datetime
+
+import pytest
+
+from models.deal import DealStage, DealStatus
+from services.deal_search import DealSearchIndex
+from tests.test_deal_storage import BACKENDS, make_deal, new_backend
+
+
+def described(i: int, description: str, **fields):
+    deal = make_deal(i, **fields)
+    deal.description = description
+    return deal
+
+
+def test_search_requires_all_terms_and_ranks_by_bm25():
+    index = DealSearchIndex.build([
+        described(1, "Centrale solaire pour les coopératives agricoles"),
+        described(2, "Panneaux solaires, stockage solaire et mini-réseaux"),
+        described(3, "Transformation de noix de cajou"),
+    ])
+
+    # Pluriels et accents ignorés ; tous les termes sont requis
+    assert [deal_id for deal_id, _ in index.search("SOLAIRES ")] == ["D0002", "D0001"]
+    assert [deal_id for deal_id, _ in index.search("solaire cooperative ")] == ["D0001"]
+    assert index.search("solaire cajou ") == []
+    # Dernier terme recherché par préfixe (saisie en cours)
+    assert [deal_id for deal_id, _ in index.search("coop")] == ["D0001"]
+
+    index.remove("D0002")
+    assert [deal_id for deal_id, _ in index.search("solaire ")] == ["D0001"]
+
+
+def test_split_indexes_score_like_a_single_index_with_merged_stats():
+    deals = [described(i, "Projet solaire " + "solaire " * (i % 3) + "irrigation " * (i % 2)) for i in range(12)]
+    whole = DealSearchIndex.build(deals)
+    live, archived = DealSearchIndex.build(deals[:9]), DealSearchIndex.build(deals[9:])
+
+    for query in ("solaire ", "irrigation ", "projet sol"):
+        stats = live.stats(query).merge(archived.stats(query))
+        merged = sorted(live.search(query, stats=stats) + archived.search(query, stats=stats),
+                        key=lambda item: (-item[1], item[0]))
+        expected = whole.search(query)
+        assert [deal_id for deal_id, _ in merged] == [deal_id for deal_id, _ in expected]
+        assert [score for _, score in merged] == pytest.approx([score for _, score in expected])
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_search_including_archive_ranks_on_the_merged_corpus(kind, tmp_path, open_storage):
+    backend = new_backend(kind, tmp_path)
+    live = [described(i, "Centrale solaire, stockage solaire") for i in range(5)]
+    # Terme rare dans l'archive : son score BM25 brut y serait gonflé
+    closed = described(5, "Centrale solaire", updated_at=datetime(2020, 1, 1))
+    closed.stage_history["screening"].status = DealStatus.REJECTED
+    closed.current_stage = DealStage.REJECTED
+    backend.save_many(live + [closed])
+    storage = open_storage(backend)
+    assert storage.archive_inactive(days=30) == 1
+
+    found = [deal.id for deal in storage.search("solaire ", include_archived=True)]
+    expected = DealSearchIndex.build(live + [closed]).search("solaire ")
+    assert found == [deal_id for deal_id, _ in expected]
+    assert found[-1] == "D0005"
+    assert [deal.id for deal in storage.search("solaire ")] == found[:-1]
@@ -0,0 +1,269 @@
+"""
+Tests du service de stockage des deals (DealStorage) sur les deux backends.
+"""
+import atexit
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.deal import ANALYSIS_PART, KPI_PART, Deal, DealStage, DealStatus, StageData, get_codec
+from services import storage_backends
+from services.deal_storage import DealStorage, _get_shared_cache
+from services.storage_backends import DealConflictError, StorageBackend, create_backend
+
+BACKENDS = ["json", "sqlite"]
+MODES = ["sync", "write_behind", "journal"]
+
+
+def make_deal(i: int, updated_at: datetime = None) -> Deal:
+    created_at = datetime(2026, 1, 1) + timedelta(hours=i)
+    deal = Deal(
+        id=f"D{i:04d}",
+        created_at=created_at,
+        updated_at=updated_at or created_at,
+        company_name=f"Société {i % 7}",
+        country="Sénégal",
+        sector="Agribusiness",
+        subsector="Transformation",
+        description=f"Entreprise {i}",
+    )
+    deal.stage_history[DealStage.SCREENING.value] = StageData(
+        stage=DealStage.SCREENING, status=DealStatus.IN_PROGRESS, started_at=created_at
+    )
+    return deal
+
+
+def new_backend(kind: str, tmp_path, codec: str = "json"):
+    return create_backend(kind, tmp_path / "deals", tmp_path / "deals.db", get_codec(codec))
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+@pytest.mark.parametrize("mode", MODES)
+def test_save_after_model_mutators(kind, mode, tmp_path, open_storage):
+    backend = new_backend(kind, tmp_path)
+    first = make_deal(1)
+    first.stage_history["screening"].status = DealStatus.APPROVED
+    backend.save_many([first, make_deal(2)])
+    storage = open_storage(backend, mode)
+
+    # Les méthodes métier datent le deal avant la sauvegarde
+    deal = storage.get("D0001")
+    deal.advance_stage(DealStage.DUE_DILIGENCE, analyst="Awa")
+    assert storage.save(deal)
+    deal.add_comment("Visite du site prévue")
+    assert storage.save(deal)
+
+    rejected = storage.get("D0002")
+    rejected.reject("Hors thèse d'investissement")
+    assert storage.save(rejected)
+
+    storage.flush()
+    assert backend.load("D0001").current_stage == DealStage.DUE_DILIGENCE
+    assert backend.load("D0001").stage_history["due_diligence"].comments[0]["text"] == "Visite du site prévue"
+    assert backend.load("D0002").current_stage == DealStage.REJECTED
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+@pytest.mark.parametrize("mode", MODES)
+def test_sessions_get_private_copies_and_stale_saves_are_refused(kind, mode, tmp_path, open_storage):
+    backend = new_backend(kind, tmp_path)
+    backend.save(make_deal(1))
+    storage = open_storage(backend, mode)
+
+    mine, theirs = storage.get("D0001"), storage.get("D0001")
+    mine.description = "non sauvegardé"
+    assert storage.get("D0001").description == "Entreprise 1"
+
+    theirs.add_comment("Sauvegardé en premier")
+    assert storage.save(theirs)
+    mine.add_comment("Sauvegardé sur une version périmée")
+    assert not storage.save(mine)
+
+    current = storage.get("D0001")
+    assert [c["text"] for c in current.stage_history["screening"].comments] == ["Sauvegardé en premier"]
+    assert current.description == "Entreprise 1"
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+@pytest.mark.parametrize("mode", MODES)
+def test_save_rewrites_only_changed_parts(kind, mode, tmp_path, open_storage, monkeypatch):
+    backend = new_backend(kind, tmp_path)
+    deal = make_deal(1)
+    deal.stage_history["screening"].status = DealStatus.APPROVED
+    deal.advance_stage(DealStage.DUE_DILIGENCE)
+    for stage_data in deal.stage_history.values():
+        stage_data.analysis_result = "Analyse détaillée. " * 500
+    deal.monitoring_kpis = [{"date": "2026-01-01", "data": {"emplois": n}} for n in range(500)]
+    backend.save(deal)
+    storage = open_storage(backend, mode)
+
+    written = []
+    split_deal = storage_backends.split_deal
+
+    def spy(deal, stored_parts, codec):
+        data, parts = split_deal(deal, stored_parts, codec)
+        written.append(sorted(part for part, encoded in parts.items() if encoded is not None))
+        return data, parts
+
+    monkeypatch.setattr(storage_backends, "split_deal", spy)
+
+    session = storage.get("D0001")
+    session.add_comment("Rien à signaler")
+    assert storage.save(session)
+    session.stage_history["due_diligence"].analysis_result += " Complément."
+    # Mutation en place non signalée : détectée à la sauvegarde
+    session.monitoring_kpis.append({"date": "2026-02-01", "data": {"emplois": 501}})
+    assert storage.save(session)
+    storage.flush()
+
+    if mode == "sync":
+        assert written == [[], [ANALYSIS_PART + "due_diligence", KPI_PART]]
+    else:
+        # Sauvegardes regroupées en une écriture
+        assert written == [[ANALYSIS_PART + "due_diligence", KPI_PART]]
+    stored = backend.load("D0001")
+    assert stored.stage_history["due_diligence"].analysis_result.endswith("Complément.")
+    assert len(stored.monitoring_kpis) == 501
+    assert stored.stage_history["due_diligence"].comments[0]["text"] == "Rien à signaler"
+
+    # La copie du cache ne partage aucun objet avec la session
+    session.monitoring_kpis.clear()
+    session.stage_history["due_diligence"].comments.append({"text": "non sauvegardé"})
+    current = storage.get("D0001")
+    assert len(current.monitoring_kpis) == 501
+    assert len(current.stage_history["due_diligence"].comments) == 1
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_write_behind_coalesces_saves(kind, tmp_path, open_storage):
+    backend = new_backend(kind, tmp_path)
+    backend.save(make_deal(1))
+    version = backend.current_version()
+    storage = open_storage(backend, "write_behind")
+
+    deal = storage.get("D0001")
+    for n in range(3):
+        deal.description = f"brouillon {n}"
+        assert storage.save(deal)
+    # Cache à jour immédiatement, backend écrit au flush
+    assert storage.get("D0001").description == "brouillon 2"
+    assert backend.load("D0001").description == "Entreprise 1"
+
+    assert storage.flush() == 1
+    assert backend.current_version() == version + 1
+    assert backend.load("D0001").description == "brouillon 2"
+    assert storage.flush() == 0
+    if kind == "json":
+        assert not list((tmp_path / "deals").rglob("*.tmp"))
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_lists_use_summaries_and_deals_load_on_demand(kind, tmp_path, open_storage):
+    backend = new_backend(kind, tmp_path)
+    backend.save_many([make_deal(i) for i in range(5)])
+    storage = open_storage(backend)
+
+    assert sorted(summary.id for summary in storage.get_summaries()) == [f"D{i:04d}" for i in range(5)]
+    assert storage.count(DealStage.SCREENING) == 5
+    assert not storage._cache.deals
+
+    deal = storage.get("D0003")
+    assert list(storage._cache.deals) == ["D0003"]
+    assert storage.get_summary("D0003").company_name == deal.company_name
+
+
+def _crash(storage: DealStorage):
+    """Arrêt brutal du processus : ni compaction du journal ni flush."""
+    journal = storage._cache.journal
+    journal._stop.set()
+    journal._wakeup.set()
+    atexit.unregister(journal.close)
+    storage._cache.journal = None
+    _get_shared_cache.clear()
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_journal_recovers_in_place_mutations_after_crash(kind, tmp_path, open_storage):
+    backend = new_backend(kind, tmp_path)
+    backend.save(make_deal(1))
+    storage = open_storage(backend, "journal")
+
+    deal = storage.get("D0001")
+    deal.company_name = "Nouvelle raison sociale"
+    deal.tags.append("prioritaire")
+    deal.stage_history["screening"].comments.append({"text": "visite site"})
+    assert storage.save(deal)
+    # Journalisé mais pas encore compacté dans le backend
+    assert backend.load("D0001").company_name == "Société 1"
+
+    _crash(storage)
+    recovered = open_storage(new_backend(kind, tmp_path), "journal")
+    deal = recovered.get("D0001")
+    assert deal.company_name == "Nouvelle raison sociale"
+    assert deal.tags == ["prioritaire"]
+    assert deal.stage_history["screening"].comments == [{"text": "visite site"}]
+
+    # La compaction écrit l'état rejoué dans le backend
+    assert recovered.flush() == 1
+    stored = backend.load("D0001")
+    assert (stored.company_name, stored.tags) == ("Nouvelle raison sociale", ["prioritaire"])
+    assert stored.stage_history["screening"].comments == [{"text": "visite site"}]
+    assert len(recovered.get_history("D0001")) == 1
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_concurrent_backend_save_raises_conflict(kind, tmp_path):
+    first, second = new_backend(kind, tmp_path), new_backend(kind, tmp_path)
+    first.save(make_deal(1))
+
+    mine, theirs = first.load("D0001"), second.load("D0001")
+    theirs.description = "modifié par l'autre processus"
+    second.save(theirs)
+    mine.description = "modification concurrente"
+
+    with pytest.raises(DealConflictError):
+        first.save(mine)
+    assert first.load("D0001").description == "modifié par l'autre processus"
+
+
+def _feed_length(kind: str, backend) -> int:
+    if kind == "json":
+        return len((backend.storage_dir / backend.CHANGES_FILE).read_text().splitlines())
+    return backend._connect().execute("SELECT COUNT(*) FROM changes").fetchone()[0]
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_refresh_follows_a_bounded_change_feed(kind, tmp_path, open_storage, monkeypatch):
+    monkeypatch.setattr(StorageBackend, "CHANGES_KEEP", 5)
+    backend = new_backend(kind, tmp_path)
+    backend.save_many([make_deal(i) for i in range(3)])
+    storage = open_storage(backend)
+    # Autre processus : autre instance du backend, même stockage
+    other = new_backend(kind, tmp_path)
+
+    deal = other.load("D0000")
+    deal.description = "modifié ailleurs"
+    other.save(deal)
+    assert storage.refresh() == 1
+    assert storage.get("D0000").description == "modifié ailleurs"
+
+    for n in range(12):
+        deal = other.load(f"D000{n % 2}")
+        deal.description = f"révision {n}"
+        other.save(deal)
+    other.delete("D0002")
+    assert _feed_length(kind, other) <= 2 * StorageBackend.CHANGES_KEEP
+
+    # Lecteur plus ancien que le flux conservé : relecture complète
+    assert storage.changes_since(storage._cache.version) is None
+    assert storage.refresh() == 3
+    assert storage.get("D0000").description == "révision 10"
+    assert storage.get("D0001").description == "révision 11"
+    assert storage.get_summary("D0002") is None
+
+    # Le flux reprend ensuite incrémentalement
+    deal = other.load("D0001")
+    deal.description = "après troncature"
+    other.save(deal)
+    assert [change.deal_id for change in storage.changes_since(storage._cache.version)] == ["D0001"]
+    assert storage.refresh() == 1
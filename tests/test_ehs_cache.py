@@ -0,0 +1,47 @@
+"""
+Tests du cache disque des textes extraits des guidelines IFC-EHS.
+"""
+import os
+
+from utils.ehs_cache import EHSTextCache
+
+
+def _pdfs(ehs_dir):
+    return sorted(str(path) for path in ehs_dir.glob("*.pdf"))
+
+
+def test_text_round_trip_and_invalidation(ehs_dir, tmp_path):
+    cache = EHSTextCache(str(tmp_path / "cache"), "2-pypdf2")
+    pdf = _pdfs(ehs_dir)[0]
+    assert cache.get(pdf) is None
+
+    cache.put(pdf, "texte extrait")
+    cache.flush()
+    assert EHSTextCache(str(tmp_path / "cache"), "2-pypdf2").get(pdf) == "texte extrait"
+    # Autre version de l'extracteur : autre entrée
+    assert EHSTextCache(str(tmp_path / "cache"), "3-pypdf2").get(pdf) is None
+
+    with open(pdf, "ab") as f:
+        f.write(b"\n% modified\n")
+    assert cache.get(pdf) is None
+
+
+def test_prune_forgets_deleted_pdfs_only_in_its_key_space(ehs_dir, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    current, other = EHSTextCache(cache_dir, "2-pypdf2"), EHSTextCache(cache_dir, "2-pymupdf")
+    pdfs = _pdfs(ehs_dir)
+    for pdf in pdfs:
+        current.put(pdf, f"texte {pdf}")
+        other.put(pdf, f"autre backend {pdf}")
+    current.flush()
+
+    os.remove(pdfs[0])
+    # flush ne supprime rien : l'élagage n'a lieu qu'à la reconstruction des index
+    current.flush()
+    assert len(list(current.texts_dir.glob("*-v2-pypdf2.txt"))) == 3
+
+    current.prune(pdfs[1:])
+    assert len(list(current.texts_dir.glob("*-v2-pypdf2.txt"))) == 2
+    assert len(list(current.texts_dir.glob("*-v2-pymupdf.txt"))) == 3
+    assert os.path.basename(pdfs[0]) not in EHSTextCache(cache_dir, "2-pypdf2")._manifest
+    assert current.get(pdfs[1]) == f"texte {pdfs[1]}"
@@ -0,0 +1,108 @@
+"""
+Tests du téléchargement des guidelines IFC-EHS contre un serveur HTTP local
+(reprise d'un téléchargement tronqué, checksums invalides).
+"""
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils import ehs_downloader
+from utils.ehs_downloader import MANIFEST_NAME, ensure_ehs_files
+
+FILENAME = "2007-mining-ehs-guidelines-en.pdf"
+CONTENT = b"%PDF-1.4\n" + bytes(range(256)) * 400 + b"\n%%EOF\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Sert server.files, avec HTTP Range si server.ranges est vrai."""
+
+    def do_GET(self):
+        name = self.path.lstrip("/")
+        self.server.requests.append((name, self.headers.get("Range")))
+        body = self.server.files.get(name)
+        if body is None:
+            self.send_error(404)
+            return
+        status = 200
+        range_header = self.headers.get("Range")
+        if range_header and self.server.ranges:
+            start = int(range_header.split("=")[1].rstrip("-"))
+            if start >= len(body):
+                self.send_error(416)
+                return
+            status, body = 206, body[start:]
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(ehs_downloader, "EHS_FILES", [FILENAME])
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.files = {FILENAME: CONTENT}
+    httpd.ranges = True
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _base_url(httpd) -> str:
+    return f"http://127.0.0.1:{httpd.server_address[1]}/"
+
+
+def _publish_manifest(httpd, sha256: str):
+    httpd.files[MANIFEST_NAME] = json.dumps({"files": {FILENAME: {"sha256": sha256}}}).encode()
+
+
+def test_resumes_truncated_download(server, tmp_path):
+    _publish_manifest(server, hashlib.sha256(CONTENT).hexdigest())
+    half = len(CONTENT) // 2
+    (tmp_path / f"{FILENAME}.part").write_bytes(CONTENT[:half])
+
+    assert ensure_ehs_files(str(tmp_path), base_url=_base_url(server), max_workers=1)
+
+    assert (tmp_path / FILENAME).read_bytes() == CONTENT
+    assert not (tmp_path / f"{FILENAME}.part").exists()
+    assert (FILENAME, f"bytes={half}-") in server.requests
+    manifest = json.loads((tmp_path / MANIFEST_NAME).read_text())["files"]
+    assert manifest[FILENAME]["sha256"] == hashlib.sha256(CONTENT).hexdigest()
+
+
+def test_restarts_when_server_ignores_range(server, tmp_path):
+    _publish_manifest(server, hashlib.sha256(CONTENT).hexdigest())
+    server.ranges = False
+    (tmp_path / f"{FILENAME}.part").write_bytes(CONTENT[:100])
+
+    assert ensure_ehs_files(str(tmp_path), base_url=_base_url(server), max_workers=1)
+
+    assert (tmp_path / FILENAME).read_bytes() == CONTENT
+
+
+def test_rejects_checksum_mismatch(server, tmp_path):
+    _publish_manifest(server, "0" * 64)
+
+    assert not ensure_ehs_files(str(tmp_path), base_url=_base_url(server), max_workers=1)
+
+    assert not (tmp_path / FILENAME).exists()
+    assert not (tmp_path / f"{FILENAME}.part").exists()
+
+
+def test_replaces_corrupted_local_file(server, tmp_path):
+    _publish_manifest(server, hashlib.sha256(CONTENT).hexdigest())
+    (tmp_path / FILENAME).write_bytes(CONTENT[:-10] + b"corrupted!")
+
+    assert ensure_ehs_files(str(tmp_path), base_url=_base_url(server), max_workers=1)
+
+    assert (tmp_path / FILENAME).read_bytes() == CONTENT
+    assert (FILENAME, None) in server.requests
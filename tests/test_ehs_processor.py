@@ -0,0 +1,90 @@
+"""
+Tests de l'extraction, du chargement et de la recherche dans les guidelines IFC-EHS.
+"""
+import pytest
+
+from utils import ehs_processor
+from utils.ehs_index import PAGE_BREAK, PackedPostings
+from utils.ehs_processor import EHSProcessor, extract_many, extract_text_from_pdf, get_ehs_processor
+
+pytest.importorskip("PyPDF2")
+
+
+def test_extract_many_in_processes_matches_sequential(ehs_dir, tmp_path):
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"%PDF-1.4\nnot a pdf")
+    paths = sorted(str(path) for path in ehs_dir.glob("*.pdf")) + [str(broken)]
+
+    sequential = extract_many(paths, "pypdf2", max_workers=1)
+    parallel = extract_many(paths, "pypdf2", max_workers=2)
+
+    assert parallel == sequential
+    assert parallel[str(broken)] == ""
+    mining = next(path for path in paths if "mining" in path)
+    assert parallel[mining] == extract_text_from_pdf(mining, "pypdf2")
+    assert parallel[mining].count(PAGE_BREAK) == 1
+    assert "Wastewater effluent limits" in parallel[mining]
+
+
+def test_lazy_processor_loads_only_what_queries_need(ehs_dir, tmp_path):
+    processor = EHSProcessor(str(ehs_dir), cache_dir=str(tmp_path / "cache"), lazy=True, max_loaded=1)
+    assert processor.ehs_files.loaded == []
+    assert len(processor.ehs_files) == 3
+
+    passages = processor.search("wastewater effluent limits", k=1)
+
+    assert passages[0].filename == "2007-mining-ehs-guidelines-en.pdf"
+    assert processor.ehs_files.loaded == ["2007-mining-ehs-guidelines-en.pdf"]
+    processor.get_guideline_summary("2007-textiles-manufacturing-ehs-guidelines-en.pdf")
+    assert processor.ehs_files.loaded == ["2007-textiles-manufacturing-ehs-guidelines-en.pdf"]
+
+
+def test_relevance_index_is_persisted_and_ranks_by_sector(ehs_dir, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    built = EHSProcessor(str(ehs_dir), cache_dir=cache_dir, lazy=True)
+    matches = built.rank_guidelines("Mining")
+
+    assert [match.filename for match in matches] == ["2007-mining-ehs-guidelines-en.pdf"]
+    assert matches[0].matched_in_filename
+    assert matches[0].sections == ["1 Introduction"]
+    assert len(list((tmp_path / "cache" / "index").glob("*.json"))) == 1
+
+    # Deuxième processus : index relu depuis le cache, aucun texte chargé
+    reloaded = EHSProcessor(str(ehs_dir), cache_dir=cache_dir, lazy=True)
+    assert reloaded.rank_guidelines("Mining") == matches
+    assert reloaded.ehs_files.loaded == []
+
+
+def test_passage_search_cites_page_and_section(ehs_dir, tmp_path):
+    processor = EHSProcessor(str(ehs_dir), cache_dir=str(tmp_path / "cache"), lazy=True)
+
+    best = processor.search("wastewater effluent limits", k=2)[0]
+    assert (best.filename, best.page, best.section) == ("2007-mining-ehs-guidelines-en.pdf", 2, "1.1 Environment")
+    assert best.text.startswith("1.1 Environment")
+
+    # Secteur mappé (Santé) : seules ses guidelines sont cherchées
+    passages = processor.search("wastewater hazardous waste", sector="Santé", k=5)
+    assert {passage.filename for passage in passages} == {"2007-health-care-facilities-ehs-guidelines-en.pdf"}
+
+
+def test_shared_processor_serves_mapped_indexes(ehs_dir, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    in_memory = EHSProcessor(str(ehs_dir), cache_dir=cache_dir)
+    shared = EHSProcessor(str(ehs_dir), cache_dir=cache_dir, shared=True)
+
+    assert isinstance(shared.passage_index.postings, PackedPostings)
+    for query in ("wastewater effluent limits", "noise workers", "hazardous waste storage"):
+        assert shared.search(query, k=3) == in_memory.search(query, k=3)
+    assert shared.rank_guidelines("Textiles") == in_memory.rank_guidelines("Textiles")
+
+
+def test_missing_guidelines_are_not_cached(ehs_dir, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ehs_processor, "_processors", {})
+    assert get_ehs_processor("guidelines") is None
+
+    # Répertoire rempli ensuite (téléchargement) : disponible sans redémarrage
+    ehs_dir.rename(tmp_path / "guidelines")
+    processor = get_ehs_processor("guidelines")
+    assert processor is not None and processor.shared
+    assert get_ehs_processor("guidelines") is processor
@@ -0,0 +1,171 @@
+"""
+Persistent on-disk cache of text extracted from IFC EHS guideline PDFs.
+
+Entries are keyed by the SHA-256 of the PDF and the extractor version, so a
+changed PDF or a new extraction routine invalidates the cached text
+automatically. A small manifest remembers (size, mtime) per file to avoid
+re-hashing unchanged PDFs on every start.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from loguru import logger
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """Compute the SHA-256 of a file without loading it fully in memory."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Write a file through a temporary file and an atomic rename."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class EHSTextCache:
+    """Cache of extracted guideline text, keyed by file hash and extractor version."""
+
+    MANIFEST_NAME = "manifest.json"
+
+    def __init__(self, cache_dir: str, extractor_version: str):
+        self.cache_dir = Path(cache_dir)
+        self.extractor_version = str(extractor_version)
+        self.texts_dir = self.cache_dir / "texts"
+        self.texts_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._manifest: Dict[str, Dict] = self._read_manifest()
+
+    def _read_manifest(self) -> Dict[str, Dict]:
+        """Load the (filename -> size, mtime, sha256) manifest."""
+        manifest_path = self.cache_dir / self.MANIFEST_NAME
+        if not manifest_path.exists():
+            return {}
+        try:
+            data = json.loads(manifest_path.read_text(encoding='utf-8'))
+            return data.get("files", {})
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable EHS cache manifest: {str(e)}")
+            return {}
+
+    def _entry_path(self, sha256: str) -> Path:
+        return self.texts_dir / f"{sha256}-v{self.extractor_version}.txt"
+
+    def file_hash(self, pdf_path: str) -> str:
+        """
+        Return the SHA-256 of a PDF, reusing the manifest when size and mtime
+        are unchanged.
+        """
+        stat = os.stat(pdf_path)
+        filename = os.path.basename(pdf_path)
+        with self._lock:
+            entry = self._manifest.get(filename)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["sha256"]
+
+        sha256 = file_sha256(pdf_path)
+        with self._lock:
+            self._manifest[filename] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": sha256,
+            }
+            self._dirty = True
+        return sha256
+
+    def get(self, pdf_path: str) -> Optional[str]:
+        """Return the cached text for a PDF, or None on a cache miss."""
+        entry_path = self._entry_path(self.file_hash(pdf_path))
+        try:
+            return entry_path.read_text(encoding='utf-8')
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Error reading EHS cache entry {entry_path}: {str(e)}")
+            return None
+
+    def put(self, pdf_path: str, text: str) -> None:
+        """Store the extracted text of a PDF."""
+        entry_path = self._entry_path(self.file_hash(pdf_path))
+        try:
+            atomic_write_text(entry_path, text)
+        except Exception as e:
+            logger.warning(f"Error writing EHS cache entry {entry_path}: {str(e)}")
+
+    def corpus_fingerprint(self, pdf_paths: List[str], salt: str = "") -> str:
+        """Return a key identifying the exact set and content of a corpus."""
+        digest = hashlib.sha256(f"{self.extractor_version}|{salt}".encode())
+        for path in sorted(pdf_paths, key=os.path.basename):
+            digest.update(f"|{os.path.basename(path)}:{self.file_hash(path)}".encode())
+        return digest.hexdigest()[:32]
+
+    def artifact_path(self, kind: str, key: str, suffix: str = ".json") -> Path:
+        """Path of a derived artifact (index, packed corpus...) for a corpus key."""
+        return self.cache_dir / kind / f"{key}{suffix}"
+
+    def prune_artifacts(self, kind: str, keep: Path) -> None:
+        """Remove artifacts of a kind other than the current one."""
+        for path in (self.cache_dir / kind).glob("*"):
+            if path != keep and not path.name.startswith("."):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def flush(self) -> None:
+        """Persist the manifest if new hashes were recorded."""
+        with self._lock:
+            if not self._dirty:
+                return
+            manifest = dict(self._manifest)
+            self._dirty = False
+
+        try:
+            atomic_write_text(
+                self.cache_dir / self.MANIFEST_NAME,
+                json.dumps({"extractor_version": self.extractor_version, "files": manifest}, indent=2)
+            )
+        except Exception as e:
+            logger.warning(f"Error writing EHS cache manifest: {str(e)}")
+
+    def prune(self, pdf_files: Iterable[str]) -> None:
+        """
+        Forget deleted PDFs and drop their texts, along with texts of PDFs that
+        changed. Only entries of this extractor version are considered: texts of
+        other versions or backends sharing the directory are left alone.
+        """
+        current = {os.path.basename(pdf) for pdf in pdf_files}
+        with self._lock:
+            for filename in [f for f in self._manifest if f not in current]:
+                del self._manifest[filename]
+                self._dirty = True
+        self.flush()
+
+        entry_paths = list(self.texts_dir.glob(f"*-v{self.extractor_version}.txt"))
+        # Read the live set after listing: entries written since the snapshot are kept
+        with self._lock:
+            live = {self._entry_path(entry["sha256"]).name for entry in self._manifest.values()}
+        for entry_path in entry_paths:
+            if entry_path.name not in live:
+                try:
+                    entry_path.unlink()
+                except OSError:
+                    pass
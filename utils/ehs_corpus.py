@@ -0,0 +1,109 @@
+"""
+Packed, memory-mapped EHS guideline corpus shared across worker processes.
+
+All guideline texts are stored in one file (UTF-8 text blob followed by an
+offset table). Every process maps it read-only, so the text lives once in the
+OS page cache instead of once per Python process. The same container holds
+the packed search indexes (see EHSIndex.packed_items), with binary values.
+
+Layout:
+    MAGIC | blob | JSON table {name: [offset, length]} | table offset (uint64) | MAGIC
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Tuple
+
+MAGIC = b"EHSCORP1"
+_FOOTER = struct.Struct("<Q")
+
+
+def write_packed_corpus(path: Path, texts: Iterable[Tuple[str, str]]) -> None:
+    """
+    Write (filename, text) pairs into a packed corpus file.
+
+    Texts are streamed to disk one by one and the file is published with an
+    atomic rename, so concurrent readers never see a partial corpus.
+    """
+    write_packed(path, ((filename, text.encode('utf-8')) for filename, text in texts))
+
+
+def write_packed(path: Path, items: Iterable[Tuple[str, bytes]]) -> None:
+    """Write (name, bytes) pairs into a packed file, streamed and atomically published."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC)
+            table: Dict[str, list] = {}
+            offset = len(MAGIC)
+            for name, data in items:
+                f.write(data)
+                table[name] = [offset, len(data)]
+                offset += len(data)
+            f.write(json.dumps(table, ensure_ascii=False).encode('utf-8'))
+            f.write(_FOOTER.pack(offset))
+            f.write(MAGIC)
+        # mkstemp creates 0600 files: make the corpus readable by every worker
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class PackedCorpus(Mapping):
+    """Read-only filename -> text mapping backed by a memory-mapped corpus file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        size = len(self._mmap)
+        footer_start = size - _FOOTER.size - len(MAGIC)
+        if (
+            size < 2 * len(MAGIC) + _FOOTER.size
+            or self._mmap[:len(MAGIC)] != MAGIC
+            or self._mmap[size - len(MAGIC):] != MAGIC
+        ):
+            self._mmap.close()
+            raise ValueError(f"Not a packed EHS corpus: {self.path}")
+
+        (table_offset,) = _FOOTER.unpack(self._mmap[footer_start:footer_start + _FOOTER.size])
+        self._table: Dict[str, Tuple[int, int]] = {
+            filename: (offset, length)
+            for filename, (offset, length) in json.loads(self._mmap[table_offset:footer_start].decode('utf-8')).items()
+        }
+
+    def __getitem__(self, filename: str) -> str:
+        offset, length = self._table[filename]
+        return self._mmap[offset:offset + length].decode('utf-8')
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table)
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def __contains__(self, filename: object) -> bool:
+        return filename in self._table
+
+    def raw(self, name: str) -> bytes:
+        """Bytes stored under a name (binary entries of a packed index)."""
+        offset, length = self._table[name]
+        return self._mmap[offset:offset + length]
+
+    def size_of(self, filename: str) -> int:
+        """Size in bytes of a guideline's text, without decoding it."""
+        return self._table[filename][1]
+
+    def close(self) -> None:
+        self._mmap.close()
@@ -1,13 +1,36 @@
 """
-Télécharge les guidelines IFC-EHS depuis GitHub Releases au premier lancement.
+Télécharge les guidelines IFC-EHS depuis GitHub Releases.
+
+Étape d'installation en ligne de commande (python -m utils.ehs_downloader) :
+l'application ne télécharge rien au démarrage et lit seulement ifc-ehs/.
+
+Les téléchargements sont concurrents (session HTTP partagée), écrits en
+streaming sur disque et reprennent là où ils s'étaient arrêtés (HTTP Range).
+Un manifeste de checksums SHA-256 permet de détecter les fichiers corrompus.
 """
+import hashlib
+import json
 import os
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Dict, Optional, Tuple
 from loguru import logger
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.ehs_cache import atomic_write_text, file_sha256
 
 RELEASE_BASE_URL = "https://github.com/Kevinaie18/esg-analyzer/releases/download/v1.0-data/"
 
+# Surchargeable pour tester contre un serveur HTTP local
+BASE_URL_ENV = "EHS_BASE_URL"
+
+# Manifeste local des checksums (et publié optionnellement à côté des PDFs)
+MANIFEST_NAME = "ehs-manifest.json"
+
+CHUNK_SIZE = 1 << 16
+
 EHS_FILES = [
     "2007-airlines-ehs-guidelines-en.pdf",
     "2007-airports-ehs-guidelines-en.pdf",
@@ -74,40 +97,179 @@ EHS_FILES = [
 ]
 
 
-def ensure_ehs_files(target_dir: str = "ifc-ehs") -> bool:
+def _make_session(max_workers: int) -> requests.Session:
+    """Session HTTP avec un pool de connexions par worker et des retries."""
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _load_manifest(path: Path) -> Dict[str, Dict]:
+    """Charge un manifeste {filename: {sha256, size, mtime_ns}}."""
+    try:
+        return json.loads(path.read_text(encoding='utf-8')).get("files", {})
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f"Manifeste illisible {path}: {e}")
+        return {}
+
+
+def _fetch_remote_manifest(session: requests.Session, base_url: str) -> Dict[str, Dict]:
+    """Récupère les checksums publiés avec les PDFs, s'ils existent."""
+    try:
+        response = session.get(f"{base_url}{MANIFEST_NAME}", timeout=(10, 30))
+        if response.status_code == 200:
+            return response.json().get("files", {})
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.debug(f"Pas de manifeste distant: {e}")
+    return {}
+
+
+def _is_valid(filepath: Path, entry: Optional[Dict], expected_sha: Optional[str]) -> Tuple[bool, Optional[Dict]]:
+    """
+    Vérifie un fichier local contre son checksum attendu.
+    Le hash n'est recalculé que si la taille ou la date ont changé.
+    Retourne (valide, entrée de manifeste à jour).
     """
-    Vérifie et télécharge les PDFs manquants.
+    stat = filepath.stat()
+    if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+        sha256 = entry["sha256"]
+    else:
+        with open(filepath, 'rb') as f:
+            if f.read(5) != b"%PDF-":
+                return False, None
+        sha256 = file_sha256(str(filepath))
+    
+    expected = expected_sha or (entry or {}).get("sha256")
+    if expected and sha256 != expected:
+        return False, None
+    return True, {"sha256": sha256, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _download_file(session: requests.Session, url: str, filepath: Path, expected_sha: Optional[str]) -> Dict:
+    """
+    Télécharge un fichier en streaming vers un .part, en reprenant un
+    téléchargement interrompu, puis le renomme atomiquement.
+    """
+    part_path = filepath.with_name(filepath.name + ".part")
+    digest = hashlib.sha256()
+    resume_from = part_path.stat().st_size if part_path.exists() else 0
+    if resume_from:
+        with open(part_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    
+    headers = {"Range": f"bytes={resume_from}-"} if resume_from else {}
+    with session.get(url, stream=True, headers=headers, timeout=(10, 60)) as response:
+        if response.status_code == 416 and resume_from:
+            # Le .part est déjà complet
+            pass
+        else:
+            response.raise_for_status()
+            if resume_from and response.status_code != 206:
+                # Le serveur ignore Range: on repart de zéro
+                resume_from = 0
+                digest = hashlib.sha256()
+            
+            with open(part_path, 'ab' if resume_from else 'wb') as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    if chunk:
+                        f.write(chunk)
+                        digest.update(chunk)
+    
+    sha256 = digest.hexdigest()
+    with open(part_path, 'rb') as f:
+        is_pdf = f.read(5) == b"%PDF-"
+    if not is_pdf or (expected_sha and sha256 != expected_sha):
+        part_path.unlink()
+        raise ValueError("checksum invalide" if is_pdf else "le fichier reçu n'est pas un PDF")
+    
+    os.replace(part_path, filepath)
+    stat = filepath.stat()
+    return {"sha256": sha256, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def ensure_ehs_files(
+    target_dir: str = "ifc-ehs",
+    base_url: Optional[str] = None,
+    max_workers: int = 8,
+    verify: bool = True
+) -> bool:
+    """
+    Vérifie et télécharge les PDFs manquants ou corrompus.
+    
+    Args:
+        target_dir: Répertoire des PDFs
+        base_url: URL de base des PDFs (défaut: $EHS_BASE_URL ou GitHub Releases)
+        max_workers: Nombre de téléchargements simultanés
+        verify: Vérifier les fichiers présents contre le manifeste de checksums
+    
     Retourne True si tous les fichiers sont disponibles.
     """
+    base_url = base_url or os.getenv(BASE_URL_ENV) or RELEASE_BASE_URL
+    if not base_url.endswith("/"):
+        base_url += "/"
+    
     target_path = Path(target_dir)
     target_path.mkdir(exist_ok=True)
+    manifest_path = target_path / MANIFEST_NAME
+    manifest = _load_manifest(manifest_path)
+    session = _make_session(max_workers)
+    expected = _fetch_remote_manifest(session, base_url)
     
-    # Vérifier les fichiers manquants
+    # Vérifier les fichiers manquants ou corrompus
     missing = []
     for filename in EHS_FILES:
-        if not (target_path / filename).exists():
+        filepath = target_path / filename
+        if not filepath.exists():
             missing.append(filename)
+            continue
+        if verify:
+            valid, entry = _is_valid(filepath, manifest.get(filename), expected.get(filename, {}).get("sha256"))
+            if valid:
+                manifest[filename] = entry
+            else:
+                logger.warning(f"⚠️ {filename} corrompu, nouveau téléchargement")
+                filepath.unlink()
+                manifest.pop(filename, None)
+                missing.append(filename)
     
     if not missing:
+        if verify:
+            atomic_write_text(manifest_path, json.dumps({"files": manifest}, indent=2))
         logger.info("✅ Tous les fichiers IFC-EHS sont présents.")
         return True
     
     logger.info(f"📥 Téléchargement de {len(missing)} fichiers IFC-EHS...")
     
     success_count = 0
-    for i, filename in enumerate(missing, 1):
-        url = f"{RELEASE_BASE_URL}{filename}"
-        filepath = target_path / filename
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(missing)))) as executor:
+        future_to_file = {
+            executor.submit(
+                _download_file,
+                session,
+                f"{base_url}{filename}",
+                target_path / filename,
+                expected.get(filename, {}).get("sha256")
+            ): filename
+            for filename in missing
+        }
         
-        try:
-            logger.info(f"[{i}/{len(missing)}] Téléchargement de {filename}...")
-            response = requests.get(url, timeout=60)
-            response.raise_for_status()
-            filepath.write_bytes(response.content)
-            success_count += 1
-            logger.info(f"✓ {filename}")
-        except requests.exceptions.RequestException as e:
-            logger.error(f"✗ {filename}: {e}")
+        for future in as_completed(future_to_file):
+            filename = future_to_file[future]
+            try:
+                manifest[filename] = future.result()
+                success_count += 1
+                logger.info(f"✓ [{success_count}/{len(missing)}] {filename}")
+            except (requests.exceptions.RequestException, ValueError, OSError) as e:
+                logger.error(f"✗ {filename}: {e}")
+    
+    session.close()
+    atomic_write_text(manifest_path, json.dumps({"files": manifest}, indent=2))
     
     if success_count == len(missing):
         logger.info(f"✅ {success_count} fichiers téléchargés avec succès.")
@@ -168,5 +330,4 @@ def get_ehs_file_for_sector(sector: str) -> list:
 
 
 if __name__ == "__main__":
-    # Test du téléchargement
-    ensure_ehs_files()
+    raise SystemExit(0 if ensure_ehs_files() else 1)
@@ -0,0 +1,441 @@
+"""
+Indexes over IFC EHS guideline texts.
+
+- `EHSIndex`: inverted index for sector relevance lookups, so relevance
+  queries are dictionary lookups instead of regex scans over the corpus.
+- `EHSPassageIndex`: BM25 index over section-level passages, used to ground
+  prompts in specific guideline requirements.
+"""
+
+import json
+import math
+import re
+import unicodedata
+from array import array
+from bisect import bisect_right
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from itertools import chain
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from utils.ehs_corpus import PackedCorpus, write_packed
+
+# Bump whenever tokenization or the index layout changes
+INDEX_VERSION = "2"
+
+# Separator between pages in extracted guideline text
+PAGE_BREAK = "\f"
+
+# Target passage size (in words) for retrieval
+PASSAGE_WORDS = 120
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "of", "on", "or", "should", "that", "the", "this", "to", "with",
+}
+
+# Words that introduce a sector-specific part of a guideline ("<sector> guidelines")
+CUE_WORDS = {"guidelines", "standards", "requirements", "considerations"}
+
+# Longest sector/subsector phrase (in tokens) recorded before a cue word
+MAX_PHRASE_TOKENS = 4
+
+DEFAULT_SECTION = "General"
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_SECTION_RE = re.compile(r"^\s*(\d{1,2}(?:\.\d{1,2}){0,3})\.?\s+([A-Z][^\n]{2,80}?)\s*$", re.MULTILINE)
+
+
+def normalize(text: str) -> str:
+    """Lowercase and strip accents so "Énergie" and "energie" match."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into normalized alphanumeric tokens."""
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def section_spans(text: str) -> List[Tuple[str, int, int]]:
+    """
+    Locate the sections of a guideline from its numbered headings
+    (e.g. "1.1 Environment").
+    
+    Returns:
+        (section title, start offset, end offset) triples
+    """
+    spans = []
+    matches = list(_SECTION_RE.finditer(text))
+    if not matches or matches[0].start() > 0:
+        spans.append((DEFAULT_SECTION, 0, matches[0].start() if matches else len(text)))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        spans.append((f"{match.group(1)} {match.group(2)}", match.start(), end))
+    return [(title, start, end) for title, start, end in spans if text[start:end].strip()]
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """Split a guideline into (section title, section text) pairs."""
+    return [(title, text[start:end]) for title, start, end in section_spans(text)]
+
+
+def chunk_passages(text: str, passage_words: int = PASSAGE_WORDS) -> List[Tuple[str, int, int, int]]:
+    """
+    Cut a guideline into passages of about `passage_words` words that never
+    straddle a section boundary.
+    
+    Returns:
+        (section title, page number, start offset, end offset) tuples
+    """
+    page_starts = [0] + [m.end() for m in re.finditer(PAGE_BREAK, text)]
+    passages = []
+    for title, start, end in section_spans(text):
+        chunk_start, words = start, 0
+        for line in re.finditer(r"[^\n]*\n?", text[start:end]):
+            words += len(line.group().split())
+            line_end = start + line.end()
+            if words >= passage_words or line_end >= end:
+                if text[chunk_start:line_end].strip():
+                    page = bisect_right(page_starts, chunk_start + _leading_space(text, chunk_start, line_end))
+                    passages.append((title, page, chunk_start, line_end))
+                chunk_start, words = line_end, 0
+            if line_end >= end:
+                break
+    return passages
+
+
+def _leading_space(text: str, start: int, end: int) -> int:
+    """Number of whitespace characters (including page breaks) at the start of a span."""
+    span = text[start:end]
+    return len(span) - len(span.lstrip())
+
+
+def guideline_title(filename: str) -> str:
+    """Readable title from a guideline filename ("2007-mining-ehs-guidelines-en.pdf")."""
+    stem = filename.rsplit('.', 1)[0]
+    parts = stem.split('-')
+    year = parts[0] if parts and parts[0].isdigit() else None
+    words = [w for w in parts[1:] if w not in ("ehs", "guidelines", "en")] if year else parts
+    title = "IFC EHS " + " ".join(w.capitalize() for w in words)
+    return f"{title} ({year})" if year else title
+
+
+def _json_bytes(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
+
+def _uint32(raw: bytes) -> array:
+    values = array('I')
+    values.frombytes(raw)
+    return values
+
+
+class PackedPostings(Mapping):
+    """
+    Read-only view of the entries of a packed index under a key prefix,
+    decoded on access: postings stay in the memory-mapped file, shared by
+    all processes, instead of living in per-process dictionaries.
+    """
+
+    def __init__(self, packed: PackedCorpus, prefix: str, decode: Callable[[bytes], Any]):
+        self._packed = packed
+        self._prefix = prefix
+        self._decode = decode
+
+    def __getitem__(self, key: str) -> Any:
+        return self._decode(self._packed.raw(self._prefix + key))
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._prefix + key in self._packed
+
+    def __iter__(self) -> Iterator[str]:
+        return (name[len(self._prefix):] for name in self._packed if name.startswith(self._prefix))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+@dataclass
+class EHSPassage:
+    """A passage of a guideline returned by retrieval."""
+    filename: str
+    page: int
+    section: str
+    text: str
+    score: float
+
+    @property
+    def citation(self) -> str:
+        return f"{guideline_title(self.filename)}, p. {self.page}, {self.section}"
+
+
+@dataclass
+class GuidelineMatch:
+    """A guideline relevant to a sector query."""
+    filename: str
+    score: float
+    matched_in_filename: bool = False
+    sections: List[str] = field(default_factory=list)
+
+
+class EHSIndex:
+    """
+    Inverted index of guideline texts.
+
+    - `terms`: token -> {filename: {section: count}}, used for ranking
+    - `cue_phrases`: phrase preceding a cue word -> {filename: {section: count}}
+    - `filename_tokens`: tokens of each guideline filename
+    """
+
+    def __init__(self):
+        self.terms: Dict[str, Dict[str, Dict[str, int]]] = {}
+        self.cue_phrases: Dict[str, Dict[str, Dict[str, int]]] = {}
+        self.filename_tokens: Dict[str, List[str]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+
+    @classmethod
+    def build(cls, ehs_files: Dict[str, str]) -> 'EHSIndex':
+        """Build the index from a filename -> text mapping."""
+        index = cls()
+        for filename, text in ehs_files.items():
+            index.add(filename, text)
+        return index
+
+    def add(self, filename: str, text: str) -> None:
+        """Index one guideline (replacing any previous version)."""
+        if filename in self.filename_tokens:
+            self.remove(filename)
+
+        self.filename_tokens[filename] = tokenize(filename.rsplit('.', 1)[0])
+        length = 0
+        for section, body in split_sections(text):
+            tokens = tokenize(body)
+            length += len(tokens)
+            for i, token in enumerate(tokens):
+                postings = self.terms.setdefault(token, {}).setdefault(filename, {})
+                postings[section] = postings.get(section, 0) + 1
+
+                if token in CUE_WORDS:
+                    for size in range(1, min(MAX_PHRASE_TOKENS, i) + 1):
+                        phrase = " ".join(tokens[i - size:i])
+                        postings = self.cue_phrases.setdefault(phrase, {}).setdefault(filename, {})
+                        postings[section] = postings.get(section, 0) + 1
+        self.doc_lengths[filename] = length
+
+    def remove(self, filename: str) -> None:
+        """Remove a guideline from the index."""
+        for table in (self.terms, self.cue_phrases):
+            for key in [k for k, postings in table.items() if filename in postings]:
+                del table[key][filename]
+                if not table[key]:
+                    del table[key]
+        self.filename_tokens.pop(filename, None)
+        self.doc_lengths.pop(filename, None)
+
+    def _filename_matches(self, filename: str, phrase_tokens: List[str]) -> bool:
+        tokens = self.filename_tokens.get(filename, [])
+        size = len(phrase_tokens)
+        return size > 0 and any(tokens[i:i + size] == phrase_tokens for i in range(len(tokens) - size + 1))
+
+    def lookup(self, sector: str, subsector: Optional[str] = None) -> List[GuidelineMatch]:
+        """
+        Return guidelines relevant to a sector/subsector, best match first.
+
+        A guideline is relevant when its filename contains the sector or
+        subsector, or when its text has "<sector> guidelines/standards/
+        requirements/considerations". Matches are ranked by those signals,
+        then by how often the query terms appear in the guideline.
+        """
+        matches: Dict[str, GuidelineMatch] = {}
+
+        for query, weight in ((sector, 2.0), (subsector, 1.0)):
+            if not query:
+                continue
+            tokens = tokenize(query)
+            if not tokens:
+                continue
+
+            for filename in self.filename_tokens:
+                if self._filename_matches(filename, tokens):
+                    match = matches.setdefault(filename, GuidelineMatch(filename, 0.0))
+                    match.matched_in_filename = True
+                    match.score += 10 * weight
+
+            for filename, sections in self.cue_phrases.get(" ".join(tokens), {}).items():
+                match = matches.setdefault(filename, GuidelineMatch(filename, 0.0))
+                match.score += weight * sum(sections.values())
+                for section in sections:
+                    if section not in match.sections:
+                        match.sections.append(section)
+
+        # Tie-break by normalized query term frequency
+        query_tokens = tokenize(" ".join(q for q in (sector, subsector) if q))
+        for filename, match in matches.items():
+            hits = sum(
+                sum(self.terms.get(token, {}).get(filename, {}).values())
+                for token in query_tokens
+            )
+            match.score += hits / max(self.doc_lengths.get(filename, 0), 1)
+
+        return sorted(matches.values(), key=lambda m: (-m.score, m.filename))
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": INDEX_VERSION,
+            "terms": self.terms,
+            "cue_phrases": self.cue_phrases,
+            "filename_tokens": self.filename_tokens,
+            "doc_lengths": self.doc_lengths,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'EHSIndex':
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported EHS index version: {data.get('version')}")
+        index = cls()
+        index.terms = data["terms"]
+        index.cue_phrases = data["cue_phrases"]
+        index.filename_tokens = data["filename_tokens"]
+        index.doc_lengths = data["doc_lengths"]
+        return index
+
+    def packed_items(self) -> Iterator[Tuple[str, bytes]]:
+        """Entries of the packed index: one JSON value per term and per cue phrase."""
+        meta = {"version": INDEX_VERSION, "filename_tokens": self.filename_tokens, "doc_lengths": self.doc_lengths}
+        yield "relevance", _json_bytes(meta)
+        for token, postings in self.terms.items():
+            yield "term:" + token, _json_bytes(postings)
+        for phrase, postings in self.cue_phrases.items():
+            yield "cue:" + phrase, _json_bytes(postings)
+
+    @classmethod
+    def from_packed(cls, packed: PackedCorpus) -> 'EHSIndex':
+        """Read-only index whose postings are decoded from the packed file on lookup."""
+        meta = json.loads(packed.raw("relevance"))
+        if meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported EHS index version: {meta.get('version')}")
+        index = cls()
+        index.terms = PackedPostings(packed, "term:", json.loads)
+        index.cue_phrases = PackedPostings(packed, "cue:", json.loads)
+        index.filename_tokens = meta["filename_tokens"]
+        index.doc_lengths = meta["doc_lengths"]
+        return index
+
+
+class EHSPassageIndex:
+    """
+    BM25 index over guideline passages.
+    
+    Only passage locations are stored; the text is sliced from the guideline
+    when a passage is returned.
+    """
+
+    def __init__(self):
+        # (filename, page, section, start, end) per passage id
+        self.passages: List[Tuple[str, int, str, int, int]] = []
+        self.lengths: List[int] = []
+        # token -> [[passage id, term frequency], ...]
+        self.postings: Dict[str, List[List[int]]] = {}
+
+    @classmethod
+    def build(cls, ehs_files: Dict[str, str]) -> 'EHSPassageIndex':
+        index = cls()
+        for filename, text in ehs_files.items():
+            index.add(filename, text)
+        return index
+
+    def add(self, filename: str, text: str) -> None:
+        """Index the passages of one guideline."""
+        for section, page, start, end in chunk_passages(text):
+            tokens = [t for t in tokenize(text[start:end]) if t not in STOPWORDS]
+            if not tokens:
+                continue
+            passage_id = len(self.passages)
+            self.passages.append((filename, page, section, start, end))
+            self.lengths.append(len(tokens))
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                self.postings.setdefault(token, []).append([passage_id, count])
+
+    def search(self, query: str, filenames: Optional[Iterable[str]] = None, k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Score passages against a query with BM25.
+        
+        Args:
+            query: Free-text query
+            filenames: Restrict results to these guidelines
+            k: Number of passages to return
+            
+        Returns:
+            (passage id, score) pairs, best first
+        """
+        if not self.passages:
+            return []
+        allowed: Optional[Set[str]] = set(filenames) if filenames is not None else None
+        total = len(self.passages)
+        avg_length = sum(self.lengths) / total
+
+        scores: Dict[int, float] = {}
+        for token in set(tokenize(query)) - STOPWORDS:
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for passage_id, tf in postings:
+                if allowed is not None and self.passages[passage_id][0] not in allowed:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[passage_id] / avg_length)
+                scores[passage_id] = scores.get(passage_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+    def to_dict(self) -> Dict:
+        return {"passages": self.passages, "lengths": self.lengths, "postings": self.postings}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'EHSPassageIndex':
+        index = cls()
+        index.passages = [tuple(p) for p in data["passages"]]
+        index.lengths = data["lengths"]
+        index.postings = data["postings"]
+        return index
+
+    def packed_items(self) -> Iterator[Tuple[str, bytes]]:
+        """Entries of the packed index: postings as flat uint32 (passage id, frequency) arrays."""
+        yield "passages", _json_bytes(self.passages)
+        yield "lengths", array('I', self.lengths).tobytes()
+        for token, postings in self.postings.items():
+            yield "post:" + token, array('I', chain.from_iterable(postings)).tobytes()
+
+    @classmethod
+    def from_packed(cls, packed: PackedCorpus) -> 'EHSPassageIndex':
+        """Read-only index whose postings are decoded from the packed file on search."""
+        index = cls()
+        index.passages = [tuple(p) for p in json.loads(packed.raw("passages"))]
+        index.lengths = _uint32(packed.raw("lengths"))
+
+        def decode(raw: bytes) -> List[Tuple[int, int]]:
+            values = _uint32(raw)
+            return list(zip(values[0::2], values[1::2]))
+
+        index.postings = PackedPostings(packed, "post:", decode)
+        return index
+
+
+def write_packed_indexes(path: Path, index: EHSIndex, passage_index: EHSPassageIndex) -> None:
+    """Write both indexes into one packed file, to be memory-mapped by every process."""
+    write_packed(path, chain(index.packed_items(), passage_index.packed_items()))
+
+
+def open_packed_indexes(path: Path) -> Tuple[EHSIndex, EHSPassageIndex]:
+    """Map a file written by write_packed_indexes."""
+    packed = PackedCorpus(path)
+    return EHSIndex.from_packed(packed), EHSPassageIndex.from_packed(packed)
@@ -2,18 +2,247 @@
 Process IFC EHS guidelines and extract relevant information.
 """
 
+import json
 import os
-import re
-from typing import Dict, List, Optional
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from loguru import logger
-import PyPDF2
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from utils.ehs_cache import EHSTextCache, atomic_write_text
+from utils.ehs_corpus import PackedCorpus, write_packed_corpus
+from utils.ehs_index import (
+    INDEX_VERSION, PAGE_BREAK, EHSIndex, EHSPassage, EHSPassageIndex, GuidelineMatch,
+    open_packed_indexes, write_packed_indexes
+)
+from utils.ehs_downloader import get_ehs_file_for_sector
+
+# PDF backends: PyMuPDF is much faster, PyPDF2 is the pure-Python fallback
+try:
+    import fitz  # PyMuPDF
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+
+try:
+    import PyPDF2
+    HAS_PYPDF2 = True
+except ImportError:
+    HAS_PYPDF2 = False
+
+# Bump whenever text extraction changes so cached texts are re-extracted
+EXTRACTOR_VERSION = "2"
+
+
+def default_backend() -> str:
+    """Return the fastest PDF backend available."""
+    if HAS_PYMUPDF:
+        return "pymupdf"
+    if HAS_PYPDF2:
+        return "pypdf2"
+    raise ImportError("No PDF backend available: install PyMuPDF or PyPDF2")
+
+
+def extract_text_from_pdf(pdf_path: str, backend: str = "pypdf2") -> str:
+    """
+    Extract text from a PDF file with improved error handling.
+    
+    Pages are separated by PAGE_BREAK. Defined at module level so it can
+    run in worker processes.
+    """
+    try:
+        pages = []
+        if backend == "pymupdf":
+            with fitz.open(pdf_path) as doc:
+                for page in doc:
+                    try:
+                        pages.append(page.get_text())
+                    except Exception as e:
+                        logger.warning(f"Error extracting text from page in {pdf_path}: {str(e)}")
+                        pages.append("")
+        else:
+            with open(pdf_path, 'rb') as file:
+                reader = PyPDF2.PdfReader(file)
+                for page in reader.pages:
+                    try:
+                        pages.append(page.extract_text() or "")
+                    except Exception as e:
+                        logger.warning(f"Error extracting text from page in {pdf_path}: {str(e)}")
+                        pages.append("")
+        
+        # Keep empty pages so page breaks map to page numbers
+        return ("\n" + PAGE_BREAK).join(pages).strip(" \t\r\n")
+    except Exception as e:
+        logger.error(f"Error reading PDF {pdf_path}: {str(e)}")
+        raise
+
+
+def extract_many(pdf_paths: List[str], backend: str, max_workers: Optional[int] = None) -> Dict[str, str]:
+    """
+    Extract text from several PDFs in parallel worker processes.
+    
+    PDF parsing is CPU-bound, so processes scale with cores where threads
+    would be serialized by the GIL.
+    
+    Returns:
+        Dictionary mapping PDF paths to their text ("" on failure)
+    """
+    results = {}
+    if not pdf_paths:
+        return results
+    
+    workers = max_workers or os.cpu_count() or 1
+    workers = min(workers, len(pdf_paths))
+    
+    if workers == 1:
+        for path in pdf_paths:
+            try:
+                results[path] = extract_text_from_pdf(path, backend)
+            except Exception as e:
+                logger.error(f"Error processing {os.path.basename(path)}: {str(e)}")
+                results[path] = ""
+        return results
+    
+    # Spawned workers: forking the multi-threaded Streamlit server is unsafe
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        future_to_path = {
+            executor.submit(extract_text_from_pdf, path, backend): path
+            for path in pdf_paths
+        }
+        
+        for future in as_completed(future_to_path):
+            path = future_to_path[future]
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                logger.error(f"Error processing {os.path.basename(path)}: {str(e)}")
+                results[path] = ""
+    
+    return results
+
+
+class LazyGuidelineStore(Mapping):
+    """
+    Read-only mapping of guideline filenames to text, loaded on first access.
+    
+    Only the `max_loaded` most recently used texts are kept in memory.
+    """
+    
+    def __init__(self, filenames: Iterable[str], loader: Callable[[List[str]], Dict[str, str]], max_loaded: int = 16):
+        self._filenames = sorted(filenames)
+        self._known = set(self._filenames)
+        self._loader = loader
+        self._max_loaded = max_loaded
+        self._loaded: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __getitem__(self, filename: str) -> str:
+        if filename not in self._known:
+            raise KeyError(filename)
+        with self._lock:
+            if filename in self._loaded:
+                self._loaded.move_to_end(filename)
+                return self._loaded[filename]
+        return self.load([filename])[filename]
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._filenames)
+    
+    def __len__(self) -> int:
+        return len(self._filenames)
+    
+    def __contains__(self, filename: object) -> bool:
+        return filename in self._known
+    
+    def load(self, filenames: Iterable[str]) -> Dict[str, str]:
+        """Load several guidelines at once, extracting cache misses in parallel."""
+        wanted = [f for f in dict.fromkeys(filenames) if f in self._known]
+        with self._lock:
+            missing = [f for f in wanted if f not in self._loaded]
+        texts = self._loader(missing) if missing else {}
+        
+        with self._lock:
+            for filename, text in texts.items():
+                self._loaded[filename] = text
+                self._loaded.move_to_end(filename)
+            result = {}
+            for filename in wanted:
+                text = self._loaded.get(filename)
+                if text is None:
+                    # Evicted by a concurrent load: serve the freshly read copy
+                    text = texts.get(filename, "")
+                else:
+                    self._loaded.move_to_end(filename)
+                result[filename] = text
+            while len(self._loaded) > self._max_loaded:
+                self._loaded.popitem(last=False)
+        return result
+    
+    @property
+    def loaded(self) -> List[str]:
+        """Filenames currently held in memory, least recently used first."""
+        with self._lock:
+            return list(self._loaded)
+
 
 class EHSProcessor:
-    def __init__(self, ehs_dir: str = "ifc-ehs"):
+    def __init__(
+        self,
+        ehs_dir: str = "ifc-ehs",
+        cache_dir: Optional[str] = "cache/ehs",
+        backend: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        lazy: bool = False,
+        max_loaded: int = 16,
+        warm_up: bool = False,
+        shared: bool = False
+    ):
+        """
+        Args:
+            ehs_dir: Directory containing the IFC EHS guideline PDFs
+            cache_dir: Directory of the extracted text cache (None disables it)
+            backend: PDF backend ("pymupdf" or "pypdf2"), fastest available by default
+            max_workers: Number of extraction processes (CPU count by default)
+            lazy: Load guidelines on first access instead of all at startup
+            max_loaded: Number of guideline texts kept in memory in lazy mode
+            warm_up: In lazy mode, fill the text cache for the whole corpus in a background thread
+            shared: Serve texts and index postings from packed, memory-mapped files shared
+                by all processes (requires cache_dir; pages are read on demand, so it implies lazy)
+        """
         self.ehs_dir = ehs_dir
+        self.backend = backend or default_backend()
+        self.max_workers = max_workers
+        self.lazy = lazy
+        # Backends produce different text, so they get separate cache entries
+        self.cache = EHSTextCache(cache_dir, f"{EXTRACTOR_VERSION}-{self.backend}") if cache_dir else None
+        self._warm_up_thread: Optional[threading.Thread] = None
+        self._index: Optional[EHSIndex] = None
+        self._passage_index: Optional[EHSPassageIndex] = None
+        self._index_lock = threading.Lock()
         self._validate_ehs_directory()
-        self._load_ehs_files()
+        
+        if shared and not self.cache:
+            logger.warning("Shared EHS corpus requires a cache directory, loading in memory")
+            shared = False
+        self.shared = shared
+        
+        if shared:
+            self.ehs_files = self._open_packed_corpus()
+        elif lazy:
+            # Indexes are loaded or built on the first query
+            self.ehs_files = LazyGuidelineStore(self._list_pdf_files(), self._read_texts, max_loaded)
+            if warm_up and self.cache:
+                self._warm_up_thread = threading.Thread(target=self._warm_up, name="ehs-warm-up", daemon=True)
+                self._warm_up_thread.start()
+        else:
+            self._load_ehs_files()
+            self._ensure_indexes()
+    
+    def _list_pdf_files(self) -> List[str]:
+        return [f for f in os.listdir(self.ehs_dir) if f.endswith('.pdf')]
         
     def _validate_ehs_directory(self) -> None:
         """Validate that the EHS directory exists and contains PDF files."""
@@ -27,45 +256,183 @@ class EHSProcessor:
         logger.info(f"Found {len(pdf_files)} EHS guideline PDFs")
     
     def _load_ehs_files(self) -> None:
-        """Load all EHS PDF files into memory."""
-        self.ehs_files = {}
-        pdf_files = [f for f in os.listdir(self.ehs_dir) if f.endswith('.pdf')]
+        """Load all EHS PDF files into memory, reusing the on-disk text cache."""
+        self.ehs_files = self._read_texts(self._list_pdf_files())
+    
+    def _read_texts(self, pdf_files: List[str]) -> Dict[str, str]:
+        """Read guideline texts from the cache, extracting misses in parallel."""
+        texts = {}
+        to_extract = []
+        for pdf in pdf_files:
+            text = self.cache.get(os.path.join(self.ehs_dir, pdf)) if self.cache else None
+            if text is None:
+                to_extract.append(pdf)
+            else:
+                texts[pdf] = text
+        
+        if to_extract:
+            logger.info(
+                f"Extracting text from {len(to_extract)} EHS PDFs with {self.backend} "
+                f"({len(texts)} cached)"
+            )
+            paths = [os.path.join(self.ehs_dir, pdf) for pdf in to_extract]
+            for path, text in extract_many(paths, self.backend, self.max_workers).items():
+                texts[os.path.basename(path)] = text
+                if self.cache and text:
+                    self.cache.put(path, text)
+        
+        if self.cache:
+            self.cache.flush()
+        return texts
+    
+    def _open_packed_corpus(self) -> PackedCorpus:
+        """Map the packed corpus for the current PDFs, writing it first if needed."""
+        pdf_files = sorted(self._list_pdf_files())
+        paths = [os.path.join(self.ehs_dir, pdf) for pdf in pdf_files]
+        corpus_path = self.cache.artifact_path(
+            "corpus", self.cache.corpus_fingerprint(paths, salt="corpus"), ".bin"
+        )
+        
+        if not corpus_path.exists():
+            # Extract misses once, then stream texts from the cache into the packed file
+            missing = [pdf for pdf, path in zip(pdf_files, paths) if self.cache.get(path) is None]
+            if missing:
+                self._read_texts(missing)
+            write_packed_corpus(
+                corpus_path,
+                ((pdf, self.cache.get(path) or "") for pdf, path in zip(pdf_files, paths))
+            )
+            # Processes still mapping an older corpus keep it until they exit
+            self.cache.prune_artifacts("corpus", keep=corpus_path)
+            logger.info(f"Packed {len(pdf_files)} EHS guidelines into {corpus_path}")
         
-        with ThreadPoolExecutor(max_workers=min(8, len(pdf_files))) as executor:
-            future_to_file = {
-                executor.submit(self._extract_text_from_pdf, os.path.join(self.ehs_dir, pdf)): pdf
-                for pdf in pdf_files
-            }
+        return PackedCorpus(corpus_path)
+    
+    def _warm_up(self) -> None:
+        """Fill the text cache and build the index, without keeping texts in memory."""
+        try:
+            missing = [
+                pdf for pdf in self._list_pdf_files()
+                if self.cache.get(os.path.join(self.ehs_dir, pdf)) is None
+            ]
+            if missing:
+                self._read_texts(missing)
+            self.index
+            logger.info(f"EHS cache warm-up done ({len(missing)} PDFs extracted)")
+        except Exception as e:
+            logger.error(f"EHS cache warm-up failed: {str(e)}")
+    
+    def wait_for_warm_up(self, timeout: Optional[float] = None) -> None:
+        """Block until the background warm-up (if any) has finished."""
+        if self._warm_up_thread:
+            self._warm_up_thread.join(timeout)
+    
+    def get_guidelines_for_sector(self, sector: str) -> Dict[str, str]:
+        """
+        Load only the guidelines mapped to a sector.
+        
+        Args:
+            sector: Sector name as used in config/risk_classification (e.g., "Agribusiness")
             
-            for future in as_completed(future_to_file):
-                pdf = future_to_file[future]
+        Returns:
+            Dictionary mapping guideline filenames to their content
+        """
+        filenames = [f for f in get_ehs_file_for_sector(sector) if f in self.ehs_files]
+        if isinstance(self.ehs_files, LazyGuidelineStore):
+            return self.ehs_files.load(filenames)
+        return {f: self.ehs_files[f] for f in filenames}
+    
+    def _extract_text_from_pdf(self, pdf_path: str) -> str:
+        """Extract text from a PDF file with the configured backend."""
+        return extract_text_from_pdf(pdf_path, self.backend)
+    
+    @property
+    def index(self) -> EHSIndex:
+        """Inverted index over the whole corpus, built or loaded on first use."""
+        if self._index is None:
+            self._ensure_indexes()
+        return self._index
+    
+    @property
+    def passage_index(self) -> EHSPassageIndex:
+        """BM25 passage index over the whole corpus, built or loaded on first use."""
+        if self._passage_index is None:
+            self._ensure_indexes()
+        return self._passage_index
+    
+    def _ensure_indexes(self) -> None:
+        with self._index_lock:
+            if self._index is None or self._passage_index is None:
+                self._index, self._passage_index = self._load_or_build_indexes()
+    
+    def _load_or_build_indexes(self) -> Tuple[EHSIndex, EHSPassageIndex]:
+        """
+        Load the persisted indexes for the current corpus, or build and persist them.
+        
+        In shared mode the indexes are packed into a memory-mapped file, so
+        their postings are not copied into every process.
+        """
+        pdf_files = sorted(self.ehs_files)
+        index_path = None
+        if self.cache:
+            paths = [os.path.join(self.ehs_dir, pdf) for pdf in pdf_files]
+            key = self.cache.corpus_fingerprint(paths, salt=f"index-{INDEX_VERSION}")
+            if self.shared:
+                index_path = self.cache.artifact_path("packed-index", key, ".bin")
+            else:
+                index_path = self.cache.artifact_path("index", key)
+            if index_path.exists():
                 try:
-                    text = future.result()
-                    self.ehs_files[pdf] = text
+                    if self.shared:
+                        return open_packed_indexes(index_path)
+                    data = json.loads(index_path.read_text(encoding='utf-8'))
+                    return EHSIndex.from_dict(data["relevance"]), EHSPassageIndex.from_dict(data["passages"])
                 except Exception as e:
-                    logger.error(f"Error processing {pdf}: {str(e)}")
-                    self.ehs_files[pdf] = ""
+                    logger.warning(f"Rebuilding unreadable EHS index: {str(e)}")
+        
+        index = EHSIndex()
+        passage_index = EHSPassageIndex()
+        if isinstance(self.ehs_files, LazyGuidelineStore):
+            # Read texts in batches to bypass the LRU and bound memory
+            for start in range(0, len(pdf_files), 8):
+                for filename, text in self._read_texts(pdf_files[start:start + 8]).items():
+                    index.add(filename, text)
+                    passage_index.add(filename, text)
+        else:
+            for filename in pdf_files:
+                index.add(filename, self.ehs_files[filename])
+                passage_index.add(filename, self.ehs_files[filename])
+        
+        if self.cache:
+            # The corpus changed since the last build: drop texts it no longer uses
+            self.cache.prune(pdf_files)
+        
+        if index_path:
+            try:
+                if self.shared:
+                    write_packed_indexes(index_path, index, passage_index)
+                    self.cache.prune_artifacts("packed-index", keep=index_path)
+                    # Serve from the mapped file: the dictionaries built here are released
+                    return open_packed_indexes(index_path)
+                data = {"relevance": index.to_dict(), "passages": passage_index.to_dict()}
+                atomic_write_text(index_path, json.dumps(data, ensure_ascii=False))
+                self.cache.prune_artifacts("index", keep=index_path)
+            except Exception as e:
+                logger.warning(f"Error writing EHS index: {str(e)}")
+        return index, passage_index
     
-    def _extract_text_from_pdf(self, pdf_path: str) -> str:
-        """Extract text from a PDF file with improved error handling."""
-        try:
-            with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ""
-                
-                for page in reader.pages:
-                    try:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + "\n"
-                    except Exception as e:
-                        logger.warning(f"Error extracting text from page in {pdf_path}: {str(e)}")
-                        continue
-                
-                return text.strip()
-        except Exception as e:
-            logger.error(f"Error reading PDF {pdf_path}: {str(e)}")
-            raise
+    def rank_guidelines(self, sector: str, subsector: Optional[str] = None) -> List[GuidelineMatch]:
+        """
+        Rank guidelines by relevance to a sector and subsector using the index.
+        
+        Args:
+            sector: The main sector (e.g., "Agribusiness")
+            subsector: Optional subsector (e.g., "Crop Production")
+            
+        Returns:
+            Matches (filename, score, matching sections), best first
+        """
+        return self.index.lookup(sector, subsector)
     
     def get_relevant_guidelines(self, sector: str, subsector: Optional[str] = None) -> Dict[str, str]:
         """
@@ -76,69 +443,53 @@ class EHSProcessor:
             subsector: Optional subsector (e.g., "Crop Production")
             
         Returns:
-            Dictionary mapping guideline filenames to their content
+            Dictionary mapping guideline filenames to their content, most relevant first
         """
-        relevant_files = {}
-        
-        # Normalize sector and subsector names
-        sector = sector.lower()
-        subsector = subsector.lower() if subsector else None
-        
-        for filename, content in self.ehs_files.items():
-            # Check if the file is relevant to the sector or subsector
-            if self._is_relevant_guideline(filename, content, sector, subsector):
-                relevant_files[filename] = content
+        filenames = [match.filename for match in self.rank_guidelines(sector, subsector)]
         
-        if not relevant_files:
+        if not filenames:
             logger.warning(f"No relevant guidelines found for sector: {sector}, subsector: {subsector}")
+            return {}
         
-        return relevant_files
+        if isinstance(self.ehs_files, LazyGuidelineStore):
+            return self.ehs_files.load(filenames)
+        return {filename: self.ehs_files[filename] for filename in filenames}
     
-    def _is_relevant_guideline(self, filename: str, content: str, sector: str, subsector: Optional[str]) -> bool:
+    def search(self, query: str, sector: Optional[str] = None, k: int = 5) -> List[EHSPassage]:
         """
-        Check if a guideline is relevant to the given sector and subsector.
+        Retrieve the guideline passages most relevant to a query.
         
         Args:
-            filename: The name of the guideline file
-            content: The content of the guideline
-            sector: The main sector
-            subsector: Optional subsector
+            query: Free-text query (e.g., "wastewater effluent limits")
+            sector: Optional sector restricting results to its guidelines
+            k: Number of passages to return
             
         Returns:
-            True if the guideline is relevant, False otherwise
+            Passages with source file, page and section, best first
         """
-        # Check filename for sector/subsector keywords
-        filename_lower = filename.lower()
-        if sector in filename_lower or (subsector and subsector in filename_lower):
-            return True
-        
-        # Check content for sector/subsector keywords
-        content_lower = content.lower()
-        
-        # Look for sector-specific sections
-        sector_patterns = [
-            rf"{sector}\s+guidelines",
-            rf"{sector}\s+standards",
-            rf"{sector}\s+requirements",
-            rf"{sector}\s+considerations"
-        ]
-        
-        if any(re.search(pattern, content_lower) for pattern in sector_patterns):
-            return True
-        
-        # If subsector is provided, check for subsector-specific content
-        if subsector:
-            subsector_patterns = [
-                rf"{subsector}\s+guidelines",
-                rf"{subsector}\s+standards",
-                rf"{subsector}\s+requirements",
-                rf"{subsector}\s+considerations"
-            ]
-            
-            if any(re.search(pattern, content_lower) for pattern in subsector_patterns):
-                return True
+        filenames = None
+        if sector:
+            allowed = set(get_ehs_file_for_sector(sector))
+            allowed.update(match.filename for match in self.rank_guidelines(sector))
+            allowed &= set(self.ehs_files)
+            if allowed:
+                filenames = allowed
+            else:
+                logger.warning(f"No guidelines mapped to sector {sector}, searching the whole corpus")
+        
+        hits = self.passage_index.search(query, filenames, k)
+        needed = {self.passage_index.passages[passage_id][0] for passage_id, _ in hits}
+        if isinstance(self.ehs_files, LazyGuidelineStore):
+            texts = self.ehs_files.load(needed)
+        else:
+            texts = {filename: self.ehs_files[filename] for filename in needed}
         
-        return False
+        passages = []
+        for passage_id, score in hits:
+            filename, page, section, start, end = self.passage_index.passages[passage_id]
+            text = texts.get(filename, "")[start:end].replace(PAGE_BREAK, "").strip()
+            passages.append(EHSPassage(filename, page, section, text, score))
+        return passages
     
     def get_guideline_summary(self, filename: str) -> str:
         """
@@ -159,4 +510,105 @@ class EHSProcessor:
         paragraphs = content.split('\n\n')
         summary = '\n\n'.join(paragraphs[:3])
         
-        return summary.strip() 
\ No newline at end of file
+        return summary.strip() 
+
+
+def format_ehs_passages(passages: List[EHSPassage], max_chars: int = 6000) -> str:
+    """
+    Format retrieved passages with their citations for a prompt, within a
+    character budget (roughly 4 characters per token).
+    
+    Args:
+        passages: Passages returned by EHSProcessor.search, best first
+        max_chars: Maximum length of the formatted text
+        
+    Returns:
+        Passages as quoted references, or "" when none fit
+    """
+    blocks = []
+    used = 0
+    for passage in passages:
+        header = f"[{passage.citation}]\n"
+        remaining = max_chars - used - len(header)
+        if remaining <= 0:
+            break
+        text = passage.text
+        if len(text) > remaining:
+            if blocks:
+                break
+            # Always keep at least the best passage, truncated
+            text = text[:remaining].rsplit(' ', 1)[0] + "…"
+        block = header + text
+        blocks.append(block)
+        used += len(block) + 2
+    return "\n\n".join(blocks)
+
+
+_processor_lock = threading.Lock()
+_processors: Dict[str, EHSProcessor] = {}
+_warm_up_started = False
+
+
+def get_ehs_processor(ehs_dir: str = "ifc-ehs") -> Optional[EHSProcessor]:
+    """
+    Return a shared EHSProcessor, or None when the guidelines are not
+    available. Texts and indexes come from memory-mapped files shared by
+    all worker processes.
+    """
+    # Serialized so a page render and the startup warm-up never build twice
+    with _processor_lock:
+        if ehs_dir not in _processors:
+            try:
+                _processors[ehs_dir] = EHSProcessor(ehs_dir, shared=True)
+            except (FileNotFoundError, ImportError) as e:
+                # Not cached: retried once the guidelines are downloaded
+                logger.warning(f"EHS guidelines unavailable: {str(e)}")
+                return None
+        return _processors[ehs_dir]
+
+
+def warm_up_ehs(ehs_dir: str = "ifc-ehs") -> None:
+    """
+    Build or map the EHS corpus and indexes in a background thread, once per
+    process, so the first Due Diligence or IC page does not wait for them.
+    Call at application startup; later calls do nothing, unless the
+    guidelines were missing (they are looked for again).
+    """
+    global _warm_up_started
+    with _processor_lock:
+        if _warm_up_started:
+            return
+        _warm_up_started = True
+
+    def run() -> None:
+        global _warm_up_started
+        try:
+            processor = get_ehs_processor(ehs_dir)
+            if processor is None:
+                with _processor_lock:
+                    _warm_up_started = False
+                return
+            processor.passage_index
+            logger.info("EHS guidelines ready")
+        except Exception as e:
+            logger.error(f"EHS warm-up failed: {str(e)}")
+
+    threading.Thread(target=run, name="ehs-startup-warm-up", daemon=True).start()
+
+
+def get_ehs_references(sector: str, subsector: Optional[str] = None, topic: str = "", k: int = 6, max_chars: int = 6000) -> str:
+    """
+    Retrieve and format the IFC EHS passages to cite for a deal.
+    
+    Returns:
+        Formatted passages, or "" when the guidelines are unavailable
+    """
+    processor = get_ehs_processor()
+    if processor is None:
+        return ""
+    query = " ".join(part for part in (subsector, topic, "environmental health safety impacts management") if part)
+    try:
+        return format_ehs_passages(processor.search(query, sector=sector, k=k), max_chars)
+    except Exception as e:
+        logger.error(f"Error retrieving EHS passages: {str(e)}")
+        return ""